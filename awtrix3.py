@@ -1,292 +1,6495 @@
+import collections
+import itertools
 import json
 
 import requests
 
 __version__ = "0.1.0"
 __all__ = [
+    "AdaptivePoller",
+    "Animation",
+    "AppLoop",
     "Awtrix3",
+    "Bitmap",
+    "ChangeEvent",
+    "ClockSync",
+    "ColorCorrector",
+    "DeviceEvent",
+    "DeviceStats",
+    "EventBus",
+    "FileSync",
+    "FirmwareRollout",
+    "Fleet",
+    "FleetBackup",
+    "FleetIndex",
+    "FleetReport",
+    "FleetResult",
+    "FramebufferPusher",
+    "HashRing",
+    "HealthChecker",
+    "HttpEventReceiver",
+    "IncrementalBackup",
+    "Inventory",
+    "LatencyHistogram",
+    "MetricStore",
+    "MqttEventReceiver",
+    "Panorama",
+    "PixelFont",
+    "RawJSON",
+    "RingBuffer",
+    "RollingChart",
+    "SharedFramebuffer",
+    "ShardedSupervisor",
+    "StatsPoller",
+    "TextMetrics",
+    "TextRasterizer",
+    "TextTemplate",
+    "choose_upload_strategy",
+    "convert_gif",
+    "discover",
+    "downsample_lttb",
+    "downsample_minmax",
     "format_stats",
     "format_uptime",
     "generate_config",
+    "hex_to_rgb",
+    "int_to_rgb",
+    "iter_json",
     "load_config",
     "main",
+    "rgb565_to_rgb",
+    "rgb_to_hex",
+    "rgb_to_int",
+    "rgb_to_rgb565",
+    "scale_to_height",
+    "upload_animation",
+    "AWTRIX_FONT",
     "DEFAULT_BRIGHTNESS",
+    "MDNS_SERVICE",
+    "POLLED_METRICS",
+    "SCROLL_PIXELS_PER_SECOND",
 ]
 
 DEFAULT_BRIGHTNESS = 80
 
 
+class _StreamingBody:
+    """Request body produced chunk by chunk with a known total length
+
+    requests sends iterables that define ``__len__`` with a Content-Length
+    header instead of chunked transfer encoding, which the device's web
+    server doesn't accept.
+    """
+
+    def __init__(self, parts, length):
+        self._parts = parts
+        self._length = length
+        self._active = None
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        self._active = self._parts()
+        for part in self._active:
+            if part:
+                yield part
+
+    def close(self):
+        """Stop a pass that was cut short, releasing the buffers it holds"""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+
+
+def _multipart_file_body(field, filename, source, chunk_size=64 * 1024):
+    """Build a streaming multipart/form-data body for one file
+
+    Args:
+        field (str): Form field name
+        filename (str): File name sent in the part header
+        source: Path to a local file, or a bytes-like object (including mmap)
+
+    Returns:
+        tuple: (_StreamingBody, content type header value)
+    """
+    import os
+    import uuid
+
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+
+        def chunks():
+            with open(source, "rb") as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    else:
+        with memoryview(source) as view:
+            size = view.nbytes
+
+        def chunks():
+            # Release every view as soon as it is sent, so the source (e.g.
+            # an mmap) can be closed once the body is done or closed
+            with memoryview(source) as base, base.cast("B") as view:
+                for start in range(0, size, chunk_size):
+                    with view[start : start + chunk_size] as chunk:
+                        yield chunk
+
+    def parts():
+        yield head
+        yield from chunks()
+        yield tail
+
+    body = _StreamingBody(parts, len(head) + size + len(tail))
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class RawJSON(bytes):
+    """Pre-encoded JSON that the streaming encoder embeds verbatim"""
+
+
+def _is_pixel_buffer(value):
+    from array import array
+
+    # numpy scalars have ravel() too, but are plain JSON values
+    return isinstance(value, (array, memoryview)) or (
+        type(value).__module__ == "numpy" and getattr(value, "ndim", 0) >= 1
+    )
+
+
+def _needs_streaming(obj):
+    """Return True if a payload holds buffers or pre-encoded JSON"""
+    if isinstance(obj, RawJSON) or _is_pixel_buffer(obj):
+        return True
+    if isinstance(obj, dict):
+        return any(_needs_streaming(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(
+            _needs_streaming(value)
+            for value in obj
+            if not isinstance(value, (str, int, float, bool))
+        )
+    return False
+
+
+def _iter_json_parts(obj, chunk_size):
+    if isinstance(obj, RawJSON):
+        yield bytes(obj)
+    elif isinstance(obj, dict):
+        yield b"{"
+        for index, (key, value) in enumerate(obj.items()):
+            yield (b',"' if index else b'"') + json.dumps(str(key))[1:].encode()
+            yield b":"
+            yield from _iter_json_parts(value, chunk_size)
+        yield b"}"
+    elif isinstance(obj, (list, tuple)) and _needs_streaming(obj):
+        yield b"["
+        for index, value in enumerate(obj):
+            if index:
+                yield b","
+            yield from _iter_json_parts(value, chunk_size)
+        yield b"]"
+    elif _is_pixel_buffer(obj):
+        if isinstance(obj, memoryview):
+            values = obj if obj.ndim == 1 else obj.cast("B").cast(obj.format)
+        else:
+            values = obj.ravel() if hasattr(obj, "ravel") else obj
+        yield b"["
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start : start + chunk_size].tolist()
+            text = ",".join(map(str, chunk))
+            yield (b"," if start else b"") + text.encode()
+        yield b"]"
+    else:
+        yield json.dumps(obj).encode()
+
+
+def iter_json(obj, chunk_size=16 * 1024):
+    """Encode a payload as JSON in chunks of roughly ``chunk_size`` bytes
+
+    ``array.array``, ``memoryview`` and numpy arrays are written as JSON int
+    arrays straight from the buffer, a slice at a time, without building a
+    Python list of the whole buffer. ``RawJSON`` values are copied verbatim.
+
+    Args:
+        obj: Payload made of dicts, lists, scalars, buffers and RawJSON
+        chunk_size (int): Target size of each yielded chunk in bytes
+
+    Yields:
+        bytes: Consecutive pieces of the encoded document
+    """
+    pending = []
+    size = 0
+    # A slice of n ints encodes to at most ~11 bytes per int
+    for part in _iter_json_parts(obj, max(chunk_size // 11, 1)):
+        pending.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield b"".join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield b"".join(pending)
+
+
+def _json_body(obj, chunk_size=16 * 1024):
+    """Build a streaming request body for a JSON payload
+
+    The payload is encoded twice: once to measure the Content-Length, with
+    each chunk thrown away as soon as it is counted, and again while
+    sending, so memory stays at one chunk whatever the size.
+    """
+    length = sum(len(chunk) for chunk in iter_json(obj, chunk_size))
+    return _StreamingBody(lambda: iter_json(obj, chunk_size), length)
+
+
 class Awtrix3:
-    def __init__(self, host, auth=None):
+    def __init__(self, host, auth=None, timeout=None):
         if not host or not isinstance(host, str):
             raise ValueError("Host must be a non-empty string")
         # Clean up host URL (remove http/https if present)
         host = host.replace("http://", "").replace("https://", "").strip("/")
+        self.host = host
         self.base_url = f"http://{host}/api"
         self.auth = auth
+        self.timeout = timeout
+
+    @property
+    def _request_kwargs(self):
+        """Keyword arguments passed to every request"""
+        if self.timeout is None:
+            return {"auth": self.auth}
+        return {"auth": self.auth, "timeout": self.timeout}
+
+    def _post_stream(self, url, data, params=None):
+        """POST a JSON payload whose body is streamed in chunks"""
+        response = requests.post(
+            url,
+            params=params,
+            data=_json_body(data),
+            headers={"Content-Type": "application/json"},
+            **self._request_kwargs,
+        )
+        response.raise_for_status()
+        return response
+
+    def notify(self, text, **kwargs):
+        """Send a text notification, with optional extra notification keys"""
+        data = {"text": text, **kwargs}
+        if _needs_streaming(data):
+            response = self._post_stream(f"{self.base_url}/notify", data)
+            return response.json() if response.text else None
+        response = requests.post(
+            f"{self.base_url}/notify", json=data, **self._request_kwargs
+        )
+        response.raise_for_status()
+        return response.json() if response.text else None
+
+    def stats(self, typed=False):
+        """Get device statistics
+
+        Args:
+            typed (bool): Return a compact DeviceStats instead of a dict
+        """
+        response = requests.get(f"{self.base_url}/stats", **self._request_kwargs)
+        response.raise_for_status()
+        if typed:
+            return DeviceStats.from_json(response.content)
+        return response.json()
+
+    def power(self, on=True):
+        """Turn device on/off"""
+        data = {"power": on}
+        response = requests.post(
+            f"{self.base_url}/power", json=data, **self._request_kwargs
+        )
+        response.raise_for_status()
+        return response.json() if response.text else None
+
+    def custom_app(self, name, text, **kwargs):
+        """Create/update a custom app
+
+        Pixel data in ``draw`` commands may be given as ``array.array``,
+        ``memoryview`` or numpy buffers; such payloads are encoded straight
+        from the buffers into the request body in chunks.
+        """
+        data = {"text": text, **kwargs}
+        if _needs_streaming(data):
+            response = self._post_stream(
+                f"{self.base_url}/custom", data, params={"name": name}
+            )
+        else:
+            response = requests.post(
+                f"{self.base_url}/custom",
+                params={"name": name},
+                json=data,
+                **self._request_kwargs,
+            )
+            response.raise_for_status()
+        # API returns plain text "OK", not JSON
+        try:
+            return response.json() if response.text.strip() else None
+        except json.JSONDecodeError:
+            return {"status": response.text.strip()} if response.text.strip() else None
 
-    def notify(self, text):
-        """Send a simple text notification"""
-        data = {"text": text}
-        response = requests.post(f"{self.base_url}/notify", json=data, auth=self.auth)
+    def play_sound(self, sound_name):
+        """Play a sound by name"""
+        data = {"sound": sound_name}
+        response = requests.post(
+            f"{self.base_url}/sound", json=data, **self._request_kwargs
+        )
         response.raise_for_status()
         return response.json() if response.text else None
 
-    def stats(self):
-        """Get device statistics"""
-        response = requests.get(f"{self.base_url}/stats", auth=self.auth)
+    def delete_app(self, name):
+        """Delete a custom app by name"""
+        if not name or not isinstance(name, str):
+            raise ValueError("App name must be a non-empty string")
+        response = requests.post(
+            f"{self.base_url}/custom", params={"name": name}, **self._request_kwargs
+        )
+        response.raise_for_status()
+        # API returns plain text "OK", not JSON
+        try:
+            return response.json() if response.text.strip() else None
+        except json.JSONDecodeError:
+            return {"status": response.text.strip()} if response.text.strip() else None
+
+    def list_apps(self, typed=False):
+        """Get list of apps currently in the loop
+
+        Args:
+            typed (bool): Return a compact AppLoop instead of a dict
+        """
+        response = requests.get(f"{self.base_url}/loop", **self._request_kwargs)
+        response.raise_for_status()
+        if typed:
+            return AppLoop.from_json(response.content)
+        return response.json()
+
+    def get_raw(self, endpoint):
+        """Get an API endpoint's response body without parsing it
+
+        Args:
+            endpoint (str): Path under /api, e.g. "stats" or "loop"
+
+        Returns:
+            bytes: Raw response body
+        """
+        response = requests.get(f"{self.base_url}/{endpoint}", **self._request_kwargs)
+        response.raise_for_status()
+        return response.content
+
+    def get_settings(self):
+        """Get current device settings for backup"""
+        response = requests.get(f"{self.base_url}/settings", **self._request_kwargs)
         response.raise_for_status()
         return response.json()
 
-    def power(self, on=True):
-        """Turn device on/off"""
-        data = {"power": on}
-        response = requests.post(f"{self.base_url}/power", json=data, auth=self.auth)
-        response.raise_for_status()
-        return response.json() if response.text else None
+    def backup_settings(self, filepath=None, incremental=False):
+        """Backup device settings to JSON file
+
+        Args:
+            filepath (str): Path to save backup file. If None, returns settings dict.
+            incremental (bool): Append to an IncrementalBackup chain at
+                ``filepath`` instead of writing a full snapshot
+
+        Returns:
+            dict: Settings data if filepath is None
+            str: Filepath where backup was saved if filepath provided
+        """
+        import json
+        from datetime import datetime
+
+        settings = self.get_settings()
+
+        # Add metadata to backup
+        backup_data = {
+            "backup_timestamp": datetime.now().isoformat(),
+            "backup_version": "1.0",
+            "device_stats": self.stats(),
+            "settings": settings,
+        }
+
+        if filepath is None:
+            return backup_data
+
+        if incremental:
+            IncrementalBackup(filepath).append(backup_data)
+            return filepath
+
+        with open(filepath, "w") as f:
+            json.dump(backup_data, f, indent=2)
+
+        return filepath
+
+    def restore_settings(self, backup_data, at=None):
+        """Restore device settings from backup data
+
+        Args:
+            backup_data (dict or str): Backup data dict or filepath to backup
+                JSON or an incremental backup chain
+            at (str): For a chain, restore the backup in effect at this ISO
+                timestamp (default: latest)
+
+        Returns:
+            dict: Result of settings update
+        """
+        import json
+
+        if isinstance(backup_data, str):
+            # Load from file
+            path = backup_data
+            try:
+                with open(path, "r") as f:
+                    backup_data = json.load(f)
+            except json.JSONDecodeError:
+                if not IncrementalBackup.is_chain(path):
+                    raise
+                backup_data = {"record": "base"}
+            if backup_data.get("record") == "base":
+                # Incremental chain: one JSON record per line
+                backup_data = IncrementalBackup(path).at(at)
+                if backup_data is None:
+                    raise ValueError(f"No backup at or before {at} in {path}")
+
+        if "settings" not in backup_data:
+            raise ValueError("Invalid backup data: missing 'settings' key")
+
+        settings = backup_data["settings"]
+
+        # Apply settings using existing configure_settings method if available
+        if hasattr(self, "configure_settings"):
+            return self.configure_settings(settings)
+        else:
+            # Fall back to direct API call
+            response = requests.post(
+                f"{self.base_url}/settings", json=settings, **self._request_kwargs
+            )
+            response.raise_for_status()
+            return response.json() if response.text else None
+
+    def configure_settings(self, settings):
+        """Configure device settings with custom JSON payload"""
+        if not isinstance(settings, dict):
+            raise ValueError("Settings must be a dictionary")
+        response = requests.post(
+            f"{self.base_url}/settings", json=settings, **self._request_kwargs
+        )
+        response.raise_for_status()
+        return response.json() if response.text else None
+
+    def upload_file(self, source, remote_path):
+        """Upload a file to the device filesystem
+
+        The file is streamed from disk (or from a bytes-like object) in
+        chunks rather than read into memory first.
+
+        Args:
+            source (str or bytes): Local file path or file contents
+            remote_path (str): Destination path, e.g. "/ICONS/mets.gif"
+
+        Returns:
+            dict: Response from the device, if any
+        """
+        if not remote_path or not remote_path.startswith("/"):
+            raise ValueError("Remote path must be an absolute path")
+        body, content_type = _multipart_file_body("data", remote_path, source)
+        try:
+            response = requests.post(
+                f"http://{self.host}/edit",
+                data=body,
+                headers={"Content-Type": content_type},
+                **self._request_kwargs,
+            )
+        finally:
+            body.close()
+        response.raise_for_status()
+        try:
+            return response.json() if response.text.strip() else None
+        except json.JSONDecodeError:
+            return {"status": response.text.strip()}
+
+    def update_firmware(self, image):
+        """Upload a firmware image; the device reboots once it's applied
+
+        The image is streamed in chunks, from disk or from a bytes-like
+        object such as an ``mmap`` shared between uploads.
+
+        Args:
+            image (str or bytes): Path to a firmware .bin, or its contents
+
+        Returns:
+            dict: Response from the device, if any
+        """
+        body, content_type = _multipart_file_body("update", "firmware.bin", image)
+        try:
+            response = requests.post(
+                f"http://{self.host}/update",
+                data=body,
+                headers={"Content-Type": content_type},
+                **self._request_kwargs,
+            )
+        finally:
+            body.close()
+        response.raise_for_status()
+        return {"status": response.text.strip()} if response.text.strip() else None
+
+    def list_files(self, directory="/"):
+        """List a directory of the device filesystem
+
+        Args:
+            directory (str): Directory to list, e.g. "/ICONS"
+
+        Returns:
+            list: Dicts with ``type`` ("file" or "dir"), absolute ``name``
+            and, when the device reports it, ``size``
+        """
+        response = requests.get(
+            f"http://{self.host}/list",
+            params={"dir": directory},
+            **self._request_kwargs,
+        )
+        response.raise_for_status()
+        entries = []
+        for entry in response.json():
+            name = entry["name"]
+            if not name.startswith("/"):
+                name = f"{directory.rstrip('/')}/{name}"
+            entries.append({**entry, "name": name})
+        return entries
+
+    def delete_file(self, remote_path):
+        """Delete a file from the device filesystem
+
+        Args:
+            remote_path (str): Absolute path, e.g. "/ICONS/mets.gif"
+
+        Returns:
+            dict: Response from the device, if any
+        """
+        if not remote_path or not remote_path.startswith("/"):
+            raise ValueError("Remote path must be an absolute path")
+        response = requests.delete(
+            f"http://{self.host}/edit",
+            data={"path": remote_path},
+            **self._request_kwargs,
+        )
+        response.raise_for_status()
+        try:
+            return response.json() if response.text.strip() else None
+        except json.JSONDecodeError:
+            return {"status": response.text.strip()}
+
+    def _build_time_format(self, format_24hr, show_seconds):
+        """Build time format string based on options"""
+        if format_24hr:
+            return "HH:mm:ss" if show_seconds else "HH:mm"
+        else:
+            return "hh:mm:ss A" if show_seconds else "hh:mm A"
+
+    def clock_profile(self, format_24hr=True, show_seconds=False, minimal=True):
+        """Configure device as a minimal clock with specified time format
+
+        Args:
+            format_24hr (bool): Use 24-hour format if True, 12-hour if False
+            show_seconds (bool): Include seconds in time display
+            minimal (bool): Strip down to minimal clock settings
+
+        Returns:
+            dict: Result of settings update
+        """
+        time_format = self._build_time_format(format_24hr, show_seconds)
+
+        settings = {
+            "timeFormat": time_format,
+            "brightness": DEFAULT_BRIGHTNESS,
+        }
+
+        if minimal:
+            # Minimal clock settings - strip down non-essential features
+            settings.update(
+                {
+                    "showWeekday": False,
+                    "showDate": False,
+                    "showTemp": False,
+                    "showHumidity": False,
+                    "showBattery": False,
+                    "showSeconds": show_seconds,
+                    "autoTransition": True,
+                    "transitionTime": 250,
+                    "matrixLayout": 1,
+                    "colorCorrection": [255, 255, 255],
+                    "gamma": 2.8,
+                    "upperCaseLetters": False,
+                    "scrollSpeed": 100,
+                    "scrollPause": 3000,
+                    "textOffset": 6,
+                    "centerText": True,
+                }
+            )
+
+        return self.configure_settings(settings)
+
+
+class DeviceStats:
+    """Compact ``stats()`` result with a slot per known field
+
+    Known fields are the ones the firmware reports plus those
+    ``format_stats`` understands, and are None when not reported. Fields
+    the device reports as null are remembered in ``nulls`` so they survive
+    ``to_dict()``. Anything else goes into ``extra``, which stays None when
+    there is nothing to keep. String values are interned, so thousands of
+    snapshots share one copy of each version or app name. Supports
+    ``stats["bat"]`` and ``stats.get()`` like the plain dict.
+    """
+
+    FIELDS = (
+        "bat",
+        "bat_raw",
+        "battery",
+        "type",
+        "lux",
+        "ldr_raw",
+        "ram",
+        "bri",
+        "temp",
+        "hum",
+        "uptime",
+        "wifi_signal",
+        "messages",
+        "version",
+        "firmware",
+        "indicator1",
+        "indicator2",
+        "indicator3",
+        "app",
+        "uid",
+        "matrix",
+        "ip",
+        "hostname",
+        "ssid",
+    )
+    __slots__ = FIELDS + ("extra", "nulls")
+
+    def __init__(self, **fields):
+        self._fill(fields)
+
+    def _fill(self, data):
+        import sys
+
+        intern = sys.intern
+        get = data.get
+        nulls = None
+        for name, setter in self._SETTERS:
+            value = get(name)
+            if value is None:
+                if name in data:
+                    nulls = (nulls or ()) + (name,)
+            elif type(value) is str:
+                value = intern(value)
+            setter(self, value)
+        self.nulls = frozenset(nulls) if nulls else None
+        known = self._KNOWN
+        if known.issuperset(data):
+            self.extra = None
+        else:
+            self.extra = {key: value for key, value in data.items() if key not in known}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a parsed ``stats()`` dict"""
+        stats = cls.__new__(cls)
+        stats._fill(data)
+        return stats
+
+    @classmethod
+    def from_json(cls, body):
+        """Build straight from a raw response body (bytes or str)
+
+        Raises:
+            ValueError: if the body isn't a JSON object
+        """
+        data = json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+        return cls.from_dict(data)
+
+    def to_dict(self):
+        """Return the plain dict ``stats()`` would have returned"""
+        data = {
+            name: value
+            for name in self.FIELDS
+            if (value := getattr(self, name)) is not None
+        }
+        if self.nulls:
+            data.update(dict.fromkeys(self.nulls))
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, key, default=None):
+        """Return a field like ``dict.get``"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in self._KNOWN:
+            value = getattr(self, key)
+            if value is not None or (self.nulls and key in self.nulls):
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._KNOWN:
+            return getattr(self, key) is not None or bool(
+                self.nulls and key in self.nulls
+            )
+        return bool(self.extra) and key in self.extra
+
+    def __eq__(self, other):
+        if isinstance(other, DeviceStats):
+            other = other.to_dict()
+        if not isinstance(other, dict):
+            return NotImplemented
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"DeviceStats({self.to_dict()!r})"
+
+
+DeviceStats._KNOWN = frozenset(DeviceStats.FIELDS)
+# Slot descriptors' setters, bound once: the fastest way to fill the slots
+DeviceStats._SETTERS = tuple(
+    (name, getattr(DeviceStats, name).__set__) for name in DeviceStats.FIELDS
+)
+
+
+class AppLoop:
+    """Compact ``list_apps()`` result: app names in loop order
+
+    The firmware answers with ``{"Time": 0, "Date": 1, ...}``. Only the
+    interned names are kept, in a tuple; the position is the index. Works
+    like the plain dict for lookups, iteration and ``len()``.
+    """
+
+    __slots__ = ("names",)
+
+    def __init__(self, names):
+        import sys
+
+        self.names = tuple(sys.intern(name) for name in names)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a parsed ``list_apps()`` dict"""
+        return cls(sorted(data, key=data.__getitem__))
+
+    @classmethod
+    def from_json(cls, body):
+        """Build straight from a raw response body (bytes or str)
+
+        Raises:
+            ValueError: if the body isn't a JSON object
+        """
+        data = json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+        return cls.from_dict(data)
+
+    def to_dict(self):
+        """Return the plain dict ``list_apps()`` would have returned"""
+        return {name: position for position, name in enumerate(self.names)}
+
+    def __getitem__(self, name):
+        try:
+            return self.names.index(name)
+        except ValueError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        """Return an app's position like ``dict.get``"""
+        return self.names.index(name) if name in self.names else default
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __eq__(self, other):
+        if isinstance(other, AppLoop):
+            return self.names == other.names
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.names)
+
+    def __repr__(self):
+        return f"AppLoop({list(self.names)!r})"
+
+
+def format_stats(stats_data):
+    """Format stats data in a minimal aligned table style"""
+    import json
+
+    if isinstance(stats_data, DeviceStats):
+        stats_data = stats_data.to_dict()
+    if not stats_data or not isinstance(stats_data, dict):
+        return json.dumps(stats_data, indent=2)
+
+    # Collect table rows
+    rows = []
+    known_fields = set()
+
+    # Define field mappings and formatting
+    field_mappings = [
+        ("battery", "Battery", lambda x: f"{x}%"),
+        ("uptime", "Uptime", lambda x: format_uptime(x)),
+        ("ram", "Memory", lambda x: f"{x} KB"),
+        ("temp", "Temperature", lambda x: f"{x}°C"),
+        ("wifi_signal", "WiFi Signal", lambda x: f"{x} dBm"),
+        ("version", "Version", lambda x: str(x)),
+        ("firmware", "Firmware", lambda x: str(x)),
+        ("ip", "IP Address", lambda x: str(x)),
+        ("hostname", "Hostname", lambda x: str(x)),
+        ("ssid", "WiFi SSID", lambda x: str(x)),
+    ]
+
+    # Process known fields
+    for field_key, field_label, formatter in field_mappings:
+        if field_key in stats_data:
+            try:
+                formatted_value = formatter(stats_data[field_key])
+                rows.append((field_label, formatted_value))
+                known_fields.add(field_key)
+            except (TypeError, ValueError):
+                # Fallback to string representation if formatting fails
+                rows.append((field_label, str(stats_data[field_key])))
+                known_fields.add(field_key)
+
+    if not rows:
+        return json.dumps(stats_data, indent=2)
+
+    # Calculate column widths
+    max_label_width = max(len(row[0]) for row in rows)
+
+    # Build table
+    output = []
+    output.append(f"{'Metric':<{max_label_width}} Value")
+    output.append("-" * (max_label_width + 20))
+
+    for label, value in rows:
+        output.append(f"{label:<{max_label_width}} {value}")
+
+    # Handle any unknown fields
+    additional_data = {k: v for k, v in stats_data.items() if k not in known_fields}
+    if additional_data:
+        output.append("")
+        output.append("Additional Data:")
+        output.append(json.dumps(additional_data, indent=2))
+
+    return "\n".join(output)
+
+
+def format_uptime(uptime_seconds):
+    """Format uptime seconds into human-readable format"""
+    if isinstance(uptime_seconds, (int, float)):
+        hours = int(uptime_seconds // 3600)
+        minutes = int((uptime_seconds % 3600) // 60)
+        if hours > 0:
+            return f"{hours}h {minutes}m"
+        else:
+            return f"{minutes}m"
+    else:
+        return str(uptime_seconds)
+
+
+# Awtrix pixel font, one entry per glyph. Rows are listed top to bottom and
+# separated by spaces; "#" is a lit pixel and "." is unlit.
+_AWTRIX_GLYPHS = {
+    " ": ".. .. .. .. ..",
+    "!": "# # # . #",
+    '"': "#.# #.# ... ... ...",
+    "#": ".#.#. ##### .#.#. ##### .#.#.",
+    "$": ".## ##. .#. .## ##.",
+    "%": "#.# ..# .#. #.. #.#",
+    "&": ".#. #.# .#. #.# .##",
+    "'": "# # . . .",
+    "(": ".# #. #. #. .#",
+    ")": "#. .# .# .# #.",
+    "*": "... #.# .#. #.# ...",
+    "+": "... .#. ### .#. ...",
+    ",": ". . . # #",
+    "-": "... ... ### ... ...",
+    ".": ". . . . #",
+    "/": "..# ..# .#. #.. #..",
+    "0": "### #.# #.# #.# ###",
+    "1": ".#. ##. .#. .#. ###",
+    "2": "### ..# ### #.. ###",
+    "3": "### ..# ### ..# ###",
+    "4": "#.# #.# ### ..# ..#",
+    "5": "### #.. ### ..# ###",
+    "6": "### #.. ### #.# ###",
+    "7": "### ..# ..# ..# ..#",
+    "8": "### #.# ### #.# ###",
+    "9": "### #.# ### ..# ###",
+    ":": ". # . # .",
+    ";": ".. .# .. .# #.",
+    "<": "..# .#. #.. .#. ..#",
+    "=": "... ### ... ### ...",
+    ">": "#.. .#. ..# .#. #..",
+    "?": "### ..# .## ... .#.",
+    "@": "### #.# #.# #.. ###",
+    "A": "### #.# ### #.# #.#",
+    "B": "##. #.# ##. #.# ##.",
+    "C": "### #.. #.. #.. ###",
+    "D": "##. #.# #.# #.# ##.",
+    "E": "### #.. ### #.. ###",
+    "F": "### #.. ### #.. #..",
+    "G": "### #.. #.# #.# ###",
+    "H": "#.# #.# ### #.# #.#",
+    "I": "### .#. .#. .#. ###",
+    "J": "..# ..# ..# #.# ###",
+    "K": "#.# #.# ##. #.# #.#",
+    "L": "#.. #.. #.. #.. ###",
+    "M": "#...# ##.## #.#.# #...# #...#",
+    "N": "#..# ##.# #.## #..# #..#",
+    "O": "### #.# #.# #.# ###",
+    "P": "### #.# ### #.. #..",
+    "Q": "### #.# #.# ### ..#",
+    "R": "### #.# ##. #.# #.#",
+    "S": "### #.. ### ..# ###",
+    "T": "### .#. .#. .#. .#.",
+    "U": "#.# #.# #.# #.# ###",
+    "V": "#.# #.# #.# #.# .#.",
+    "W": "#...# #...# #.#.# ##.## #...#",
+    "X": "#.# #.# .#. #.# #.#",
+    "Y": "#.# #.# .#. .#. .#.",
+    "Z": "### ..# .#. #.. ###",
+    "[": "## #. #. #. ##",
+    "\\": "#.. #.. .#. ..# ..#",
+    "]": "## .# .# .# ##",
+    "^": ".#. #.# ... ... ...",
+    "_": "... ... ... ... ###",
+    "`": "#. .# .. .. ..",
+    "a": "... .## #.# #.# .##",
+    "b": "#.. ##. #.# #.# ##.",
+    "c": "... .## #.. #.. .##",
+    "d": "..# .## #.# #.# .##",
+    "e": "... .#. ### #.. .##",
+    "f": ".## #.. ### #.. #..",
+    "g": "... .## #.# .## ###",
+    "h": "#.. ##. #.# #.# #.#",
+    "i": "# . # # #",
+    "j": "..# ... ..# #.# .#.",
+    "k": "#.. #.# ##. #.# #.#",
+    "l": "# # # # #",
+    "m": "..... ##.#. #.#.# #.#.# #.#.#",
+    "n": "... ##. #.# #.# #.#",
+    "o": "... .#. #.# #.# .#.",
+    "p": "... ##. #.# ##. #..",
+    "q": "... .## #.# .## ..#",
+    "r": "... .## #.. #.. #..",
+    "s": "... .## ##. ..# ##.",
+    "t": ".#. ### .#. .#. ..#",
+    "u": "... #.# #.# #.# .##",
+    "v": "... #.# #.# #.# .#.",
+    "w": "..... #...# #.#.# #.#.# .#.#.",
+    "x": "... #.# .#. .#. #.#",
+    "y": "... #.# .## ..# ##.",
+    "z": "... ### .## #.. ###",
+    "{": ".## .#. ##. .#. .##",
+    "|": "# # # # #",
+    "}": "##. .#. .## .#. ##.",
+    "~": "... .## ##. ... ...",
+    "°": "### #.# ### ... ...",
+}
+
+
+class PixelFont:
+    """Bitmap font made of fixed-height glyphs
+
+    Args:
+        name (str): Font name
+        glyphs (dict): Mapping of character to space-separated glyph rows
+        height (int): Glyph height in pixels
+        spacing (int): Blank columns between glyphs
+        y_offset (int): Row at which the font sits on the matrix
+        fallback (str): Glyph drawn for characters missing from the font
+    """
+
+    def __init__(self, name, glyphs, height=5, spacing=1, y_offset=1, fallback="?"):
+        if not name or not isinstance(name, str):
+            raise ValueError("Font name must be a non-empty string")
+        for char, rows in glyphs.items():
+            if len(rows.split()) != height:
+                raise ValueError(f"Glyph {char!r} must have {height} rows")
+        self.name = name
+        self.glyphs = dict(glyphs)
+        self.height = height
+        self.spacing = spacing
+        self.y_offset = y_offset
+        self.fallback = fallback if fallback in self.glyphs else None
+        self.version = 0
+
+    def __repr__(self):
+        return f"PixelFont({self.name!r})"
+
+    def set_glyph(self, char, rows):
+        """Add or replace a glyph
+
+        Bumps ``version`` so renderers drop bitmaps drawn with the old glyph.
+
+        Args:
+            char (str): Character to define
+            rows (str): Space-separated glyph rows
+        """
+        if len(rows.split()) != self.height:
+            raise ValueError(f"Glyph {char!r} must have {self.height} rows")
+        self.glyphs[char] = rows
+        self.version += 1
+
+    def rows(self, char):
+        """Return the glyph rows for a character as lists of booleans"""
+        rows = self.glyphs.get(char, self.glyphs.get(self.fallback))
+        if rows is None:
+            return [[] for _ in range(self.height)]
+        return [[pixel == "#" for pixel in row] for row in rows.split()]
+
+    def glyph_width(self, char):
+        """Return the width of a character's glyph in pixels"""
+        rows = self.glyphs.get(char, self.glyphs.get(self.fallback))
+        return len(rows.split(" ", 1)[0]) if rows else 0
+
+
+AWTRIX_FONT = PixelFont("awtrix", _AWTRIX_GLYPHS)
+
+
+class _LRUCache:
+    """Small least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+def _color_to_int(color):
+    """Convert "#RRGGBB", "RRGGBB", (r, g, b) or an int to an RGB888 int"""
+    if isinstance(color, int):
+        return color & 0xFFFFFF
+    if isinstance(color, str):
+        return rgb_to_int(hex_to_rgb(color))
+    if isinstance(color, (tuple, list)) and len(color) == 3:
+        return rgb_to_int(color)
+    raise ValueError(f"Invalid color: {color!r}")
+
+
+def _color_hex(color):
+    """Convert any accepted color to the firmware's "RRGGBB" form"""
+    return f"{_color_to_int(color):06X}"
+
+
+class Bitmap:
+    """RGB888 bitmap ready to be sent in a custom app ``draw`` list
+
+    Pixels are stored row by row as an immutable tuple of ints, with 0 for
+    unlit pixels, which is the layout the firmware expects for ``db``.
+    """
+
+    __slots__ = ("width", "height", "pixels")
+
+    def __init__(self, width, height, pixels):
+        if len(pixels) != width * height:
+            raise ValueError("Pixel count does not match bitmap size")
+        self.width = width
+        self.height = height
+        self.pixels = tuple(pixels)
+
+    def __repr__(self):
+        return f"Bitmap({self.width}x{self.height})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return (self.width, self.height, self.pixels) == (
+            other.width,
+            other.height,
+            other.pixels,
+        )
+
+    def __hash__(self):
+        return hash((self.width, self.height, self.pixels))
+
+    def to_draw(self, x=0, y=0):
+        """Return a ``db`` draw command placing the bitmap at (x, y)"""
+        return {"db": [x, y, self.width, self.height, list(self.pixels)]}
+
+    def to_rows(self):
+        """Return the pixels as a list of rows"""
+        w = self.width
+        return [list(self.pixels[i : i + w]) for i in range(0, len(self.pixels), w)]
+
+
+class TextRasterizer:
+    """Render text to bitmaps with the Awtrix pixel font on the host
+
+    Colored glyphs and whole rendered strings are kept in LRU caches keyed by
+    text, color, font object and font version, so redrawing the same labels
+    is a dictionary hit.
+
+    Args:
+        font (PixelFont): Font to render with (defaults to AWTRIX_FONT)
+        cache_size (int): Maximum number of rendered strings to keep
+        glyph_cache_size (int): Maximum number of colored glyphs to keep
+    """
+
+    def __init__(self, font=None, cache_size=256, glyph_cache_size=1024):
+        self.font = font or AWTRIX_FONT
+        self._text_cache = _LRUCache(cache_size)
+        self._glyph_cache = _LRUCache(glyph_cache_size)
+
+    def _glyph(self, char, color, font):
+        key = (font, font.version, char, color)
+        glyph = self._glyph_cache.get(key)
+        if glyph is None:
+            glyph = tuple(
+                tuple(color if lit else 0 for lit in row) for row in font.rows(char)
+            )
+            self._glyph_cache.put(key, glyph)
+        return glyph
+
+    def _fragments(self, text, color):
+        """Normalize text into a tuple of (string, RGB888 int) pairs"""
+        if isinstance(text, str):
+            return ((text, _color_to_int(color)),)
+        fragments = []
+        for fragment in text:
+            if isinstance(fragment, dict):
+                fragments.append(
+                    (fragment.get("t", ""), _color_to_int(fragment.get("c", color)))
+                )
+            else:
+                part, part_color = fragment
+                fragments.append((part, _color_to_int(part_color)))
+        return tuple(fragments)
+
+    def render(self, text, color="#FFFFFF", font=None):
+        """Render text to a Bitmap
+
+        Args:
+            text (str or list): Plain string, or colored fragments given either
+                as firmware-style dicts ({"t": ..., "c": ...}) or
+                (text, color) tuples
+            color: Default color as "#RRGGBB", (r, g, b) or RGB888 int
+            font (PixelFont): Font override for this call
+
+        Returns:
+            Bitmap: Rendered text, one font height tall
+        """
+        font = font or self.font
+        fragments = self._fragments(text, color)
+        key = (font, font.version, fragments)
+        bitmap = self._text_cache.get(key)
+        if bitmap is not None:
+            return bitmap
+
+        glyphs = [
+            self._glyph(char, part_color, font)
+            for part, part_color in fragments
+            for char in part
+        ]
+        width = sum(len(glyph[0]) for glyph in glyphs)
+        width += font.spacing * max(len(glyphs) - 1, 0)
+        pixels = [0] * (width * font.height)
+        x = 0
+        for glyph in glyphs:
+            glyph_width = len(glyph[0])
+            for y, row in enumerate(glyph):
+                start = y * width + x
+                pixels[start : start + glyph_width] = row
+            x += glyph_width + font.spacing
+
+        bitmap = Bitmap(width, font.height, pixels)
+        self._text_cache.put(key, bitmap)
+        return bitmap
+
+    def draw(self, text, color="#FFFFFF", x=0, y=None, font=None):
+        """Render text and return it as a ``db`` draw command
+
+        The command can be passed straight to ``custom_app`` or ``notify``
+        through their ``draw`` list. ``y`` defaults to the font's offset.
+        """
+        font = font or self.font
+        bitmap = self.render(text, color, font=font)
+        return bitmap.to_draw(x, font.y_offset if y is None else y)
+
+    def cache_info(self):
+        """Return hit/miss statistics for the string and glyph caches"""
+        return {"text": self._text_cache.info(), "glyphs": self._glyph_cache.info()}
+
+    def clear_cache(self):
+        """Drop all cached glyphs and rendered strings"""
+        self._text_cache.clear()
+        self._glyph_cache.clear()
+
+
+def hex_to_rgb(value):
+    """Convert "#RRGGBB" or "RRGGBB" to an (r, g, b) tuple"""
+    digits = value.lstrip("#")
+    if len(digits) != 6:
+        raise ValueError(f"Invalid color: {value!r}")
+    number = int(digits, 16)
+    return (number >> 16, (number >> 8) & 0xFF, number & 0xFF)
+
+
+def rgb_to_hex(rgb):
+    """Convert an (r, g, b) tuple to "#RRGGBB\" """
+    r, g, b = rgb
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+def rgb_to_int(rgb):
+    """Convert an (r, g, b) tuple to an RGB888 int as used in draw commands"""
+    r, g, b = rgb
+    return (r & 0xFF) << 16 | (g & 0xFF) << 8 | (b & 0xFF)
+
+
+def int_to_rgb(value):
+    """Convert an RGB888 int to an (r, g, b) tuple"""
+    return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+
+def rgb_to_rgb565(rgb):
+    """Convert an (r, g, b) tuple to a 16-bit RGB565 value"""
+    r, g, b = rgb
+    return (r & 0xF8) << 8 | (g & 0xFC) << 3 | b >> 3
+
+
+def rgb565_to_rgb(value):
+    """Convert a 16-bit RGB565 value to an (r, g, b) tuple
+
+    The low bits are filled from the high bits so white stays 255.
+    """
+    r = (value >> 11) & 0x1F
+    g = (value >> 5) & 0x3F
+    b = value & 0x1F
+    return (r << 3 | r >> 2, g << 2 | g >> 4, b << 3 | b >> 2)
+
+
+class ColorCorrector:
+    """Apply gamma, color correction and brightness to host-rendered pixels
+
+    The three adjustments are folded into one 256-entry lookup table per
+    channel when the corrector is created, so correcting a frame is a table
+    lookup per channel with no floating point work.
+
+    Args:
+        gamma (float): Gamma exponent, as in the ``gamma`` setting
+        correction (tuple): Per-channel scale as in ``colorCorrection``
+        brightness (int): Extra brightness scale from 0 to 255
+    """
+
+    def __init__(self, gamma=2.8, correction=(255, 255, 255), brightness=255):
+        if gamma <= 0:
+            raise ValueError("Gamma must be positive")
+        if len(correction) != 3:
+            raise ValueError("Color correction must have 3 channels")
+        self.gamma = gamma
+        self.correction = tuple(correction)
+        self.brightness = brightness
+        self.tables = tuple(
+            bytes(
+                min(
+                    int(round((value / 255) ** gamma * scale * brightness / 255)),
+                    255,
+                )
+                for value in range(256)
+            )
+            for scale in self.correction
+        )
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        """Create a corrector from a settings dict such as ``clock_profile`` sends"""
+        if "gamma" in settings:
+            kwargs.setdefault("gamma", settings["gamma"])
+        if "colorCorrection" in settings:
+            kwargs.setdefault("correction", settings["colorCorrection"])
+        return cls(**kwargs)
+
+    def apply_color(self, color):
+        """Correct a single color given as hex, (r, g, b) or RGB888 int
+
+        Returns:
+            int: Corrected RGB888 color
+        """
+        r, g, b = int_to_rgb(_color_to_int(color))
+        red, green, blue = self.tables
+        return red[r] << 16 | green[g] << 8 | blue[b]
+
+    def apply_bytes(self, data):
+        """Correct packed RGB bytes (3 bytes per pixel)
+
+        Returns:
+            bytearray: Corrected pixels in the same layout
+        """
+        out = bytearray(data)
+        if len(out) % 3:
+            raise ValueError("RGB data length must be a multiple of 3")
+        for channel, table in enumerate(self.tables):
+            out[channel::3] = out[channel::3].translate(table)
+        return out
+
+    def _apply_ints(self, pixels):
+        import sys
+        from array import array
+
+        packed = array("I", pixels)
+        data = bytearray(packed.tobytes())
+        # Byte positions of R, G and B inside each native 32-bit int
+        offsets = (2, 1, 0) if sys.byteorder == "little" else (1, 2, 3)
+        for offset, table in zip(offsets, self.tables):
+            data[offset::4] = data[offset::4].translate(table)
+        packed = array("I")
+        packed.frombytes(data)
+        return packed
+
+    def _apply_numpy(self, np, frame):
+        tables = np.frombuffer(b"".join(self.tables), dtype=np.uint8).reshape(3, 256)
+        if frame.ndim and frame.shape[-1] == 3 and frame.dtype == np.uint8:
+            out = np.empty_like(frame)
+            for channel in range(3):
+                out[..., channel] = tables[channel][frame[..., channel]]
+            return out
+        pixels = frame.astype(np.uint32, copy=False)
+        red = tables[0][(pixels >> 16) & 0xFF].astype(np.uint32)
+        green = tables[1][(pixels >> 8) & 0xFF].astype(np.uint32)
+        blue = tables[2][pixels & 0xFF].astype(np.uint32)
+        return (red << 16 | green << 8 | blue).astype(frame.dtype, copy=False)
+
+    def apply(self, frame):
+        """Correct a whole frame in one pass
+
+        Args:
+            frame: RGB888 ints (list, tuple or ``array``), packed RGB bytes,
+                or a numpy array of RGB888 ints or ``(..., 3)`` uint8 pixels
+
+        Returns:
+            Corrected frame: a list for sequences, a bytearray for bytes, an
+            ``array`` for arrays and a numpy array for numpy input
+        """
+        from array import array
+
+        if isinstance(frame, (bytes, bytearray, memoryview)):
+            return self.apply_bytes(frame)
+        if type(frame).__module__ == "numpy":
+            return self._apply_numpy(_import_numpy(), frame)
+        corrected = self._apply_ints(frame)
+        return corrected if isinstance(frame, array) else corrected.tolist()
+
+    def apply_bitmap(self, bitmap):
+        """Return a corrected copy of a Bitmap"""
+        return Bitmap(bitmap.width, bitmap.height, self._apply_ints(bitmap.pixels))
+
+
+# Scroll rate of the firmware at scrollSpeed 100, measured on a 32x8 matrix.
+SCROLL_PIXELS_PER_SECOND = 18.0
+
+
+class TextMetrics:
+    """Predict text width and scroll time on the device
+
+    Character advances (glyph width plus spacing) are precomputed into a
+    256-entry byte table, so measuring Latin-1 text is a single
+    ``bytes.translate`` plus ``sum`` with no per-character Python work.
+
+    Args:
+        font (PixelFont): Font used by the device (defaults to AWTRIX_FONT)
+        scroll_speed (int): Scroll speed percentage, as in ``scrollSpeed``
+        scroll_pause (int): Pause before scrolling starts in ms
+        text_offset (int): Horizontal text offset in pixels
+        matrix_width (int): Width of the matrix in pixels
+        icon_width (int): Pixels taken by an icon and its gap
+        pixels_per_second (float): Scroll rate at 100% speed
+    """
+
+    def __init__(
+        self,
+        font=None,
+        scroll_speed=100,
+        scroll_pause=3000,
+        text_offset=0,
+        matrix_width=32,
+        icon_width=9,
+        pixels_per_second=SCROLL_PIXELS_PER_SECOND,
+    ):
+        if scroll_speed <= 0:
+            raise ValueError("Scroll speed must be positive")
+        self.font = font or AWTRIX_FONT
+        self.scroll_speed = scroll_speed
+        self.scroll_pause = scroll_pause
+        self.text_offset = text_offset
+        self.matrix_width = matrix_width
+        self.icon_width = icon_width
+        self.pixels_per_second = pixels_per_second
+
+        font = self.font
+        fallback = font.glyph_width(font.fallback) if font.fallback else 0
+        self._fallback_advance = fallback + font.spacing
+        self._advances = {
+            char: font.glyph_width(char) + font.spacing for char in font.glyphs
+        }
+        self._table = bytes(
+            self._advances.get(chr(code), self._fallback_advance) for code in range(256)
+        )
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        """Create metrics from a settings dict such as ``clock_profile`` sends"""
+        for key, name in (
+            ("scrollSpeed", "scroll_speed"),
+            ("scrollPause", "scroll_pause"),
+            ("textOffset", "text_offset"),
+        ):
+            if key in settings:
+                kwargs.setdefault(name, settings[key])
+        return cls(**kwargs)
+
+    def width(self, text):
+        """Return the rendered width of text in pixels
+
+        Args:
+            text (str or list): Plain string or colored fragments
+        """
+        if not isinstance(text, str):
+            text = "".join(
+                part.get("t", "") if isinstance(part, dict) else part[0]
+                for part in text
+            )
+        if not text:
+            return 0
+        try:
+            total = sum(text.encode("latin-1").translate(self._table))
+        except UnicodeEncodeError:
+            advances = self._advances
+            fallback = self._fallback_advance
+            total = sum(advances.get(char, fallback) for char in text)
+        return total - self.font.spacing
+
+    def predict(self, payload, default_duration=5):
+        """Predict how a notify/custom app payload will be displayed
+
+        Args:
+            payload (dict or str): Payload with ``text`` and optional
+                ``icon``, ``repeat``, ``scrollSpeed`` and ``textOffset``,
+                or just the text
+            default_duration (int): Duration in seconds for text that fits
+
+        Returns:
+            dict: ``width`` in pixels, whether the text ``scrolls``,
+            ``scroll_time`` for all passes in seconds and the recommended
+            ``duration`` in whole seconds
+        """
+        if not isinstance(payload, dict):
+            payload = {"text": payload}
+        width = self.width(payload.get("text", ""))
+        offset = payload.get("textOffset", self.text_offset)
+        available = self.matrix_width - offset
+        if payload.get("icon"):
+            available -= self.icon_width
+
+        if width <= available:
+            return {
+                "width": width,
+                "scrolls": False,
+                "scroll_time": 0.0,
+                "duration": default_duration,
+            }
+
+        import math
+
+        speed = payload.get("scrollSpeed", self.scroll_speed)
+        rate = self.pixels_per_second * speed / 100
+        repeat = max(payload.get("repeat", 1), 1)
+        scroll_time = repeat * (available + width) / rate
+        duration = self.scroll_pause / 1000 + scroll_time
+        return {
+            "width": width,
+            "scrolls": True,
+            "scroll_time": scroll_time,
+            "duration": max(default_duration, math.ceil(duration)),
+        }
+
+    def recommend_duration(self, payload, default_duration=5):
+        """Return the recommended ``duration`` in seconds for a payload"""
+        return self.predict(payload, default_duration)["duration"]
+
+
+def _import_numpy():
+    """Return the numpy module, or None when it isn't installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _lttb_python(values, points):
+    n = len(values)
+    every = (n - 2) / (points - 2)
+    selected = [0]
+    a = 0
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = n if i == points - 3 else int((i + 2) * every) + 1
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(values[end:next_end]) / (next_end - end)
+        ax, ay = a, values[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (values[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return [values[i] for i in selected]
+
+
+def _lttb_numpy(np, values, points):
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    edges = (np.arange(points) * ((n - 2) / (points - 2))).astype(int) + 1
+    edges[-1] = n
+    selected = np.empty(points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(points - 2):
+        start, end, next_end = edges[i], edges[i + 1], edges[i + 2]
+        avg_x = (end + next_end - 1) / 2
+        avg_y = y[end:next_end].mean()
+        xs = np.arange(start, end)
+        areas = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    return y[selected].tolist()
+
+
+def downsample_lttb(values, points=16):
+    """Downsample a series with Largest-Triangle-Three-Buckets
+
+    LTTB keeps the points that best preserve the visual shape of the series,
+    so peaks and dips survive even at 16 output points.
+
+    Args:
+        values (sequence): Samples, evenly spaced in time
+        points (int): Number of points to keep (at least 3)
+
+    Returns:
+        list: Selected samples in time order
+    """
+    if points < 3:
+        raise ValueError("LTTB needs at least 3 points")
+    values = list(values) if not hasattr(values, "__len__") else values
+    if len(values) <= points:
+        return [float(value) for value in values]
+    np = _import_numpy()
+    if np is not None:
+        return _lttb_numpy(np, values, points)
+    return _lttb_python([float(value) for value in values], points)
+
+
+def _bucket_edges(n, buckets):
+    return [n * i // buckets for i in range(buckets + 1)]
+
+
+def _minmax_python(values, points):
+    result = []
+    edges = _bucket_edges(len(values), points // 2)
+    for start, end in zip(edges, edges[1:]):
+        bucket = values[start:end]
+        low = min(range(len(bucket)), key=bucket.__getitem__)
+        high = max(range(len(bucket)), key=bucket.__getitem__)
+        pair = (low, high) if low <= high else (high, low)
+        result.extend(bucket[i] for i in pair)
+    return result
+
+
+def _minmax_numpy(np, values, points):
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    starts = np.array(_bucket_edges(n, points // 2)[:-1])
+    sizes = np.diff(np.append(starts, n))
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    index = np.arange(n)
+    # First position of each bucket's minimum and maximum, to keep time order
+    low = np.minimum.reduceat(np.where(y == np.repeat(mins, sizes), index, n), starts)
+    high = np.minimum.reduceat(np.where(y == np.repeat(maxs, sizes), index, n), starts)
+    first = np.where(low <= high, mins, maxs)
+    second = np.where(low <= high, maxs, mins)
+    return np.column_stack((first, second)).ravel().tolist()
+
+
+def downsample_minmax(values, points=16):
+    """Downsample a series keeping each bucket's minimum and maximum
+
+    The series is split into ``points // 2`` buckets and each contributes its
+    minimum and maximum in the order they occurred, so spikes are never lost.
+
+    Args:
+        values (sequence): Samples, evenly spaced in time
+        points (int): Number of points to return (rounded down to even)
+
+    Returns:
+        list: Downsampled samples in time order
+    """
+    if points < 2:
+        raise ValueError("Min/max downsampling needs at least 2 points")
+    values = list(values) if not hasattr(values, "__len__") else values
+    if len(values) <= points:
+        return [float(value) for value in values]
+    np = _import_numpy()
+    if np is not None:
+        return _minmax_numpy(np, values, points)
+    return _minmax_python([float(value) for value in values], points)
+
+
+def scale_to_height(values, height=8, minimum=None, maximum=None):
+    """Scale values to integer pixel heights for ``bar``/``line`` payloads
+
+    Args:
+        values (sequence): Values to scale
+        height (int): Display height in pixels
+        minimum (float): Value drawn as 0 (defaults to the series minimum)
+        maximum (float): Value drawn as ``height`` (defaults to the maximum)
+
+    Returns:
+        list: Ints between 0 and ``height``
+    """
+    values = list(values)
+    if not values:
+        return []
+    low = min(values) if minimum is None else minimum
+    high = max(values) if maximum is None else maximum
+    span = high - low
+    if span <= 0:
+        return [height if value > low else 0 for value in values]
+    np = _import_numpy()
+    if np is not None:
+        scaled = np.rint((np.asarray(values, dtype=float) - low) * (height / span))
+        return np.clip(scaled, 0, height).astype(int).tolist()
+    return [
+        min(max(int(round((value - low) * height / span)), 0), height)
+        for value in values
+    ]
+
+
+class RollingChart:
+    """Rolling chart that only processes newly appended samples
+
+    Samples are folded into fixed-size buckets as they arrive. Each bucket
+    keeps its count, sum, minimum, maximum and last value, so drawing the
+    chart reads ``points`` summaries instead of re-reading the raw series.
+
+    Args:
+        points (int): Number of buckets shown on the display
+        bucket_size (int): Raw samples per bucket
+        aggregate (str): "mean", "min", "max" or "last"
+        height (int): Display height in pixels
+    """
+
+    _AGGREGATES = ("mean", "min", "max", "last")
+
+    def __init__(self, points=16, bucket_size=1, aggregate="mean", height=8):
+        from collections import deque
+
+        if aggregate not in self._AGGREGATES:
+            raise ValueError(f"Aggregate must be one of {self._AGGREGATES}")
+        if points < 1 or bucket_size < 1:
+            raise ValueError("Points and bucket size must be positive")
+        self.points = points
+        self.bucket_size = bucket_size
+        self.aggregate = aggregate
+        self.height = height
+        self._buckets = deque(maxlen=points)
+        self._partial = None
+
+    def __len__(self):
+        if self._partial is None:
+            return len(self._buckets)
+        # A partial bucket is shown in place of the oldest full one
+        return min(len(self._buckets) + 1, self.points)
+
+    def append(self, value):
+        """Add one sample"""
+        value = float(value)
+        partial = self._partial
+        if partial is None:
+            self._partial = [1, value, value, value, value]
+        else:
+            partial[0] += 1
+            partial[1] += value
+            partial[2] = min(partial[2], value)
+            partial[3] = max(partial[3], value)
+            partial[4] = value
+        if self._partial[0] == self.bucket_size:
+            self._buckets.append(tuple(self._partial))
+            self._partial = None
+
+    def extend(self, values):
+        """Add many samples, summarizing whole buckets in one vectorized pass"""
+        np = _import_numpy()
+        if np is None:
+            for value in values:
+                self.append(value)
+            return
+        samples = np.asarray(values, dtype=float).ravel()
+        if self._partial is not None:
+            fill = min(self.bucket_size - self._partial[0], len(samples))
+            for value in samples[:fill].tolist():
+                self.append(value)
+            samples = samples[fill:]
+        # Only the newest ``points`` full buckets can still be displayed
+        whole = len(samples) // self.bucket_size
+        keep = min(whole, self.points)
+        if keep:
+            start = (whole - keep) * self.bucket_size
+            end = whole * self.bucket_size
+            blocks = samples[start:end].reshape(keep, self.bucket_size)
+            summary = zip(
+                blocks.sum(axis=1).tolist(),
+                blocks.min(axis=1).tolist(),
+                blocks.max(axis=1).tolist(),
+                blocks[:, -1].tolist(),
+            )
+            self._buckets.extend((self.bucket_size, *bucket) for bucket in summary)
+        for value in samples[whole * self.bucket_size :].tolist():
+            self.append(value)
+
+    def values(self):
+        """Return the aggregated value of each bucket, oldest first"""
+        buckets = list(self._buckets)
+        if self._partial is not None:
+            buckets = buckets[1:] if len(buckets) == self.points else buckets
+            buckets.append(tuple(self._partial))
+        if self.aggregate == "mean":
+            return [total / count for count, total, _, _, _ in buckets]
+        index = {"min": 2, "max": 3, "last": 4}[self.aggregate]
+        return [bucket[index] for bucket in buckets]
+
+    def scaled(self, minimum=None, maximum=None):
+        """Return bucket values scaled to the display height"""
+        return scale_to_height(self.values(), self.height, minimum, maximum)
+
+    def bar(self, **kwargs):
+        """Return a custom app payload fragment with a ``bar`` chart"""
+        return {"bar": self.scaled(), **kwargs}
+
+    def line(self, **kwargs):
+        """Return a custom app payload fragment with a ``line`` chart"""
+        return {"line": self.scaled(), **kwargs}
+
+
+class Panorama:
+    """Virtual canvas spanning several devices mounted side by side
+
+    Frames are drawn on one large canvas. On each push the canvas is sliced
+    into per-device tiles, tiles that didn't change since the last successful
+    push are skipped and the rest are sent in parallel, released together by
+    a barrier so the devices update as close to simultaneously as possible.
+
+    Args:
+        layout (list): Devices in row-major order, either as a flat list of
+            Awtrix3 clients or as a list of rows; ``None`` leaves a gap
+        columns (int): Tiles per row when ``layout`` is a flat list
+        width (int): Matrix width of each device in pixels
+        height (int): Matrix height of each device in pixels
+        app (str): Custom app name used to display the tiles
+    """
+
+    def __init__(self, layout, columns=None, width=32, height=8, app="panorama"):
+        from concurrent.futures import ThreadPoolExecutor
+
+        layout = list(layout)
+        if not layout:
+            raise ValueError("Panorama needs at least one device")
+        if not isinstance(layout[0], (list, tuple)):
+            columns = columns or len(layout)
+            layout = [layout[i : i + columns] for i in range(0, len(layout), columns)]
+        self.rows = len(layout)
+        self.columns = max(len(row) for row in layout)
+        self.tile_width = width
+        self.tile_height = height
+        self.width = self.columns * width
+        self.height = self.rows * height
+        self.app = app
+        self.tiles = [
+            (client, column, row)
+            for row, clients in enumerate(layout)
+            for column, client in enumerate(clients)
+            if client is not None
+        ]
+        self._sent = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.tiles)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=True)
+
+    def invalidate(self):
+        """Forget what was sent so the next push updates every device"""
+        self._sent.clear()
+
+    def _rows(self, frame):
+        """Return the canvas as a list of rows of RGB888 ints"""
+        if isinstance(frame, Bitmap):
+            if (frame.width, frame.height) != (self.width, self.height):
+                raise ValueError("Bitmap size does not match the panorama")
+            frame = frame.pixels
+        if type(frame).__module__ == "numpy":
+            frame = frame.reshape(self.height, self.width).tolist()
+        if len(frame) == self.height and isinstance(frame[0], (list, tuple)):
+            return frame
+        if len(frame) != self.width * self.height:
+            raise ValueError(
+                f"Frame must have {self.width * self.height} pixels "
+                f"({self.width}x{self.height})"
+            )
+        return [
+            frame[y * self.width : (y + 1) * self.width] for y in range(self.height)
+        ]
+
+    def slice(self, frame):
+        """Split a canvas frame into one pixel list per tile
+
+        Returns:
+            list: (client, pixels) pairs in layout order
+        """
+        rows = self._rows(frame)
+        w, h = self.tile_width, self.tile_height
+        tiles = []
+        for client, column, row in self.tiles:
+            pixels = []
+            for line in rows[row * h : (row + 1) * h]:
+                pixels.extend(line[column * w : (column + 1) * w])
+            tiles.append((client, pixels))
+        return tiles
+
+    def _send(self, client, pixels, barrier):
+        import time
+
+        barrier.wait()
+        start = time.perf_counter()
+        client.custom_app(
+            self.app,
+            "",
+            draw=[{"db": [0, 0, self.tile_width, self.tile_height, pixels]}],
+        )
+        return start, time.perf_counter()
+
+    def push(self, frame):
+        """Send a canvas frame to every device whose tile changed
+
+        Args:
+            frame: RGB888 ints for the whole canvas, row by row, as a flat
+                sequence, a list of rows, a Bitmap or a numpy array
+
+        Returns:
+            dict: ``changed`` and ``skipped`` tile positions, ``latency_ms``
+            and ``errors`` per tile position, and ``skew_ms``, the spread
+            between the first and last device finishing its update. Tile
+            positions are ``(column, row)`` tuples, so devices sharing a host
+            (e.g. behind one proxy) are told apart
+        """
+        import threading
+        from array import array
+
+        pending = []
+        skipped = []
+        for (_, column, row), (client, pixels) in zip(self.tiles, self.slice(frame)):
+            key = array("I", pixels).tobytes()
+            if self._sent.get((column, row)) == key:
+                skipped.append((column, row))
+            else:
+                pending.append(((column, row), client, pixels, key))
+
+        result = {
+            "changed": [position for position, _, _, _ in pending],
+            "skipped": skipped,
+            "latency_ms": {},
+            "errors": {},
+            "skew_ms": 0.0,
+        }
+        if not pending:
+            return result
+
+        barrier = threading.Barrier(len(pending))
+        futures = [
+            (position, key, self._executor.submit(self._send, client, pixels, barrier))
+            for position, client, pixels, key in pending
+        ]
+        finished = []
+        for position, key, future in futures:
+            try:
+                start, end = future.result()
+            except Exception as e:
+                result["errors"][position] = str(e)
+                self._sent.pop(position, None)
+                continue
+            self._sent[position] = key
+            result["latency_ms"][position] = (end - start) * 1000
+            finished.append(end)
+        if finished:
+            result["skew_ms"] = (max(finished) - min(finished)) * 1000
+        return result
+
+
+class SharedFramebuffer:
+    """Framebuffer in shared memory that several processes draw into
+
+    Each named region is a rectangle of the matrix with its own contiguous
+    block of native 32-bit RGB888 pixels and a generation counter. A producer
+    writes its region in place through a memoryview (no pickling) and bumps
+    the counter seqlock-style: odd while a write is in progress, even once it
+    is complete. Readers copy a region and retry if the counter moved, so they
+    always see a consistent snapshot. Each region must have a single writer.
+
+    Args:
+        regions (dict): Region name to (x, y, width, height)
+        name (str): Shared memory block name (generated if omitted)
+        path (str): Back the buffer with this file via mmap instead
+    """
+
+    _MAGIC = b"AWFB"
+    _HEADER = 16
+    _ENTRY = 32
+    _NAME_SIZE = 16
+
+    def __init__(self, regions, name=None, path=None):
+        import struct
+
+        if not regions:
+            raise ValueError("Framebuffer needs at least one region")
+        layout = []
+        offset = self._HEADER + self._ENTRY * len(regions)
+        for region, (x, y, width, height) in regions.items():
+            if len(region.encode()) > self._NAME_SIZE:
+                raise ValueError(f"Region name too long: {region!r}")
+            layout.append((region, x, y, width, height, offset))
+            offset += width * height * 4
+        self._open(offset, name=name, path=path, create=True)
+
+        struct.pack_into("<4sH", self._buf, 0, self._MAGIC, len(layout))
+        for index, (region, x, y, width, height, _) in enumerate(layout):
+            struct.pack_into(
+                f"<Q4H{self._NAME_SIZE}s",
+                self._buf,
+                self._HEADER + index * self._ENTRY,
+                0,
+                x,
+                y,
+                width,
+                height,
+                region.encode(),
+            )
+        self._load_layout()
+
+    @classmethod
+    def attach(cls, name=None, path=None):
+        """Attach to a framebuffer created by another process
+
+        Attaching never takes ownership: the block outlives this handle and
+        this process, and only the creator unlinks it.
+        """
+        framebuffer = cls.__new__(cls)
+        framebuffer._open(0, name=name, path=path, create=False)
+        framebuffer._load_layout()
+        return framebuffer
+
+    def _open(self, size, name, path, create):
+        import mmap
+        import os
+        import sys
+        from multiprocessing import shared_memory
+
+        self._shm = None
+        self._file = None
+        self.owner = create
+        if path is not None:
+            self.path = path
+            self.name = None
+            self._file = open(path, "w+b" if create else "r+b")
+            if create:
+                self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+            self._buf = memoryview(self._mmap)
+        else:
+            self.path = None
+            if create or sys.version_info < (3, 13):
+                self._shm = shared_memory.SharedMemory(
+                    name=name, create=create, size=size
+                )
+                if not create and os.name == "posix":
+                    # Attaching registers the block with this process's
+                    # resource tracker, which unlinks it when the process exits
+                    from multiprocessing import resource_tracker
+
+                    resource_tracker.unregister(self._shm._name, "shared_memory")
+            else:
+                self._shm = shared_memory.SharedMemory(name=name, track=False)
+            self.name = self._shm.name
+            self._buf = self._shm.buf
+
+    def _load_layout(self):
+        import struct
+
+        magic, count = struct.unpack_from("<4sH", self._buf, 0)
+        if magic != self._MAGIC:
+            raise ValueError("Not an Awtrix framebuffer")
+        self._generations = self._buf[: self._HEADER + count * self._ENTRY].cast("Q")
+        self.regions = {}
+        self._slots = {}
+        offset = self._HEADER + count * self._ENTRY
+        for index in range(count):
+            entry = self._HEADER + index * self._ENTRY
+            x, y, width, height, raw = struct.unpack_from(
+                f"<4H{self._NAME_SIZE}s", self._buf, entry + 8
+            )
+            region = raw.rstrip(b"\0").decode()
+            size = width * height * 4
+            self.regions[region] = (x, y, width, height)
+            self._slots[region] = (
+                entry // 8,
+                self._buf[offset : offset + size].cast("I"),
+            )
+            offset += size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def close(self):
+        """Release this process's view of the buffer"""
+        for _, pixels in self._slots.values():
+            pixels.release()
+        self._slots = {}
+        self._generations.release()
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self._buf.release()
+            self._mmap.close()
+            self._file.close()
+
+    def unlink(self):
+        """Destroy the shared memory block (owner only)"""
+        import os
+
+        if self._shm is not None:
+            self._shm.unlink()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def generation(self, region):
+        """Return the current generation counter of a region"""
+        return self._generations[self._slots[region][0]]
+
+    def write(self, region):
+        """Context manager yielding a writable view of a region's pixels
+
+        The view is a flat memoryview of ints, row by row::
+
+            with framebuffer.write("weather") as pixels:
+                pixels[0] = 0xFF6600
+        """
+        from contextlib import contextmanager
+
+        slot, pixels = self._slots[region]
+        generations = self._generations
+
+        @contextmanager
+        def writer():
+            generations[slot] += 1
+            try:
+                yield pixels
+            finally:
+                generations[slot] += 1
+
+        return writer()
+
+    def fill(self, region, pixels):
+        """Replace a region's pixels with an iterable of RGB888 ints"""
+        from array import array
+
+        with self.write(region) as view:
+            view[:] = array("I", pixels)
+
+    def snapshot(self, region, retries=1000):
+        """Return a consistent (generation, pixels) copy of a region
+
+        Raises:
+            TimeoutError: if the writer keeps the region busy
+        """
+        import time
+
+        slot, pixels = self._slots[region]
+        generations = self._generations
+        for _ in range(retries):
+            before = generations[slot]
+            if before % 2 == 0:
+                data = pixels.tolist()
+                if generations[slot] == before:
+                    return before, data
+            time.sleep(0)
+        raise TimeoutError(f"Region {region!r} is busy")
+
+
+class FramebufferPusher:
+    """Send a SharedFramebuffer to a device, re-reading only changed regions
+
+    Each region is kept as its own ``db`` draw command. A push compares the
+    region generations with the last ones sent, snapshots and re-encodes only
+    the regions that moved, and posts the app only when something changed.
+
+    Args:
+        framebuffer (SharedFramebuffer): Buffer to read from
+        client (Awtrix3): Device to push to
+        app (str): Custom app name to draw into
+    """
+
+    def __init__(self, framebuffer, client, app="framebuffer"):
+        self.framebuffer = framebuffer
+        self.client = client
+        self.app = app
+        self._generations = {}
+        self._commands = {}
+
+    def push(self):
+        """Push the framebuffer if any region changed
+
+        Returns:
+            list: Names of the regions that changed
+        """
+        framebuffer = self.framebuffer
+        changed = []
+        for region, (x, y, width, height) in framebuffer.regions.items():
+            if framebuffer.generation(region) == self._generations.get(region):
+                continue
+            generation, pixels = framebuffer.snapshot(region)
+            self._commands[region] = {"db": [x, y, width, height, pixels]}
+            self._generations[region] = generation
+            changed.append(region)
+        if changed:
+            try:
+                self.client.custom_app(self.app, "", draw=list(self._commands.values()))
+            except Exception:
+                for region in changed:
+                    self._generations.pop(region, None)
+                raise
+        return changed
+
+    def run(self, interval=0.1, stop_event=None):
+        """Push in a loop until ``stop_event`` is set"""
+        import threading
+
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            self.push()
+            stop_event.wait(interval)
+
+
+def _import_pil():
+    """Return PIL.Image, with a helpful error when Pillow isn't installed"""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError(
+            "Pillow is required for GIF conversion: pip install awtrix3[graphics]"
+        ) from None
+    return Image
+
+
+def _convert_gif_frames(source_size, target_size, frames):
+    """Resize RGBA frames and flatten them onto black (runs in a worker)"""
+    Image = _import_pil()
+    converted = []
+    for raw in frames:
+        image = Image.frombytes("RGBA", source_size, raw)
+        if image.size != target_size:
+            image = image.resize(target_size, Image.Resampling.BOX)
+        flat = Image.new("RGB", target_size)
+        flat.paste(image, mask=image.getchannel("A"))
+        converted.append(flat.tobytes())
+    return converted
+
+
+def _frame_difference(a, b):
+    """Mean absolute difference per channel between two RGB byte frames"""
+    np = _import_numpy()
+    if np is not None:
+        diff = np.frombuffer(a, np.uint8).astype(np.int16) - np.frombuffer(b, np.uint8)
+        return float(np.abs(diff).mean())
+    return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+class Animation:
+    """Converted animation: packed RGB frames with per-frame durations
+
+    Args:
+        width (int): Frame width in pixels
+        height (int): Frame height in pixels
+        frames (list): Frames as packed RGB bytes (3 bytes per pixel)
+        durations (list): Display time of each frame in milliseconds
+        source_frames (int): Number of frames before deduplication
+    """
+
+    def __init__(self, width, height, frames, durations, source_frames=None):
+        if len(frames) != len(durations):
+            raise ValueError("Every frame needs a duration")
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.durations = durations
+        self.source_frames = len(frames) if source_frames is None else source_frames
+        self._gif = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __repr__(self):
+        return f"Animation({self.width}x{self.height}, {len(self.frames)} frames)"
+
+    def pixels(self, index):
+        """Return a frame as a list of RGB888 ints"""
+        frame = self.frames[index]
+        return [
+            frame[i] << 16 | frame[i + 1] << 8 | frame[i + 2]
+            for i in range(0, len(frame), 3)
+        ]
+
+    def to_gif(self):
+        """Encode the animation as a looping GIF
+
+        Raises:
+            ValueError: if the animation has no frames
+        """
+        import io
+
+        if self._gif is not None:
+            return self._gif
+        if not self.frames:
+            raise ValueError("Animation has no frames")
+        Image = _import_pil()
+        images = [
+            Image.frombytes("RGB", (self.width, self.height), frame)
+            for frame in self.frames
+        ]
+        output = io.BytesIO()
+        images[0].save(
+            output,
+            format="GIF",
+            save_all=True,
+            append_images=images[1:],
+            duration=list(self.durations),
+            loop=0,
+            optimize=True,
+        )
+        self._gif = output.getvalue()
+        return self._gif
+
+
+def convert_gif(
+    source,
+    width=32,
+    height=8,
+    threshold=0,
+    workers=None,
+    memory_budget=32 * 1024 * 1024,
+    progress=None,
+    executor=None,
+    min_pooled_frames=32,
+):
+    """Decode and convert an animated GIF for the matrix
+
+    Frames are decoded in order (GIF frames build on each other) in batches
+    that fit ``memory_budget``; each batch is resized and flattened across a
+    process pool. Consecutive frames that are identical, or whose mean
+    per-channel difference is at most ``threshold``, are merged into one
+    longer frame.
+
+    Starting a pool costs far more than converting a small icon, so unless
+    ``workers`` or ``executor`` is given, GIFs with fewer than
+    ``min_pooled_frames`` frames are converted in this process. Callers
+    converting many GIFs can pass one long-lived ``executor``.
+
+    Args:
+        source (str or file): GIF path or binary file object
+        width (int): Output width in pixels
+        height (int): Output height in pixels
+        threshold (float): Largest mean difference (0-255) treated as equal
+        workers (int): Worker processes; 0 converts in this process
+        memory_budget (int): Bytes of decoded source frames held at once
+        progress (callable): Called as ``progress(done, total)``
+        executor (ProcessPoolExecutor): Pool to convert in instead of
+            starting one; it is left running
+        min_pooled_frames (int): Fewest frames worth starting a pool for
+            when neither ``workers`` nor ``executor`` is given
+
+    Returns:
+        Animation: Converted, deduplicated frames
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+
+    Image = _import_pil()
+    with Image.open(source) as image:
+        total = getattr(image, "n_frames", 1)
+        if executor is None and workers is None and total < min_pooled_frames:
+            workers = 0
+        workers = os.cpu_count() if workers is None else workers
+        source_size = image.size
+        batch_size = max(1, memory_budget // (source_size[0] * source_size[1] * 4))
+        target = (width, height)
+
+        frames = []
+        durations = []
+
+        def add(converted, batch_durations):
+            for frame, duration in zip(converted, batch_durations):
+                if frames and (
+                    frame == frames[-1]
+                    or (threshold and _frame_difference(frame, frames[-1]) <= threshold)
+                ):
+                    durations[-1] += duration
+                else:
+                    frames.append(frame)
+                    durations.append(duration)
+
+        own_executor = executor is None and workers > 0
+        if own_executor:
+            executor = ProcessPoolExecutor(workers)
+        try:
+            done = 0
+            for start in range(0, total, batch_size):
+                raw = []
+                batch_durations = []
+                for index in range(start, min(start + batch_size, total)):
+                    image.seek(index)
+                    raw.append(image.convert("RGBA").tobytes())
+                    batch_durations.append(image.info.get("duration", 100) or 100)
+
+                if executor is None:
+                    converted = _convert_gif_frames(source_size, target, raw)
+                else:
+                    step = -(-len(raw) // (workers or os.cpu_count()))
+                    futures = [
+                        executor.submit(
+                            _convert_gif_frames, source_size, target, raw[i : i + step]
+                        )
+                        for i in range(0, len(raw), step)
+                    ]
+                    converted = [
+                        frame for future in futures for frame in future.result()
+                    ]
+                del raw
+
+                add(converted, batch_durations)
+                done += len(converted)
+                if progress:
+                    progress(done, total)
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+    return Animation(width, height, frames, durations, source_frames=total)
+
+
+def choose_upload_strategy(animation, max_file_bytes=64 * 1024):
+    """Decide how to get an animation onto the device
+
+    Animations are uploaded once as a GIF, which the device loops on its
+    own. Only when the encoded file is too large for the device filesystem
+    are the frames streamed, which plays them once (see
+    ``upload_animation``).
+
+    Returns:
+        str: "file" or "stream"
+    """
+    if len(animation.to_gif()) > max_file_bytes:
+        return "stream"
+    return "file"
+
+
+def upload_animation(client, animation, name, strategy=None, progress=None, **kwargs):
+    """Show an animation on the device using the best upload strategy
+
+    The "file" strategy loops on the device like any GIF icon. The "stream"
+    strategy sends each frame in turn from this process, so it plays the
+    animation once and returns; the last frame stays on screen.
+
+    Args:
+        client (Awtrix3): Device to upload to
+        animation (Animation): Converted animation
+        name (str): Custom app name, also used for the uploaded GIF
+        strategy (str): "file" or "stream" (chosen automatically if omitted)
+        progress (callable): Called as ``progress(done, total)``
+        **kwargs: Extra custom app keys
+
+    Returns:
+        dict: The ``strategy`` used, plus the remote ``path`` for file uploads
+        or the number of ``frames`` streamed
+    """
+    import time
+
+    strategy = strategy or choose_upload_strategy(animation)
+    if strategy == "file":
+        path = f"/ICONS/{name}.gif"
+        client.upload_file(animation.to_gif(), path)
+        if progress:
+            progress(1, 1)
+        client.custom_app(name, kwargs.pop("text", ""), icon=name, **kwargs)
+        return {"strategy": "file", "path": path}
+    if strategy != "stream":
+        raise ValueError("Strategy must be 'file' or 'stream'")
+
+    text = kwargs.pop("text", "")
+    size = [0, 0, animation.width, animation.height]
+    for index, duration in enumerate(animation.durations):
+        client.custom_app(
+            name, text, draw=[{"db": size + [animation.pixels(index)]}], **kwargs
+        )
+        if progress:
+            progress(index + 1, len(animation))
+        time.sleep(duration / 1000)
+    return {"strategy": "stream", "frames": len(animation)}
+
+
+class TextTemplate:
+    """Compiled template for colored text fragments
+
+    The template is parsed once into colored spans of literals and fields.
+    Rendering only formats the field values and stitches pre-encoded pieces
+    together, which keeps thousands of score or price updates per minute
+    cheap. Colors are written as ``[#RRGGBB]...[/]`` (spans may nest, ``[[``
+    is a literal bracket) and fields use ``str.format`` syntax::
+
+        TextTemplate("[#FF6600]{team}[/] {score:>2}")
+
+    Args:
+        template (str): Template text
+        color (str): Color for text outside any span
+    """
+
+    def __init__(self, template, color="#FFFFFF"):
+        import re
+        import string
+
+        self.template = template
+        colors = [_color_hex(color)]
+        spans = []
+        position = 0
+        for match in re.finditer(r"\[\[|\[#([0-9A-Fa-f]{6})\]|\[/\]", template):
+            spans.append((colors[-1], template[position : match.start()]))
+            token = match.group(0)
+            if token == "[[":
+                spans.append((colors[-1], "["))
+            elif token == "[/]":
+                if len(colors) == 1:
+                    raise ValueError("Unbalanced [/] in template")
+                colors.pop()
+            else:
+                colors.append(match.group(1).upper())
+            position = match.end()
+        spans.append((colors[-1], template[position:]))
+        if len(colors) != 1:
+            raise ValueError("Unclosed color span in template")
+
+        # Merge adjacent spans of the same color, then split them into parts
+        merged = []
+        for span_color, text in spans:
+            if merged and merged[-1][0] == span_color:
+                merged[-1][1] += text
+            elif text:
+                merged.append([span_color, text])
+
+        formatter = string.Formatter()
+        self.fields = []
+        self._fragments = []
+        for span_color, text in merged:
+            parts = []
+            for literal, field, spec, conversion in formatter.parse(text):
+                if literal:
+                    parts.append(literal)
+                if field is None:
+                    continue
+                if not field or field.isdigit():
+                    raise ValueError("Template fields must be named")
+                if field not in self.fields:
+                    self.fields.append(field)
+                parts.append((field, spec, conversion))
+            suffix = f'","c":"{span_color}"}}'.encode()
+            self._fragments.append((span_color, parts, suffix))
+        self._last = {}
+
+    def __repr__(self):
+        return f"TextTemplate({self.template!r})"
+
+    def _format(self, parts, values):
+        pieces = []
+        for part in parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+            field, spec, conversion = part
+            value = values[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "a":
+                value = ascii(value)
+            elif conversion == "s":
+                value = str(value)
+            pieces.append(format(value, spec))
+        return "".join(pieces)
+
+    def render(self, **values):
+        """Render to the firmware's fragment list
+
+        Returns:
+            list: Fragments such as ``[{"t": "Mets ", "c": "FF6600"}, ...]``
+        """
+        return [
+            {"t": self._format(parts, values), "c": color}
+            for color, parts, _ in self._fragments
+        ]
+
+    def render_json(self, **values):
+        """Render to pre-encoded JSON bytes
+
+        The result can be passed as ``text`` to ``notify`` or ``custom_app``,
+        which embed it in the request body without re-encoding.
+
+        Returns:
+            RawJSON: Encoded fragment array
+        """
+        dumps = json.dumps
+        fragments = [
+            b'{"t":"' + dumps(self._format(parts, values))[1:-1].encode() + suffix
+            for _, parts, suffix in self._fragments
+        ]
+        return RawJSON(b"[" + b",".join(fragments) + b"]")
+
+    def changed(self, key, **values):
+        """Check whether ``key`` would render differently than last time
+
+        Only the field values are compared, so unchanged updates cost one
+        tuple comparison. Each call records the values for ``key``.
+
+        Returns:
+            bool: True if the values differ from the previous call for key
+        """
+        current = tuple(values[field] for field in self.fields)
+        if self._last.get(key) == current:
+            return False
+        self._last[key] = current
+        return True
+
+    def render_changed(self, key, **values):
+        """Render to JSON bytes, or return None if ``key`` is unchanged"""
+        if not self.changed(key, **values):
+            return None
+        return self.render_json(**values)
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(-(-percent * len(sorted_values) // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _split_host(host, default_port=80):
+    """Split a client host into (hostname, port)
+
+    Handles names, IPv4 addresses and IPv6 literals, bare or in brackets
+    (``[fe80::1]:8080``); the hostname is returned without brackets.
+    """
+    from urllib.parse import urlsplit
+
+    if host.count(":") > 1 and not host.startswith("["):
+        host = f"[{host}]"  # Bare IPv6 literal, which can't carry a port
+    parts = urlsplit(f"//{host}")
+    return parts.hostname, parts.port or default_port
+
+
+FleetResult = collections.namedtuple(
+    "FleetResult", ["device", "ok", "value", "error", "latency"]
+)
+FleetResult.__doc__ = """Outcome of one device call; latency is in seconds"""
+
+
+class FleetReport:
+    """Collected results of one fleet-wide call"""
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    @property
+    def values(self):
+        """Successful results by device"""
+        return {r.device: r.value for r in self.results if r.ok}
+
+    @property
+    def failures(self):
+        """Errors by device"""
+        return {r.device: r.error for r in self.results if not r.ok}
+
+    def summary(self):
+        """Return counts, throughput and latency percentiles
+
+        Returns:
+            dict: ``devices``, ``succeeded``, ``failed``, ``elapsed_s``,
+            ``throughput`` (devices per second) and ``latency_ms`` with
+            p50/p95/p99/max
+        """
+        latencies = sorted(r.latency * 1000 for r in self.results)
+        failed = sum(1 for r in self.results if not r.ok)
+        return {
+            "devices": len(self.results),
+            "succeeded": len(self.results) - failed,
+            "failed": failed,
+            "elapsed_s": self.elapsed,
+            "throughput": len(self.results) / self.elapsed if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+
+class Fleet:
+    """Many device clients driven through a bounded thread pool
+
+    Any Awtrix3 method (or a callable taking the client) can be fanned out to
+    every device. Results stream back as devices finish, and a failing or
+    slow device is recorded without aborting the rest of the batch.
+
+    Clients are used as given, timeout included; ``from_hosts`` creates
+    clients with a request timeout.
+
+    Args:
+        clients (dict or iterable): Device name to Awtrix3 client, or an
+            iterable of clients (named by host)
+        max_workers (int): Maximum concurrent requests
+    """
+
+    def __init__(self, clients, max_workers=32):
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not isinstance(clients, dict):
+            clients = {client.host: client for client in clients}
+        self.clients = dict(clients)
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="awtrix-fleet"
+        )
+
+    @classmethod
+    def from_hosts(cls, hosts, auth=None, timeout=5.0, **kwargs):
+        """Create a fleet from host names or a dict of name to host
+
+        Args:
+            hosts (iterable or dict): Hosts, or device name to host
+            auth (tuple): Authentication shared by all devices
+            timeout (float or dict): Request timeout in seconds, or a dict of
+                per-device values (devices left out get no timeout)
+        """
+        if not isinstance(hosts, dict):
+            hosts = {host: host for host in hosts}
+        return cls(
+            {
+                name: Awtrix3(
+                    host,
+                    auth=auth,
+                    timeout=timeout.get(name) if isinstance(timeout, dict) else timeout,
+                )
+                for name, host in hosts.items()
+            },
+            **kwargs,
+        )
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _call(device, client, method, args, kwargs):
+        import time
+
+        start = time.perf_counter()
+        try:
+            if callable(method):
+                value = method(client, *args, **kwargs)
+            else:
+                value = getattr(client, method)(*args, **kwargs)
+        except Exception as e:
+            return FleetResult(device, False, None, e, time.perf_counter() - start)
+        return FleetResult(device, True, value, None, time.perf_counter() - start)
+
+    def imap(self, method, *args, devices=None, **kwargs):
+        """Call a method on every device, yielding results as they complete
+
+        Args:
+            method (str or callable): Awtrix3 method name, or a callable
+                called as ``method(client, *args, **kwargs)``
+            devices (iterable): Limit the call to these device names
+
+        Yields:
+            FleetResult: One per device, in completion order
+
+        Raises:
+            ValueError: if ``devices`` names a device not in the fleet
+        """
+        from concurrent.futures import as_completed
+
+        names = list(self.clients if devices is None else devices)
+        unknown = [name for name in names if name not in self.clients]
+        if unknown:
+            raise ValueError(f"Unknown device: {', '.join(map(str, unknown))}")
+        futures = [
+            self._executor.submit(
+                self._call, name, self.clients[name], method, args, kwargs
+            )
+            for name in names
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def run(self, method, *args, devices=None, progress=None, **kwargs):
+        """Call a method on every device and collect a report
+
+        Args:
+            progress (callable): Called with each FleetResult as it arrives
+
+        Returns:
+            FleetReport: All results with failures collected per device
+        """
+        import time
+
+        start = time.perf_counter()
+        results = []
+        for result in self.imap(method, *args, devices=devices, **kwargs):
+            results.append(result)
+            if progress:
+                progress(result)
+        return FleetReport(results, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        """Fan out any Awtrix3 method, e.g. ``fleet.power(False)``"""
+        if name.startswith("_") or not callable(getattr(Awtrix3, name, None)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.run(name, *args, **kwargs)
+
+
+class ClockSync:
+    """Send the same call to many devices so it lands on all at once
+
+    Devices act the moment a request arrives, so sending to all of them
+    at the same instant still spreads the effect by their differing network
+    delays. ClockSync estimates each device's one-way delay (half the
+    median round trip of repeated cheap probes) and holds back faster
+    devices so every request is expected to arrive together.
+
+    Args:
+        fleet (Fleet): Devices to drive
+        probes (int): Probe rounds per calibration
+        window (int): Round-trip samples kept per device; actions add
+            samples too, so estimates follow changing conditions
+        probe (str): Awtrix3 method used as the probe
+    """
+
+    def __init__(self, fleet, probes=5, window=16, probe="list_apps"):
+        self.fleet = fleet
+        self.probes = probes
+        self.probe = probe
+        self._samples = {
+            name: collections.deque(maxlen=window) for name in fleet.clients
+        }
+
+    def calibrate(self):
+        """Probe every device and refresh the delay estimates
+
+        Returns:
+            dict: Device name to ``rtt_ms``, ``jitter_ms`` and ``delay_ms``
+            (None for devices that never answered)
+        """
+        for _ in range(self.probes):
+            for result in self.fleet.imap(self.probe):
+                if result.ok:
+                    self._samples[result.device].append(result.latency)
+        return self.estimates()
+
+    def estimates(self):
+        """Return the current round-trip and delay estimates"""
+        report = {}
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            rtt = _percentile(ordered, 50)
+            report[name] = {
+                "rtt_ms": rtt * 1000 if ordered else None,
+                "jitter_ms": (ordered[-1] - ordered[0]) * 1000 if ordered else None,
+                "delay_ms": rtt * 500 if ordered else None,
+            }
+        return report
+
+    def fire(self, method, *args, lead=0.02, **kwargs):
+        """Call a method on every device, timed to land simultaneously
+
+        Devices that were never calibrated are assumed to be as slow as the
+        slowest known device. Every send gets its own thread from a pool
+        sized to the fleet, started up front, which sleeps until its send
+        time; the fleet's shared pool is not used, so a busy or small pool
+        can't delay the schedule.
+
+        Args:
+            method (str or callable): Awtrix3 method name, e.g. "notify",
+                or a callable taking the client
+            lead (float): Seconds to allow for starting the sender threads
+
+        Returns:
+            dict: ``values`` and ``failures`` by device, ``send_error_ms``
+            (how late each request actually started against its schedule),
+            ``landed_ms`` (each device's estimated arrival after the first)
+            and ``estimated_skew_ms``, the spread of those arrivals. Arrivals
+            are estimated from half of each round trip, not measured on the
+            devices
+        """
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not any(self._samples.values()):
+            self.calibrate()
+        delays = {
+            name: (e["delay_ms"] / 1000 if e["delay_ms"] is not None else None)
+            for name, e in self.estimates().items()
+        }
+        slowest = max((d for d in delays.values() if d is not None), default=0.0)
+        delays = {n: slowest if d is None else d for n, d in delays.items()}
+        deadline = time.perf_counter() + lead + slowest
+        schedule = sorted(
+            (deadline - delays.get(name, slowest), name) for name in self.fleet.clients
+        )
+
+        def send(name, send_at):
+            remaining = send_at - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            started = time.perf_counter()
+            client = self.fleet.clients[name]
+            return started, Fleet._call(name, client, method, args, kwargs)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, len(schedule)), thread_name_prefix="awtrix-clocksync"
+        ) as executor:
+            futures = {
+                name: (send_at, executor.submit(send, name, send_at))
+                for send_at, name in schedule
+            }
+            outcomes = {
+                name: (send_at, *future.result())
+                for name, (send_at, future) in futures.items()
+            }
+
+        values, failures, landed, send_error_ms = {}, {}, {}, {}
+        for name, (send_at, sent, result) in outcomes.items():
+            send_error_ms[name] = (sent - send_at) * 1000
+            if not result.ok:
+                failures[name] = result.error
+                continue
+            values[name] = result.value
+            self._samples[name].append(result.latency)
+            landed[name] = sent + result.latency / 2
+        first = min(landed.values(), default=0.0)
+        landed_ms = {name: (t - first) * 1000 for name, t in sorted(landed.items())}
+        return {
+            "values": values,
+            "failures": failures,
+            "send_error_ms": dict(sorted(send_error_ms.items())),
+            "landed_ms": landed_ms,
+            "estimated_skew_ms": max(landed_ms.values(), default=0.0),
+        }
+
+    def notify(self, text, **kwargs):
+        """Show a notification on every device at the same moment"""
+        return self.fire("notify", text, **kwargs)
+
+    def custom_app(self, name, text, **kwargs):
+        """Update a custom app on every device at the same moment"""
+        return self.fire("custom_app", name, text, **kwargs)
+
+    def play_sound(self, sound_name):
+        """Play a sound on every device at the same moment"""
+        return self.fire("play_sound", sound_name)
+
+
+class LatencyHistogram:
+    """Latency distribution in fixed log-spaced buckets
+
+    Memory stays constant however many samples are recorded: buckets grow
+    by 10% from 0.1 ms to 60 s, so percentiles are accurate to within 10%.
+    """
+
+    MIN_S = 0.0001
+    MAX_S = 60.0
+    GROWTH = 1.1
+
+    def __init__(self):
+        import array
+        import math
+
+        self._log_growth = math.log(self.GROWTH)
+        size = int(math.log(self.MAX_S / self.MIN_S) / self._log_growth) + 2
+        self.counts = array.array("Q", bytes(8 * size))
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add one latency sample"""
+        import math
+
+        if seconds <= self.MIN_S:
+            bucket = 0
+        else:
+            bucket = int(math.log(seconds / self.MIN_S) / self._log_growth) + 1
+            bucket = min(bucket, len(self.counts) - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        """Add another histogram's samples to this one"""
+        for bucket, count in enumerate(other.counts):
+            self.counts[bucket] += count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, percent):
+        """Return the latency in ms below which ``percent`` of samples fall
+
+        Returns:
+            float: Upper bound of the matching bucket (capped at the
+            largest sample), or None without samples
+        """
+        import math
+
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for bucket, count in enumerate(self.counts[:-1]):
+            seen += count
+            if seen >= rank:
+                upper = self.MIN_S * self.GROWTH**bucket
+                return min(upper, self.max) * 1000
+        # Samples beyond MAX_S share the last bucket
+        return self.max * 1000
+
+
+class HealthChecker:
+    """Periodic health probes of a fleet with per-device latency histograms
+
+    Each check first opens a TCP connection to the device (cheap, and tells
+    an unreachable device from one whose web server is stuck), then times a
+    ``stats()`` call. Devices are classified as:
+
+    - ``down``: the last ``down_after`` checks failed
+    - ``degraded``: the last check failed, or p95 latency is above
+      ``degraded_ms``
+    - ``healthy``: otherwise
+
+    Args:
+        fleet (Fleet): Devices to check
+        degraded_ms (float): p95 latency above which a device is degraded
+        down_after (int): Consecutive failed checks before a device is down
+        connect_timeout (float): Seconds to wait for the TCP connection
+    """
+
+    def __init__(self, fleet, degraded_ms=500.0, down_after=2, connect_timeout=2.0):
+        import threading
+
+        self.fleet = fleet
+        self.degraded_ms = degraded_ms
+        self.down_after = down_after
+        self.connect_timeout = connect_timeout
+        self.rounds = 0
+        self._stop = threading.Event()
+        self._devices = {
+            name: {
+                "histogram": LatencyHistogram(),
+                "checks": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "connect_ms": None,
+                "last_error": None,
+            }
+            for name in fleet.clients
+        }
+
+    def _probe(self, client):
+        import socket
+        import time
+
+        address = _split_host(client.host)
+        start = time.perf_counter()
+        try:
+            socket.create_connection(address, timeout=self.connect_timeout).close()
+        except OSError as e:
+            raise ConnectionError(f"connect failed: {e}")
+        connect_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        client.stats()
+        return connect_ms, time.perf_counter() - start
+
+    def check(self):
+        """Probe every device once, concurrently
+
+        Returns:
+            dict: Device name to status, as from ``status()``
+        """
+        for result in self.fleet.imap(self._probe):
+            device = self._devices[result.device]
+            device["checks"] += 1
+            if result.ok:
+                device["connect_ms"], latency = result.value
+                device["histogram"].record(latency)
+                device["consecutive_failures"] = 0
+            else:
+                device["failures"] += 1
+                device["consecutive_failures"] += 1
+                device["last_error"] = str(result.error)
+        self.rounds += 1
+        return self.status()
+
+    def run(self, rounds=None, interval=30.0):
+        """Check the fleet on a schedule until stopped
+
+        Args:
+            rounds (int): Number of checks (default: until ``stop()``)
+            interval (float): Seconds between the starts of two checks
+        """
+        import time
+
+        self._stop.clear()
+        done = 0
+        while rounds is None or done < rounds:
+            started = time.monotonic()
+            self.check()
+            done += 1
+            if rounds is not None and done >= rounds:
+                break
+            if self._stop.wait(max(0.0, interval - (time.monotonic() - started))):
+                break
+
+    def stop(self):
+        """Stop a running ``run()`` loop"""
+        self._stop.set()
+
+    def _classify(self, device):
+        if device["consecutive_failures"] >= self.down_after:
+            return "down"
+        p95 = device["histogram"].percentile(95)
+        if device["consecutive_failures"] or (
+            p95 is not None and p95 > self.degraded_ms
+        ):
+            return "degraded"
+        return "healthy" if device["checks"] else "unknown"
+
+    def status(self):
+        """Return each device's classification and latency percentiles
+
+        Returns:
+            dict: Device name to ``status``, ``p50``/``p95``/``p99`` in ms,
+            ``connect_ms``, ``checks``, ``failures`` and ``last_error``
+        """
+        report = {}
+        for name, device in self._devices.items():
+            histogram = device["histogram"]
+            report[name] = {
+                "status": self._classify(device),
+                "p50": histogram.percentile(50),
+                "p95": histogram.percentile(95),
+                "p99": histogram.percentile(99),
+                "connect_ms": device["connect_ms"],
+                "checks": device["checks"],
+                "failures": device["failures"],
+                "last_error": device["last_error"],
+            }
+        return report
+
+    def report(self, worst=5):
+        """Summarize fleet health
+
+        Args:
+            worst (int): Number of worst devices to list
+
+        Returns:
+            dict: Device ``counts`` per status, fleet-wide ``latency_ms``
+            percentiles and the ``worst`` devices (down first, then by p95)
+        """
+        status = self.status()
+        fleet = LatencyHistogram()
+        for device in self._devices.values():
+            fleet.merge(device["histogram"])
+        counts = collections.Counter(device["status"] for device in status.values())
+        severity = {"down": 0, "degraded": 1, "unknown": 2, "healthy": 3}
+        ranked = sorted(
+            status.items(),
+            key=lambda item: (severity[item[1]["status"]], -(item[1]["p95"] or 0)),
+        )
+        return {
+            "counts": dict(counts),
+            "latency_ms": {
+                "p50": fleet.percentile(50),
+                "p95": fleet.percentile(95),
+                "p99": fleet.percentile(99),
+            },
+            "worst": [{"device": name, **info} for name, info in ranked[:worst]],
+        }
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of numbers backed by an ``array``
+
+    Appending past capacity overwrites the oldest sample, so memory is
+    allocated once up front.
+
+    Args:
+        capacity (int): Number of samples kept
+        typecode (str): ``array`` typecode of the samples
+    """
+
+    def __init__(self, capacity, typecode="d"):
+        import array
+
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._data = array.array(
+            typecode, bytes(capacity * array.array(typecode).itemsize)
+        )
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        """Add a sample, dropping the oldest when full"""
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    @property
+    def last(self):
+        """The newest sample, or None when empty"""
+        return self._data[self._next - 1] if self._size else None
+
+    def values(self):
+        """Return the samples, oldest first"""
+        if self._size < self.capacity:
+            return self._data[: self._size].tolist()
+        return (self._data[self._next :] + self._data[: self._next]).tolist()
+
+
+# Numeric stats fields sampled by StatsPoller, with their Prometheus help text
+POLLED_METRICS = {
+    "bat": "Battery level in percent",
+    "battery": "Battery level in percent",
+    "ram": "Free memory in KB",
+    "temp": "Temperature in degrees Celsius",
+    "hum": "Relative humidity in percent",
+    "lux": "Ambient light in lux",
+    "bri": "Display brightness",
+    "wifi_signal": "WiFi signal strength in dBm",
+    "uptime": "Seconds since boot",
+    "messages": "Messages received since boot",
+}
+
+
+class StatsPoller:
+    """Sample ``stats()`` from a fleet into per-device ring buffers
+
+    Each device gets one ``RingBuffer`` of sample times and one per metric,
+    so memory stays the same however long the poller runs. Metrics a device
+    doesn't report are stored as NaN. ``prometheus()`` renders the newest
+    samples in the Prometheus text format and ``serve()`` exposes it over
+    HTTP.
+
+    Args:
+        fleet (Fleet): Devices to poll
+        metrics (iterable): Stats fields to keep (default: POLLED_METRICS)
+        capacity (int): Samples kept per metric and device
+        store (MetricStore): Also record every sample here for long-term
+            history
+    """
+
+    def __init__(self, fleet, metrics=None, capacity=720, store=None):
+        import threading
+
+        self.fleet = fleet
+        self.store = store
+        self.metrics = tuple(POLLED_METRICS if metrics is None else metrics)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._times = {name: RingBuffer(capacity) for name in fleet.clients}
+        self._buffers = {
+            name: {metric: RingBuffer(capacity) for metric in self.metrics}
+            for name in fleet.clients
+        }
+        self._up = dict.fromkeys(fleet.clients, 0)
+        self._errors = dict.fromkeys(fleet.clients, 0)
+
+    def poll(self):
+        """Sample every device once, concurrently
+
+        Returns:
+            FleetReport: The ``stats()`` results
+        """
+        import math
+        import time
+
+        report = self.fleet.run("stats")
+        now = time.time()
+        with self._lock:
+            for result in report:
+                name = result.device
+                self._up[name] = int(result.ok)
+                if not result.ok:
+                    self._errors[name] += 1
+                    continue
+                self._times[name].append(now)
+                for metric, buffer in self._buffers[name].items():
+                    value = result.value.get(metric)
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        value = math.nan
+                    buffer.append(value)
+        if self.store is not None:
+            self.store.record_report(report, now)
+        return report
+
+    def run(self, rounds=None, interval=15.0):
+        """Poll on a schedule until stopped
+
+        Args:
+            rounds (int): Number of polls (default: until ``stop()``)
+            interval (float): Seconds between the starts of two polls
+        """
+        import time
+
+        self._stop.clear()
+        done = 0
+        while rounds is None or done < rounds:
+            started = time.monotonic()
+            self.poll()
+            done += 1
+            if rounds is not None and done >= rounds:
+                break
+            if self._stop.wait(max(0.0, interval - (time.monotonic() - started))):
+                break
+
+    def stop(self):
+        """Stop a running ``run()`` loop"""
+        self._stop.set()
+
+    def history(self, device, metric):
+        """Return a device's samples of one metric
+
+        Returns:
+            list: ``(timestamp, value)`` pairs, oldest first
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"Metric not polled: {metric}")
+        with self._lock:
+            return list(
+                zip(
+                    self._times[device].values(),
+                    self._buffers[device][metric].values(),
+                )
+            )
+
+    def prometheus(self):
+        """Render the newest samples in the Prometheus text format
+
+        Returns:
+            str: One gauge per metric, plus ``awtrix_up`` and the
+            ``awtrix_poll_errors_total`` counter
+        """
+        import math
+
+        def labels(name):
+            host = self.fleet.clients[name].host
+            escaped = [
+                value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                for value in (name, host)
+            ]
+            return f'{{device="{escaped[0]}",host="{escaped[1]}"}}'
+
+        lines = [
+            "# HELP awtrix_up Whether the last poll of the device succeeded",
+            "# TYPE awtrix_up gauge",
+        ]
+        with self._lock:
+            lines += [f"awtrix_up{labels(name)} {up}" for name, up in self._up.items()]
+            lines += [
+                "# HELP awtrix_poll_errors_total Failed polls of the device",
+                "# TYPE awtrix_poll_errors_total counter",
+            ]
+            lines += [
+                f"awtrix_poll_errors_total{labels(name)} {errors}"
+                for name, errors in self._errors.items()
+            ]
+            for metric in self.metrics:
+                samples = []
+                for name, buffers in self._buffers.items():
+                    value = buffers[metric].last
+                    if value is None or math.isnan(value):
+                        continue
+                    timestamp = int(self._times[name].last * 1000)
+                    samples.append(
+                        f"awtrix_{metric}{labels(name)} {value:g} {timestamp}"
+                    )
+                if samples:
+                    help_text = POLLED_METRICS.get(metric, f"Stats field {metric}")
+                    lines += [
+                        f"# HELP awtrix_{metric} {help_text}",
+                        f"# TYPE awtrix_{metric} gauge",
+                    ] + samples
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9877, host=""):
+        """Serve ``prometheus()`` at ``/metrics`` from a background thread
+
+        Returns:
+            ThreadingHTTPServer: The running server; call ``shutdown()`` to stop
+        """
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        poller = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = poller.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class MetricStore:
+    """SQLite time-series store for polled stats, with rollups
+
+    Samples go into three tiers: ``raw`` keeps every sample, ``minute`` and
+    ``hour`` keep the count, sum, minimum and maximum of each interval. The
+    rollups are updated as samples arrive, and each tier drops rows older
+    than its retention. Range queries read only the coarsest tier needed.
+
+    Args:
+        path (str): Database file (default: ~/.trixctl-metrics.db), or
+            ":memory:"
+        retention (dict): Seconds to keep per tier, overriding
+            ``RETENTION``
+        raw_interval (float): Expected seconds between raw samples, used
+            to decide when raw data is fine enough for a query
+    """
+
+    # (tier, seconds per row); raw rows are individual samples
+    TIERS = (("raw", 0), ("minute", 60), ("hour", 3600))
+    RETENTION = {"raw": 2 * 86400, "minute": 30 * 86400, "hour": 730 * 86400}
+
+    def __init__(self, path=None, retention=None, raw_interval=15.0):
+        import sqlite3
+        import threading
+        from pathlib import Path
+
+        self.path = str(path or Path.home() / ".trixctl-metrics.db")
+        self.retention = {**self.RETENTION, **(retention or {})}
+        self.raw_interval = raw_interval
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._pruned = 0.0
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS raw (device TEXT, metric TEXT, "
+                "ts REAL, value REAL, PRIMARY KEY (device, metric, ts)) "
+                "WITHOUT ROWID"
+            )
+            for tier, _ in self.TIERS[1:]:
+                self._db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {tier} (device TEXT, metric TEXT, "
+                    "ts REAL, count INTEGER, sum REAL, min REAL, max REAL, "
+                    "PRIMARY KEY (device, metric, ts)) WITHOUT ROWID"
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database"""
+        self._db.close()
+
+    def record(self, device, stats, ts=None):
+        """Store one ``stats()`` sample
+
+        Numeric fields listed in ``POLLED_METRICS`` are stored; others are
+        ignored. Old rows are pruned at most once a minute.
+
+        Args:
+            device (str): Device name
+            stats (dict): Stats payload
+            ts (float): Sample time (default: now)
+        """
+        import time
+
+        ts = time.time() if ts is None else ts
+        samples = [
+            (device, metric, ts, float(value))
+            for metric, value in stats.items()
+            if metric in POLLED_METRICS
+            and isinstance(value, (int, float))
+            and not isinstance(value, bool)
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO raw VALUES (?, ?, ?, ?)", samples
+            )
+            for tier, step in self.TIERS[1:]:
+                self._db.executemany(
+                    f"INSERT INTO {tier} VALUES (?, ?, ?, 1, ?, ?, ?) "
+                    "ON CONFLICT (device, metric, ts) DO UPDATE SET "
+                    "count = count + 1, sum = sum + excluded.sum, "
+                    "min = min(min, excluded.min), max = max(max, excluded.max)",
+                    [
+                        (name, metric, when - when % step, value, value, value)
+                        for name, metric, when, value in samples
+                    ],
+                )
+            if ts - self._pruned >= 60:
+                self._prune(ts)
+                self._pruned = ts
+
+    def record_report(self, report, ts=None):
+        """Store every successful result of a ``Fleet.run("stats")``"""
+        for result in report:
+            if result.ok:
+                self.record(result.device, result.value, ts)
+
+    def _prune(self, now):
+        for tier, _ in self.TIERS:
+            self._db.execute(
+                f"DELETE FROM {tier} WHERE ts < ?", (now - self.retention[tier],)
+            )
+
+    def prune(self, now=None):
+        """Drop rows older than each tier's retention"""
+        import time
+
+        with self._lock, self._db:
+            self._prune(time.time() if now is None else now)
+
+    def tier_for(self, start, end, max_points=2000, now=None):
+        """Pick the finest tier that still holds ``start`` and stays under
+        ``max_points`` points per series
+
+        Returns:
+            str: Tier name
+        """
+        import time
+
+        now = time.time() if now is None else now
+        for tier, step in self.TIERS:
+            if now - start > self.retention[tier]:
+                continue
+            if (end - start) / (step or self.raw_interval) <= max_points:
+                return tier
+        return self.TIERS[-1][0]
+
+    def metrics(self, device):
+        """Return the metrics stored for a device"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT metric FROM hour WHERE device = ? ORDER BY metric",
+                (device,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def query(self, device, metric, start, end=None, tier=None, max_points=2000):
+        """Read a range of one device's metric
+
+        Args:
+            device (str): Device name
+            metric (str): Stats field
+            start (float): Range start, as a Unix time
+            end (float): Range end (default: now)
+            tier (str): Tier to read (default: chosen by ``tier_for()``)
+            max_points (int): Points per series used to choose the tier
+
+        Returns:
+            dict: ``tier`` read and ``points``, a list of dicts with ``ts``,
+            ``count``, ``avg``, ``min`` and ``max``
+        """
+        import time
+
+        end = time.time() if end is None else end
+        tier = tier or self.tier_for(start, end, max_points)
+        if tier not in dict(self.TIERS):
+            raise ValueError(f"Unknown tier: {tier}")
+        if tier == "raw":
+            sql = "SELECT ts, 1, value, value, value FROM raw"
+        else:
+            sql = f"SELECT ts, count, sum / count, min, max FROM {tier}"
+        # The connection is shared with the writers, so read under their lock
+        with self._lock:
+            rows = self._db.execute(
+                f"{sql} WHERE device = ? AND metric = ? AND ts >= ? AND ts <= ? "
+                "ORDER BY ts",
+                (device, metric, start, end),
+            ).fetchall()
+        keys = ("ts", "count", "avg", "min", "max")
+        return {"tier": tier, "points": [dict(zip(keys, row)) for row in rows]}
+
+
+ChangeEvent = collections.namedtuple(
+    "ChangeEvent", ["device", "endpoint", "value", "previous"]
+)
+ChangeEvent.__doc__ = """A changed response; previous is None on the first poll"""
+
+
+class AdaptivePoller:
+    """Poll endpoints as often as they change and notify subscribers
+
+    Each device's endpoint starts at its minimum interval. The raw response
+    body is hashed without parsing it (after cutting out ever-changing
+    fields such as ``uptime``). While the hash stays the same the interval
+    grows by ``backoff`` up to the maximum, and a change drops it back to
+    the minimum. Bodies are parsed only when they changed, and subscribers
+    get a ``ChangeEvent`` for each change.
+
+    Args:
+        fleet (Fleet): Devices to poll
+        endpoints (dict): API endpoint to ``(min_interval, max_interval)``
+            in seconds (default: ``ENDPOINTS``)
+        backoff (float): Interval multiplier while nothing changes
+        volatile (dict): API endpoint to top-level keys ignored when
+            comparing bodies (default: ``VOLATILE``)
+        typed (bool): Parse stats into DeviceStats and the app loop into
+            AppLoop instead of dicts, to keep cached values small
+    """
+
+    ENDPOINTS = {"stats": (5.0, 300.0), "loop": (10.0, 600.0)}
+    VOLATILE = {"stats": ("uptime", "ram", "ldr_raw", "bat_raw", "wifi_signal")}
+    MODELS = {"stats": DeviceStats, "loop": AppLoop}
+
+    def __init__(self, fleet, endpoints=None, backoff=2.0, volatile=None, typed=False):
+        import re
+        import threading
+
+        if backoff < 1:
+            raise ValueError("backoff must be at least 1")
+        self.fleet = fleet
+        self.typed = typed
+        self.endpoints = dict(self.ENDPOINTS if endpoints is None else endpoints)
+        self.backoff = backoff
+        volatile = self.VOLATILE if volatile is None else volatile
+        self._volatile = {
+            endpoint: re.compile(
+                rb'"(?:%s)"\s*:\s*(?:"(?:[^"\\]|\\.)*"|[^,}\]]*),?'
+                % b"|".join(re.escape(key.encode()) for key in keys)
+            )
+            for endpoint, keys in volatile.items()
+            if keys
+        }
+        self._stop = threading.Event()
+        self._subscribers = []
+        self._state = {
+            (name, endpoint): {
+                "interval": low,
+                "due": 0.0,
+                "digest": None,
+                "value": None,
+                "polls": 0,
+                "changes": 0,
+            }
+            for name in fleet.clients
+            for endpoint, (low, high) in self.endpoints.items()
+        }
+
+    def subscribe(self, callback, endpoint=None, device=None):
+        """Call ``callback(event)`` for every change
+
+        Args:
+            callback (callable): Receives a ``ChangeEvent``
+            endpoint (str): Only changes of this endpoint
+            device (str): Only changes of this device
+
+        Returns:
+            callable: Call it to unsubscribe
+        """
+        subscription = (callback, endpoint, device)
+        self._subscribers.append(subscription)
+        return lambda: self._subscribers.remove(subscription)
+
+    def _digest(self, endpoint, body):
+        import hashlib
+
+        pattern = self._volatile.get(endpoint)
+        if pattern is not None:
+            body = pattern.sub(b"", body)
+        return hashlib.blake2b(body, digest_size=16).digest()
+
+    def _publish(self, event):
+        import warnings
+
+        for callback, endpoint, device in list(self._subscribers):
+            if endpoint not in (None, event.endpoint):
+                continue
+            if device not in (None, event.device):
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                warnings.warn(f"Change subscriber failed: {e}", RuntimeWarning)
+
+    def poll(self, now=None):
+        """Poll every endpoint that is due, concurrently
+
+        Args:
+            now (float): Current ``time.monotonic()`` value
+
+        Returns:
+            list: The ``ChangeEvent`` objects published
+        """
+        import time
+
+        now = time.monotonic() if now is None else now
+        events = []
+        for endpoint, (low, high) in self.endpoints.items():
+            due = [
+                name
+                for name in self.fleet.clients
+                if self._state[name, endpoint]["due"] <= now
+            ]
+            if not due:
+                continue
+            results = self.fleet.imap(
+                lambda client: client.get_raw(endpoint), devices=due
+            )
+            for result in results:
+                state = self._state[result.device, endpoint]
+                state["polls"] += 1
+                digest = self._digest(endpoint, result.value) if result.ok else None
+                if digest is not None and digest != state["digest"]:
+                    model = self.MODELS.get(endpoint) if self.typed else None
+                    try:
+                        value = (model.from_json if model else json.loads)(result.value)
+                    except ValueError:
+                        digest = None  # A garbled body counts as a failed poll
+                if digest is not None and digest != state["digest"]:
+                    event = ChangeEvent(result.device, endpoint, value, state["value"])
+                    state.update(digest=digest, value=event.value, interval=low)
+                    state["changes"] += 1
+                    events.append(event)
+                else:
+                    # Unchanged, unreachable or unparseable: back off
+                    state["interval"] = min(state["interval"] * self.backoff, high)
+                state["due"] = now + state["interval"]
+        for event in events:
+            self._publish(event)
+        return events
+
+    def next_due(self):
+        """Return the ``time.monotonic()`` time of the next due poll"""
+        return min(state["due"] for state in self._state.values())
+
+    def run(self):
+        """Poll until ``stop()`` is called, sleeping until the next poll"""
+        import time
+
+        self._stop.clear()
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(max(0.0, self.next_due() - time.monotonic()))
+
+    def stop(self):
+        """Stop a running ``run()`` loop"""
+        self._stop.set()
+
+    def intervals(self):
+        """Return each device's current interval per endpoint
+
+        Returns:
+            dict: Device name to ``{endpoint: seconds}``
+        """
+        intervals = {}
+        for (name, endpoint), state in self._state.items():
+            intervals.setdefault(name, {})[endpoint] = state["interval"]
+        return intervals
+
+
+DeviceEvent = collections.namedtuple(
+    "DeviceEvent", ["device", "kind", "name", "value", "client", "received"]
+)
+DeviceEvent.__doc__ = """An event pushed by a device
+
+kind is "button" (name "left", "select" or "right", value 1 pressed and 0
+released), "app" (value is the current app) or "stats". client is the
+device's Awtrix3 client when the event bus knows it, else None.
+"""
+
+
+def _parse_event(kind, name, payload):
+    """Normalize a pushed payload into (kind, name, value)"""
+    from urllib.parse import parse_qsl
+
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8", "replace")
+    if isinstance(payload, str):
+        text = payload.strip()
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            pairs = parse_qsl(text) if "=" in text else None
+            payload = dict(pairs) if pairs else text
+    if name.startswith("button") and len(name) > len("button"):
+        return "button", name[len("button") :].lower(), int(payload)
+    if isinstance(payload, dict) and "button" in payload:
+        state = payload.get("state", payload.get("value", 1))
+        return "button", str(payload["button"]).lower(), int(state)
+    if name == "currentApp" or kind == "app":
+        if isinstance(payload, dict):
+            payload = payload.get("currentApp", payload.get("app"))
+        return "app", "currentApp", payload
+    if isinstance(payload, dict) and set(payload) <= {"app", "currentApp"}:
+        return "app", "currentApp", payload.get("currentApp", payload.get("app"))
+    return "stats", name or "stats", payload
+
+
+class EventBus:
+    """Dispatch device events to threaded or async handlers
+
+    Events wait in a bounded queue. Handlers run on a thread pool, or on
+    an asyncio loop in its own thread when they are coroutine functions,
+    with at most ``workers`` running at once. When handlers can't keep up,
+    the queue fills and ``publish()`` blocks, so receivers slow down too.
+    A full queue makes the HTTP receiver answer 503 and holds back the
+    MQTT network loop.
+
+    Args:
+        clients (dict): Device name to Awtrix3 client, so handlers can
+            react through ``event.client``
+        max_pending (int): Events queued before ``publish()`` blocks
+        workers (int): Handlers running at once
+    """
+
+    def __init__(self, clients=None, max_pending=256, workers=4):
+        import queue
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.clients = dict(clients or {})
+        self.counts = collections.Counter()
+        self.last_error = None
+        self._queue = queue.Queue(max_pending)
+        self._handlers = []
+        self._slots = threading.BoundedSemaphore(workers)
+        self._executor = ThreadPoolExecutor(workers)
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._loop = None
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def on(self, handler, kind=None, device=None):
+        """Call ``handler(event)`` for matching events
+
+        Args:
+            handler (callable): Function or coroutine function
+            kind (str): Only events of this kind ("button", "app", "stats")
+            device (str): Only events from this device
+
+        Returns:
+            callable: Call it to remove the handler
+        """
+        import asyncio
+
+        if asyncio.iscoroutinefunction(handler) and self._loop is None:
+            import threading
+
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        entry = (handler, kind, device)
+        self._handlers.append(entry)
+        return lambda: self._handlers.remove(entry)
+
+    def resolve(self, identifier):
+        """Map an MQTT prefix or sender address to a device name and client
+
+        Returns:
+            tuple: ``(name, client)``; client is None for unknown devices
+        """
+        if identifier in self.clients:
+            return identifier, self.clients[identifier]
+        for name, client in self.clients.items():
+            if identifier in (client.host, _split_host(client.host)[0]):
+                return name, client
+        return identifier, None
+
+    def publish(self, event, timeout=None):
+        """Queue an event for the handlers
+
+        Args:
+            event (DeviceEvent): The event
+            timeout (float): Seconds to wait for room in the queue
+                (default: wait as long as needed)
+
+        Returns:
+            bool: False if the queue stayed full and the event was dropped
+        """
+        import queue
+
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put(event, timeout=timeout)
+        except queue.Full:
+            self.counts["dropped"] += 1
+            self._done()
+            return False
+        self.counts["received"] += 1
+        return True
+
+    def _done(self, *_):
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _finished(self, future):
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            self.counts["failed"] += 1
+            self.last_error = error
+        else:
+            self.counts["handled"] += 1
+        self._done()
+
+    def _dispatch(self):
+        import asyncio
+
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            handlers = [
+                handler
+                for handler, kind, device in list(self._handlers)
+                if kind in (None, event.kind) and device in (None, event.device)
+            ]
+            for handler in handlers:
+                with self._idle:
+                    self._pending += 1
+                self._slots.acquire()
+                if asyncio.iscoroutinefunction(handler):
+                    future = asyncio.run_coroutine_threadsafe(
+                        handler(event), self._loop
+                    )
+                else:
+                    future = self._executor.submit(handler, event)
+                future.add_done_callback(self._finished)
+            self._done()
+
+    def drain(self, timeout=None):
+        """Wait until every queued event has been handled
+
+        Returns:
+            bool: False on timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        """Finish queued events and stop dispatching"""
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class HttpEventReceiver:
+    """Receive events POSTed by devices and publish them on an EventBus
+
+    Point a device's callback URL at ``http://<this host>:<port>/<kind>``,
+    e.g. ``/button``. Bodies may be JSON or form encoded. The device is the
+    ``device`` query parameter, or else the sender's address. Responds 202
+    when queued, 400 for unreadable bodies and 503 when the bus is full.
+
+    Args:
+        bus (EventBus): Where events go
+        port (int): Port to listen on (0 picks a free one)
+        host (str): Address to listen on
+        timeout (float): Seconds to wait for room on a full bus
+    """
+
+    def __init__(self, bus, port=8377, host="", timeout=1.0):
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs, urlparse
+
+        self.bus = bus
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                identifier = parse_qs(url.query).get("device", [self.client_address[0]])
+                name, client = receiver.bus.resolve(identifier[0])
+                path = url.path.strip("/").rsplit("/", 1)[-1]
+                try:
+                    kind, event_name, value = _parse_event(path, path, body)
+                except (TypeError, ValueError):
+                    self.send_error(400)
+                    return
+                event = DeviceEvent(name, kind, event_name, value, client, time.time())
+                if receiver.bus.publish(event, timeout=timeout):
+                    self.send_response(202)
+                else:
+                    self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop receiving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _import_mqtt():
+    """Return paho.mqtt.client, with a helpful error when it isn't installed"""
+    try:
+        import paho.mqtt.client as mqtt
+    except ImportError:
+        raise ImportError(
+            "paho-mqtt is required for MQTT events: pip install awtrix3[mqtt]"
+        ) from None
+    return mqtt
+
+
+class MqttEventReceiver:
+    """Subscribe to device topics on an MQTT broker and publish events
+
+    Devices publish under their MQTT prefix: ``<prefix>/stats`` (JSON),
+    ``<prefix>/stats/currentApp`` and ``<prefix>/stats/buttonLeft`` and
+    friends. The prefix, which may contain "/" (e.g. ``awtrix/lobby``), is
+    the device name on the bus. Publishing blocks while the bus is full,
+    which holds back the client's network loop.
+
+    Args:
+        bus (EventBus): Where events go
+        broker (str): Broker host name
+        port (int): Broker port
+        prefixes (iterable): Device prefixes to subscribe to (default:
+            every device whose prefix has one or two levels)
+        username (str): Broker username
+        password (str): Broker password
+    """
+
+    def __init__(
+        self, bus, broker, port=1883, prefixes=None, username=None, password=None
+    ):
+        mqtt = _import_mqtt()
+        self.bus = bus
+        self.topics = [
+            topic
+            for prefix in prefixes or ["+", "+/+"]
+            for topic in (f"{prefix}/stats", f"{prefix}/stats/#")
+        ]
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        if username:
+            self.client.username_pw_set(username, password)
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.client.connect(broker, port)
+        self.client.loop_start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties=None):
+        # Subscribe on every (re)connect
+        client.subscribe([(topic, 0) for topic in self.topics])
+
+    def _on_message(self, client, userdata, message):
+        event = _mqtt_event(self.bus, message.topic, message.payload)
+        if event is not None:
+            self.bus.publish(event)
+
+    def close(self):
+        """Disconnect from the broker"""
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def _mqtt_event(bus, topic, payload):
+    """Turn an MQTT message into a DeviceEvent, or None for other topics"""
+    import time
+
+    # The prefix may itself contain "/", so find the stats segment from the end
+    parts = topic.split("/")
+    if len(parts) >= 2 and parts[-1] == "stats":
+        prefix, field = parts[:-1], ""
+    elif len(parts) >= 3 and parts[-2] == "stats":
+        prefix, field = parts[:-2], parts[-1]
+    else:
+        return None
+    name, client = bus.resolve("/".join(prefix))
+    try:
+        kind, event_name, value = _parse_event("stats", field, payload)
+    except (TypeError, ValueError):
+        return None
+    return DeviceEvent(name, kind, event_name, value, client, time.time())
+
+
+class HashRing:
+    """Consistent hash ring mapping keys (device hosts) to nodes (workers)
+
+    Each node is placed on the ring many times, so removing a node only moves
+    the keys it owned and the remaining keys stay where they were.
+
+    Args:
+        nodes (iterable): Initial nodes
+        replicas (int): Ring positions per node
+    """
+
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._positions = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        import hashlib
+
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def __len__(self):
+        return len(set(self._owners.values()))
+
+    def add(self, node):
+        """Place a node on the ring"""
+        import bisect
+
+        for replica in range(self.replicas):
+            position = self._hash(f"{node}#{replica}")
+            if position not in self._owners:
+                bisect.insort(self._positions, position)
+            self._owners[position] = node
+
+    def remove(self, node):
+        """Take a node off the ring"""
+        positions = [p for p, owner in self._owners.items() if owner == node]
+        for position in positions:
+            del self._owners[position]
+        self._positions = sorted(self._owners)
+
+    def get(self, key):
+        """Return the node that owns a key"""
+        import bisect
+
+        if not self._positions:
+            raise LookupError("Hash ring is empty")
+        index = bisect.bisect(self._positions, self._hash(key))
+        return self._owners[self._positions[index % len(self._positions)]]
+
+
+def _shard_worker(worker_id, tasks, results, auth, timeout, threads):
+    """Worker process loop: run device calls and report results"""
+    import pickle
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    clients = {}
+
+    def handle(task):
+        # Every task must answer, or the supervisor waits for it until its deadline
+        task_id, host, method, args, kwargs = task
+        start = time.perf_counter()
+        try:
+            client = clients.get(host)
+            if client is None:
+                client = clients[host] = Awtrix3(host, auth=auth, timeout=timeout)
+            result = Fleet._call(host, client, method, args, kwargs)
+            _, ok, value, error, latency = result
+            # The queue pickles in a background thread and drops what fails
+            pickle.dumps(value)
+        except Exception as e:
+            ok, value, error = False, None, e
+            latency = time.perf_counter() - start
+        if not ok:
+            value, error = None, f"{type(error).__name__}: {error}"
+        results.put((task_id, worker_id, ok, value, error, latency))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            executor.submit(handle, task)
+
+
+class ShardedSupervisor:
+    """Spread a large fleet across worker processes
+
+    Devices are assigned to workers with a consistent hash ring, so a device
+    keeps talking to the same worker (and its client) across calls. Each
+    worker runs the regular Awtrix3 client on a small thread pool. When a
+    worker dies it is restarted under the same name, or, with
+    ``respawn=False``, removed from the ring so its devices move to the
+    surviving workers; either way its unfinished calls are re-sent.
+
+    Args:
+        hosts (iterable): Device hosts
+        workers (int): Number of worker processes
+        auth (tuple): Authentication shared by all devices
+        timeout (float): Per-request timeout in seconds
+        threads (int): Concurrent requests inside each worker
+        respawn (bool): Restart dead workers instead of rebalancing
+    """
+
+    def __init__(
+        self, hosts, workers=4, auth=None, timeout=5.0, threads=8, respawn=True
+    ):
+        import multiprocessing
+
+        if workers < 1:
+            raise ValueError("Supervisor needs at least one worker")
+        self.hosts = list(hosts)
+        self.auth = auth
+        self.timeout = timeout
+        self.threads = threads
+        self.respawn = respawn
+        self._context = multiprocessing.get_context()
+        self._results = self._context.Queue()
+        self._workers = {}
+        self._task_ids = itertools.count()
+        self.ring = HashRing()
+        self.restarts = 0
+        self._metrics = {}
+        for index in range(workers):
+            self._spawn(f"worker-{index}")
+
+    def _spawn(self, name):
+        queue = self._context.Queue()
+        process = self._context.Process(
+            target=_shard_worker,
+            args=(name, queue, self._results, self.auth, self.timeout, self.threads),
+            daemon=True,
+            name=f"awtrix-{name}",
+        )
+        process.start()
+        self._workers[name] = (process, queue)
+        self._metrics.setdefault(
+            name, {"tasks": 0, "errors": 0, "latency_s": 0.0, "restarts": 0}
+        )
+        self.ring.add(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop all workers"""
+        for process, queue in self._workers.values():
+            if process.is_alive():
+                queue.put(None)
+        for process, _ in self._workers.values():
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self._workers = {}
+
+    @property
+    def workers(self):
+        """Worker names mapped to their processes"""
+        return {name: process for name, (process, _) in self._workers.items()}
+
+    def assignments(self):
+        """Return the hosts owned by each worker"""
+        owned = {name: [] for name in self._workers}
+        for host in self.hosts:
+            owned[self.ring.get(host)].append(host)
+        return owned
+
+    def _check_workers(self, pending):
+        """Restart or drop dead workers and re-send their unfinished calls"""
+        dead = [
+            name
+            for name, (process, _) in self._workers.items()
+            if not process.is_alive()
+        ]
+        for name in dead:
+            self._workers.pop(name)
+            self.ring.remove(name)
+            self.restarts += 1
+            self._metrics[name]["restarts"] += 1
+            if self.respawn or not self._workers:
+                self._spawn(name)
+        if dead:
+            for task_id, (worker, task) in list(pending.items()):
+                if worker in dead:
+                    self._send(task_id, task, pending)
+
+    def _send(self, task_id, task, pending):
+        worker = self.ring.get(task[1])
+        self._workers[worker][1].put(task)
+        pending[task_id] = (worker, task)
+
+    def imap(self, method, *args, hosts=None, deadline=None, **kwargs):
+        """Call a method on every device, yielding results as they complete
+
+        Args:
+            method (str): Awtrix3 method name (or a picklable callable)
+            hosts (iterable): Limit the call to these hosts
+            deadline (float): Seconds to wait for the whole batch. Defaults
+                to the timeout for each round of requests the busiest worker
+                needs, plus one round for re-sent calls
+
+        Yields:
+            FleetResult: One per device; errors are reported as strings.
+            Devices still unanswered at the deadline fail with a TimeoutError
+        """
+        import queue as queue_module
+        import time
+
+        start = time.monotonic()
+        pending = {}
+        self._check_workers(pending)  # Don't route new calls to dead workers
+        for host in self.hosts if hosts is None else hosts:
+            task_id = next(self._task_ids)
+            self._send(task_id, (task_id, host, method, args, kwargs), pending)
+        if deadline is None and self.timeout is not None:
+            load = collections.Counter(worker for worker, _ in pending.values())
+            rounds = -(-max(load.values(), default=0) // self.threads)
+            deadline = self.timeout * (rounds + 1)
+
+        while pending:
+            if deadline is not None and time.monotonic() - start > deadline:
+                elapsed = time.monotonic() - start
+                error = f"TimeoutError: no result within {deadline:g}s"
+                for _, task in pending.values():
+                    yield FleetResult(task[1], False, None, error, elapsed)
+                return
+            try:
+                message = self._results.get(timeout=0.1)
+            except queue_module.Empty:
+                self._check_workers(pending)
+                continue
+            task_id, worker, ok, value, error, latency = message
+            entry = pending.pop(task_id, None)
+            if entry is None:
+                continue  # Late duplicate of a call that was re-sent
+            metrics = self._metrics[worker]
+            metrics["tasks"] += 1
+            metrics["errors"] += 0 if ok else 1
+            metrics["latency_s"] += latency
+            yield FleetResult(entry[1][1], ok, value, error, latency)
+
+    def run(self, method, *args, hosts=None, **kwargs):
+        """Call a method on every device and collect a FleetReport"""
+        import time
+
+        start = time.perf_counter()
+        results = list(self.imap(method, *args, hosts=hosts, **kwargs))
+        return FleetReport(results, time.perf_counter() - start)
+
+    def metrics(self):
+        """Return per-worker counters gathered by the supervisor
+
+        Returns:
+            dict: Worker name to ``tasks``, ``errors``, ``restarts``,
+            ``alive``, ``devices`` and mean ``latency_ms``
+        """
+        owned = self.assignments()
+        report = {}
+        for name, metrics in self._metrics.items():
+            tasks = metrics["tasks"]
+            process = self._workers.get(name, (None, None))[0]
+            report[name] = {
+                "tasks": tasks,
+                "errors": metrics["errors"],
+                "restarts": metrics["restarts"],
+                "alive": bool(process and process.is_alive()),
+                "devices": len(owned.get(name, [])),
+                "latency_ms": metrics["latency_s"] * 1000 / tasks if tasks else None,
+            }
+        return report
+
+
+def _dict_diff(old, new):
+    """Return the keys set and removed going from ``old`` to ``new``"""
+    diff = {}
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    removed = [k for k in old if k not in new]
+    if changed:
+        diff["set"] = changed
+    if removed:
+        diff["unset"] = removed
+    return diff
+
+
+def _dict_patch(base, diff):
+    """Apply a diff from ``_dict_diff`` to a copy of ``base``"""
+    patched = {k: v for k, v in base.items() if k not in diff.get("unset", ())}
+    patched.update(diff.get("set", {}))
+    return patched
+
+
+class IncrementalBackup:
+    """Settings backups stored as a base snapshot plus per-run diffs
+
+    The chain is a JSON Lines file that only ever grows by one line per
+    backup: either a full ``base`` record or a ``diff`` record holding just
+    the settings and stats keys that changed since the previous backup.
+    A new base is written every ``rebase_every`` backups (or when a diff
+    gets large), so restoring any point in time reads one base and at most
+    ``rebase_every - 1`` diffs.
+
+    Args:
+        path (str): Chain file path (created on the first backup)
+        rebase_every (int): Maximum backups per base, including the base
+    """
+
+    SECTIONS = ("device_stats", "settings")
+
+    def __init__(self, path, rebase_every=7):
+        if rebase_every < 1:
+            raise ValueError("rebase_every must be at least 1")
+        self.path = str(path)
+        self.rebase_every = rebase_every
+        self._entries = []  # (timestamp, record type, file offset)
+        self._last = None
+        self._load_index()
+
+    @staticmethod
+    def is_chain(path):
+        """Tell whether a file is an incremental backup chain"""
+        try:
+            with open(path, "rb") as f:
+                first = json.loads(f.readline() or b"null")
+        except (OSError, ValueError):
+            return False
+        return isinstance(first, dict) and first.get("record") == "base"
+
+    def _load_index(self):
+        import os
+
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._entries.append(
+                        (record["backup_timestamp"], record["record"], offset)
+                    )
+                offset += len(line)
+        if self._entries and self._entries[0][1] != "base":
+            raise ValueError(f"{self.path} is not an incremental backup chain")
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def timestamps(self):
+        """Timestamps of every backup in the chain, oldest first"""
+        return [timestamp for timestamp, _, _ in self._entries]
+
+    def append(self, backup_data):
+        """Add a backup to the chain
+
+        Args:
+            backup_data (dict): Backup from ``backup_settings()``
+
+        Returns:
+            str: ``"base"`` or ``"diff"``, the kind of record written
+        """
+        import os
+
+        record = {
+            "backup_timestamp": backup_data["backup_timestamp"],
+            "backup_version": backup_data.get("backup_version", "1.0"),
+        }
+        previous = self._last if self._last is not None else self.at()
+        since_base = 0
+        for _, kind, _ in reversed(self._entries):
+            since_base += 1
+            if kind == "base":
+                break
+
+        diffs = None
+        if previous is not None and since_base < self.rebase_every:
+            diffs = {
+                section: _dict_diff(
+                    previous.get(section) or {}, backup_data.get(section) or {}
+                )
+                for section in self.SECTIONS
+            }
+            full = {section: backup_data.get(section) for section in self.SECTIONS}
+            if len(json.dumps(diffs)) > len(json.dumps(full)) // 2:
+                diffs = None  # Diff is no longer compact, start a new base
+        if diffs is None:
+            record["record"] = "base"
+            for section in self.SECTIONS:
+                record[section] = backup_data.get(section) or {}
+        else:
+            record["record"] = "diff"
+            record.update({k: v for k, v in diffs.items() if v})
+
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        with open(self.path, "ab") as f:
+            f.write(line)
+        self._entries.append((record["backup_timestamp"], record["record"], offset))
+        self._last = {
+            "backup_timestamp": record["backup_timestamp"],
+            "backup_version": record["backup_version"],
+            **{s: backup_data.get(s) or {} for s in self.SECTIONS},
+        }
+        return record["record"]
+
+    def at(self, when=None):
+        """Reconstruct the backup in effect at a point in time
+
+        Args:
+            when (str): ISO timestamp or prefix, e.g. "2025-07-13" or
+                "2025-07-13T12:00". The latest backup at or before it is
+                used, comparing at the precision given (default: latest)
+
+        Returns:
+            dict: Backup in the ``backup_settings()`` format, or None if the
+            chain is empty or has nothing that early
+        """
+        target = len(self._entries) - 1
+        if when is not None:
+            target = -1
+            for position, (timestamp, _, _) in enumerate(self._entries):
+                if timestamp[: len(when)] <= when:
+                    target = position
+        if target < 0:
+            return None
+
+        start = target
+        while self._entries[start][1] != "base":
+            start -= 1
+        backup = None
+        with open(self.path, "rb") as f:
+            f.seek(self._entries[start][2])
+            for _ in range(start, target + 1):
+                record = json.loads(f.readline())
+                if record["record"] == "base":
+                    backup = {s: record[s] for s in self.SECTIONS}
+                else:
+                    for section in self.SECTIONS:
+                        backup[section] = _dict_patch(
+                            backup[section], record.get(section, {})
+                        )
+                backup["backup_timestamp"] = record["backup_timestamp"]
+                backup["backup_version"] = record["backup_version"]
+        return {
+            "backup_timestamp": backup["backup_timestamp"],
+            "backup_version": backup["backup_version"],
+            "device_stats": backup["device_stats"],
+            "settings": backup["settings"],
+        }
+
+
+class FleetBackup:
+    """Settings backups of many devices in one compressed archive
+
+    The archive is a zip file. Settings and stats are stored as
+    content-addressed JSON blobs, so devices sharing the same settings
+    store them once. ``index.json`` maps each device to its blobs, so
+    reading one device's backup only decompresses that device's entries.
+
+    Args:
+        path (str): Archive path
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, path):
+        import zipfile
+
+        self.path = str(path)
+        self.failures = {}
+        with zipfile.ZipFile(self.path) as archive:
+            try:
+                self.index = json.loads(archive.read(self.INDEX))
+            except KeyError:
+                raise ValueError(f"{self.path} is not a fleet backup archive")
+
+    @classmethod
+    def create(cls, fleet, path):
+        """Back up every device of a fleet into one archive
+
+        Devices are backed up concurrently. Blobs are written as devices
+        answer, so memory use doesn't grow with the size of the fleet.
+
+        Args:
+            fleet (Fleet): Devices to back up
+            path (str): Archive path to write
+
+        Returns:
+            FleetBackup: The written archive; ``failures`` maps devices
+            that couldn't be backed up to their errors
+        """
+        import hashlib
+        import zipfile
+        from datetime import datetime
+
+        index = {
+            "backup_timestamp": datetime.now().isoformat(),
+            "backup_version": "1.0",
+            "devices": {},
+        }
+        failures = {}
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            stored = set()
+
+            def put(obj):
+                blob = json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+                digest = hashlib.sha256(blob).hexdigest()
+                if digest not in stored:
+                    archive.writestr(f"blobs/{digest}.json", blob)
+                    stored.add(digest)
+                return digest
+
+            for result in fleet.imap("backup_settings"):
+                if not result.ok:
+                    failures[result.device] = result.error
+                    continue
+                backup = result.value
+                index["devices"][result.device] = {
+                    "host": fleet.clients[result.device].host,
+                    "backup_timestamp": backup["backup_timestamp"],
+                    "settings": put(backup["settings"]),
+                    "device_stats": put(backup["device_stats"]),
+                }
+            index["devices"] = dict(sorted(index["devices"].items()))
+            archive.writestr(cls.INDEX, json.dumps(index, indent=2))
+
+        backup = cls(path)
+        backup.failures = failures
+        return backup
+
+    @property
+    def devices(self):
+        """Names of the backed up devices"""
+        return list(self.index["devices"])
+
+    def read(self, device):
+        """Return one device's backup
+
+        Args:
+            device (str): Device name
+
+        Returns:
+            dict: Backup in the ``backup_settings()`` format, ready for
+            ``restore_settings()``
+
+        Raises:
+            ValueError: if the archive has no backup for the device, or its
+                index entry or blobs are missing
+        """
+        import zipfile
+
+        try:
+            entry = self.index["devices"][device]
+        except KeyError:
+            raise ValueError(f"No backup for device '{device}' in {self.path}")
+        try:
+            with zipfile.ZipFile(self.path) as archive:
+                return {
+                    "backup_timestamp": entry["backup_timestamp"],
+                    "backup_version": self.index["backup_version"],
+                    "device_stats": json.loads(
+                        archive.read(f"blobs/{entry['device_stats']}.json")
+                    ),
+                    "settings": json.loads(
+                        archive.read(f"blobs/{entry['settings']}.json")
+                    ),
+                }
+        except KeyError as e:
+            raise ValueError(
+                f"Backup of device '{device}' in {self.path} is incomplete: "
+                f"missing {e}"
+            )
+
+    def restore(self, fleet, devices=None):
+        """Restore each device of a fleet from its own backup
+
+        Args:
+            fleet (Fleet): Devices to restore, matched to backups by name
+            devices (iterable): Limit the restore to these device names
+
+        Returns:
+            FleetReport: Results per device; devices without a complete
+            backup fail with ValueError
+
+        Raises:
+            ValueError: if ``devices`` names a device not in the fleet
+        """
+        names = list(fleet.clients if devices is None else devices)
+        by_client = {
+            fleet.clients[name]: name for name in names if name in fleet.clients
+        }
+
+        def restore(client):
+            return client.restore_settings(self.read(by_client[client]))
+
+        return fleet.run(restore, devices=names)
+
+
+class FileSync:
+    """Mirror a local directory onto the device filesystem
+
+    Only files that differ are uploaded: a file is sent when it is missing
+    on the device, its size there differs, or its content hash differs from
+    what was last uploaded to that device. Local hashes are cached by size
+    and modification time, so unchanged files are not re-read.
+
+    Progress is saved to a state file every ``save_every`` uploads or
+    deletes and whenever a sync ends, failed or not, so an interrupted sync
+    picks up where it stopped when run again. Batching keeps large trees
+    from rewriting the whole state file once per file.
+
+    Args:
+        local_dir (str): Local directory, e.g. containing ICONS/ and MELODIES/
+        remote_dir (str): Device directory to mirror it to
+        delete (bool): Delete device files under ``remote_dir`` that an
+            earlier sync uploaded and that no longer exist locally. Files
+            this tool did not upload (firmware config, other tools' icons)
+            are never deleted
+        state_path (str): State file (default: ``.awtrix-sync.json`` in
+            ``local_dir``, which is never uploaded)
+        save_every (int): Changes between state file writes
+    """
+
+    STATE_FILE = ".awtrix-sync.json"
+
+    def __init__(
+        self, local_dir, remote_dir="/", delete=False, state_path=None, save_every=50
+    ):
+        import os
+        import threading
+
+        if not os.path.isdir(local_dir):
+            raise ValueError(f"Not a directory: {local_dir}")
+        if not remote_dir.startswith("/"):
+            raise ValueError("Remote path must be an absolute path")
+        self.local_dir = os.path.abspath(local_dir)
+        self.remote_dir = "/" + remote_dir.strip("/")
+        self.delete = delete
+        self.save_every = max(1, save_every)
+        self.state_path = os.path.abspath(
+            state_path or os.path.join(self.local_dir, self.STATE_FILE)
+        )
+        self._lock = threading.Lock()
+        self.state = {"local": {}, "devices": {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state.update(json.load(f))
+
+    def _save_state(self):
+        import os
+
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _remote_path(self, relative):
+        return f"{self.remote_dir.rstrip('/')}/{relative}"
+
+    def local_files(self):
+        """Hash the local directory, re-reading only changed files
+
+        Returns:
+            dict: Remote path to ``(local path, size, sha256)``
+        """
+        import hashlib
+        import os
+
+        files = {}
+        cache = self.state["local"]
+        seen = set()
+        for root, dirs, names in os.walk(self.local_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                if os.path.abspath(path) in (self.state_path, f"{self.state_path}.tmp"):
+                    continue
+                relative = os.path.relpath(path, self.local_dir).replace(os.sep, "/")
+                info = os.stat(path)
+                cached = cache.get(relative)
+                if cached and cached[:2] == [info.st_mtime_ns, info.st_size]:
+                    digest = cached[2]
+                else:
+                    hasher = hashlib.sha256()
+                    with open(path, "rb") as f:
+                        for chunk in iter(lambda: f.read(1 << 16), b""):
+                            hasher.update(chunk)
+                    digest = hasher.hexdigest()
+                    with self._lock:
+                        cache[relative] = [info.st_mtime_ns, info.st_size, digest]
+                seen.add(relative)
+                files[self._remote_path(relative)] = (path, info.st_size, digest)
+        with self._lock:
+            for relative in set(cache) - seen:
+                del cache[relative]
+        return files
+
+    def remote_files(self, client):
+        """List every file under ``remote_dir`` on a device
+
+        Returns:
+            dict: Remote path to size (None when the device doesn't say)
+        """
+        files = {}
+        pending = [self.remote_dir]
+        while pending:
+            for entry in client.list_files(pending.pop()):
+                if entry.get("type") == "dir":
+                    pending.append(entry["name"])
+                else:
+                    files[entry["name"]] = entry.get("size")
+        return files
+
+    def plan(self, client):
+        """Work out what a sync would change on one device
+
+        Returns:
+            dict: Sorted remote paths to ``upload`` and ``delete``, and the
+            number of ``unchanged`` files
+        """
+        return self._plan(client, self.local_files())
+
+    def _plan(self, client, local):
+        remote = self.remote_files(client)
+        uploaded = self.state["devices"].get(client.host, {})
+        upload = []
+        for remote_path, (_, size, digest) in local.items():
+            remote_size = remote.get(remote_path, -1)
+            if (
+                remote_path not in remote
+                or (remote_size is not None and remote_size != size)
+                or uploaded.get(remote_path) != digest
+            ):
+                upload.append(remote_path)
+        delete = []
+        if self.delete:
+            # Only what this tool uploaded, as recorded in the state file
+            delete = sorted(
+                path for path in set(remote) - set(local) if path in uploaded
+            )
+        return {
+            "upload": sorted(upload),
+            "delete": delete,
+            "unchanged": len(local) - len(upload),
+        }
+
+    def sync(self, client, dry_run=False, local=None):
+        """Upload and delete what differs on one device
+
+        Args:
+            client (Awtrix3): Device to sync
+            dry_run (bool): Only return the plan
+            local (dict): Manifest from ``local_files()`` to reuse instead of
+                scanning the directory again
+
+        Returns:
+            dict: The plan, with ``bytes`` uploaded
+        """
+        local = self.local_files() if local is None else local
+        plan = self._plan(client, local)
+        plan["bytes"] = 0
+        if dry_run:
+            return plan
+
+        with self._lock:
+            uploaded = self.state["devices"].setdefault(client.host, {})
+        changes = 0
+        try:
+            for remote_path in plan["upload"]:
+                path, size, digest = local[remote_path]
+                client.upload_file(path, remote_path)
+                plan["bytes"] += size
+                changes += 1
+                with self._lock:
+                    uploaded[remote_path] = digest
+                    if changes % self.save_every == 0:
+                        self._save_state()
+            for remote_path in plan["delete"]:
+                client.delete_file(remote_path)
+                changes += 1
+                with self._lock:
+                    uploaded.pop(remote_path, None)
+                    if changes % self.save_every == 0:
+                        self._save_state()
+        finally:
+            with self._lock:
+                self._save_state()  # Also keeps refreshed local hashes
+        return plan
+
+    def sync_fleet(self, fleet, dry_run=False):
+        """Sync every device of a fleet concurrently
+
+        Devices run in parallel, bounded by the fleet's ``max_workers``;
+        each device receives its files one at a time.
+
+        Returns:
+            FleetReport: The sync result of each device
+        """
+        local = self.local_files()  # Hash once, not once per device
+        return fleet.run(self.sync, dry_run=dry_run, local=local)
+
+
+class FirmwareRollout:
+    """Staged firmware update of a fleet, halting on too many failures
+
+    Devices are updated in waves. Each wave uploads to up to
+    ``concurrency`` devices at once, then waits for every device in it to
+    come back healthy: reachable, rebooted (uptime reset) and, when
+    ``expected_version`` is given, reporting that version. The rollout halts
+    before the next wave once the share of failed devices exceeds
+    ``max_failure_rate``. Devices already on ``expected_version`` are
+    left alone and reported as ``current``.
+
+    The image is memory-mapped once and streamed to every device from the
+    same mapping, so it is never copied per upload.
+
+    Args:
+        fleet (Fleet): Devices to update
+        image (str): Path to the firmware .bin
+        waves (iterable): Wave sizes; the last size repeats until every
+            device is done (default: 1, 4, then 16 at a time)
+        concurrency (int): Maximum simultaneous uploads
+        max_failure_rate (float): Halt when failed / attempted exceeds this
+        expected_version (str): Version devices must report after updating
+        health_timeout (float): Seconds to wait for a device to come back
+        poll_interval (float): Seconds between health checks
+    """
+
+    def __init__(
+        self,
+        fleet,
+        image,
+        waves=(1, 4, 16),
+        concurrency=4,
+        max_failure_rate=0.2,
+        expected_version=None,
+        health_timeout=120.0,
+        poll_interval=2.0,
+    ):
+        import os
+
+        waves = list(waves)
+        if not waves or any(size < 1 for size in waves):
+            raise ValueError("Wave sizes must be at least 1")
+        if not 0 <= max_failure_rate <= 1:
+            raise ValueError("max_failure_rate must be between 0 and 1")
+        if not os.path.isfile(image):
+            raise ValueError(f"Firmware image not found: {image}")
+        self.fleet = fleet
+        self.image = image
+        self.waves = waves
+        self.concurrency = concurrency
+        self.max_failure_rate = max_failure_rate
+        self.expected_version = expected_version
+        self.health_timeout = health_timeout
+        self.poll_interval = poll_interval
+
+    def plan(self, devices=None):
+        """Split the devices into waves
+
+        Returns:
+            list: One list of device names per wave
+        """
+        names = list(self.fleet.clients if devices is None else devices)
+        plan = []
+        for size in itertools.chain(self.waves, itertools.repeat(self.waves[-1])):
+            if not names:
+                break
+            plan.append(names[:size])
+            names = names[size:]
+        return plan
+
+    def _update(self, client, mapped, slots):
+        """Upload to one device and wait for it to come back healthy
+
+        Returns:
+            dict: Old and new version, or None if the device was current
+        """
+        import time
+
+        before = client.stats()
+        if (
+            self.expected_version is not None
+            and before.get("version") == self.expected_version
+        ):
+            return None
+        started = time.monotonic()
+        with slots:
+            client.update_firmware(mapped)
+
+        deadline = time.monotonic() + self.health_timeout
+        problem = "no answer after update"
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            try:
+                stats = client.stats()
+            except requests.RequestException:
+                continue  # Still rebooting
+            elapsed = time.monotonic() - started
+            if stats.get("uptime", 0) + 2 >= before.get("uptime", 0) + elapsed:
+                problem = "device did not reboot"
+            elif (
+                self.expected_version is not None
+                and stats.get("version") != self.expected_version
+            ):
+                problem = f"version is {stats.get('version')}"
+            else:
+                return {"from": before.get("version"), "to": stats.get("version")}
+        raise RuntimeError(f"Unhealthy after update: {problem}")
+
+    def run(self, devices=None, progress=None):
+        """Roll the firmware out wave by wave
+
+        Args:
+            devices (iterable): Limit the rollout to these device names
+            progress (callable): Called with each wave's FleetReport
+
+        Returns:
+            dict: ``updated`` (device to old/new version), ``failed``
+            (device to error), ``current`` devices already on the expected
+            version, ``skipped`` devices, ``halted`` and per-wave ``waves``
+            summaries. Current devices don't count as attempted updates
+        """
+        import mmap
+        import threading
+
+        result = {
+            "updated": {},
+            "failed": {},
+            "current": [],
+            "skipped": [],
+            "halted": False,
+        }
+        result["waves"] = []
+        slots = threading.BoundedSemaphore(self.concurrency)
+        plan = self.plan(devices)
+        with open(self.image, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for number, wave in enumerate(plan):
+                report = self.fleet.run(self._update, mapped, slots, devices=wave)
+                for name, value in report.values.items():
+                    if value is None:
+                        result["current"].append(name)
+                    else:
+                        result["updated"][name] = value
+                result["failed"].update(report.failures)
+                result["waves"].append(
+                    {"devices": len(wave), "failed": len(report.failures)}
+                )
+                if progress:
+                    progress(report)
+                attempted = len(result["updated"]) + len(result["failed"])
+                failure_rate = len(result["failed"]) / attempted if attempted else 0
+                if failure_rate > self.max_failure_rate:
+                    result["halted"] = True
+                    result["skipped"] = [n for w in plan[number + 1 :] for n in w]
+                    break
+        finally:
+            mapped.close()
+        result["current"].sort()
+        return result
+
+
+# Typed index columns: the stats fields format_stats knows, plus common settings
+_INDEX_COLUMNS = {
+    "stats": [
+        ("battery", "INTEGER"),
+        ("uptime", "INTEGER"),
+        ("ram", "INTEGER"),
+        ("temp", "REAL"),
+        ("wifi_signal", "INTEGER"),
+        ("version", "TEXT"),
+        ("firmware", "TEXT"),
+        ("ip", "TEXT"),
+        ("hostname", "TEXT"),
+        ("ssid", "TEXT"),
+    ],
+    "settings": [
+        ("brightness", "INTEGER"),
+        ("timeFormat", "TEXT"),
+    ],
+}
+
+
+class FleetIndex:
+    """Local SQLite index of fleet stats and settings
+
+    Each device is one row. Common fields get typed columns (see
+    ``_INDEX_COLUMNS``) so they can be filtered and sorted directly; the
+    full payloads are kept as JSON in ``stats`` and ``settings`` for
+    ``json_extract()``. Refreshing only rewrites rows whose payloads
+    changed.
+
+    Args:
+        path (str): Database file (default: ~/.trixctl-index.db), or
+            ":memory:"
+    """
+
+    def __init__(self, path=None):
+        import sqlite3
+        import threading
+        from pathlib import Path
+
+        self.path = str(path or Path.home() / ".trixctl-index.db")
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        typed = ",\n".join(
+            f"    {name} {kind}"
+            for columns in _INDEX_COLUMNS.values()
+            for name, kind in columns
+        )
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS devices (\n"
+                "    name TEXT PRIMARY KEY,\n"
+                "    host TEXT,\n"
+                "    checked REAL,\n"
+                "    changed REAL,\n"
+                "    digest TEXT,\n"
+                f"{typed},\n"
+                "    stats TEXT,\n"
+                "    settings TEXT\n"
+                ")"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the database"""
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+
+    def update(self, name, host, stats, settings):
+        """Store one device's payloads
+
+        Returns:
+            bool: True if the row changed
+        """
+        import hashlib
+        import time
+
+        now = time.time()
+        blob = json.dumps([host, stats, settings], sort_keys=True).encode()
+        digest = hashlib.sha1(blob).hexdigest()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT digest FROM devices WHERE name = ?", (name,)
+            ).fetchone()
+            if row is not None and row["digest"] == digest:
+                self._db.execute(
+                    "UPDATE devices SET checked = ? WHERE name = ?", (now, name)
+                )
+                return False
+            values = {"name": name, "host": host, "checked": now, "changed": now}
+            values["digest"] = digest
+            for source, payload in (("stats", stats), ("settings", settings)):
+                for column, _ in _INDEX_COLUMNS[source]:
+                    values[column] = payload.get(column)
+                values[source] = json.dumps(payload)
+            columns = ", ".join(values)
+            placeholders = ", ".join(f":{column}" for column in values)
+            self._db.execute(
+                f"INSERT OR REPLACE INTO devices ({columns}) VALUES ({placeholders})",
+                values,
+            )
+            return True
+
+    def refresh(self, fleet, max_age=None):
+        """Fetch stats and settings from the fleet into the index
+
+        Args:
+            fleet (Fleet): Devices to index
+            max_age (float): Skip devices checked less than this many
+                seconds ago
+
+        Returns:
+            dict: ``changed``, ``unchanged`` and ``skipped`` device names,
+            and ``failures`` by device
+        """
+        import time
+
+        names = list(fleet.clients)
+        skipped = []
+        if max_age is not None:
+            fresh = {
+                row["name"]
+                for row in self._db.execute(
+                    "SELECT name FROM devices WHERE checked >= ?",
+                    (time.time() - max_age,),
+                )
+            }
+            skipped = [name for name in names if name in fresh]
+            names = [name for name in names if name not in fresh]
+
+        def fetch(client):
+            return client.stats(), client.get_settings()
+
+        summary = {"changed": [], "unchanged": [], "skipped": skipped, "failures": {}}
+        for result in fleet.imap(fetch, devices=names):
+            if not result.ok:
+                summary["failures"][result.device] = result.error
+                continue
+            stats, settings = result.value
+            host = fleet.clients[result.device].host
+            changed = self.update(result.device, host, stats, settings)
+            summary["changed" if changed else "unchanged"].append(result.device)
+        return summary
+
+    def query(self, where=None, params=(), order_by="name"):
+        """Return indexed devices matching an SQL condition
+
+        Args:
+            where (str): SQL condition, e.g. "wifi_signal < -75" or
+                "json_extract(stats, '$.lux') > 100"
+            params (tuple): Values for ``?`` placeholders in ``where``
+            order_by (str): SQL ordering
+
+        Returns:
+            list: One dict per device with every column; ``stats`` and
+            ``settings`` are decoded
+        """
+        devices = []
+        for row in self._select("*", where, params, order_by):
+            device = dict(row)
+            device["stats"] = json.loads(device["stats"])
+            device["settings"] = json.loads(device["settings"])
+            devices.append(device)
+        return devices
+
+    def select(self, where=None, params=()):
+        """Return the names of devices matching an SQL condition"""
+        return [row["name"] for row in self._select("name", where, params, "name")]
+
+    def _select(self, columns, where, params, order_by):
+        import sqlite3
+
+        sql = f"SELECT {columns} FROM devices"
+        if where:
+            sql += f" WHERE ({where})"
+        sql += f" ORDER BY {order_by}"
+        try:
+            return self._db.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise ValueError(f"Invalid query: {e}")
+
+
+def _parse_tags(items):
+    """Parse ``key=value`` strings (or a dict) into a tag dict"""
+    if isinstance(items, dict):
+        return {str(key): str(value) for key, value in items.items()}
+    tags = {}
+    for item in items or ():
+        key, sep, value = item.partition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"Invalid tag '{item}', expected key=value")
+        tags[key.strip()] = value.strip()
+    return tags
+
+
+class Inventory:
+    """Named devices with groups and tags, indexed for fast selection
+
+    Devices are read from ``[device:NAME]`` sections of ``~/.trixctl.conf``::
+
+        [device:lobby-left]
+        host = 192.168.1.129
+        groups = lobby, ground-floor
+        tags = floor=3, role=wall
+
+    Args:
+        devices (dict): Device name to a dict with ``host`` and optional
+            ``groups``, ``tags`` and ``username``
+    """
+
+    def __init__(self, devices=None):
+        self.devices = {}
+        self._groups = collections.defaultdict(set)
+        self._tags = collections.defaultdict(set)
+        for name, device in (devices or {}).items():
+            self.add(name, **device)
+
+    @classmethod
+    def from_config(cls, path=None):
+        """Load the inventory from a trixctl config file
+
+        Args:
+            path (str): Config file path (default: ~/.trixctl.conf)
+
+        Returns:
+            Inventory: Devices from every ``[device:NAME]`` section
+        """
+        import configparser
+        from pathlib import Path
+
+        path = Path(path) if path else Path.home() / ".trixctl.conf"
+        inventory = cls()
+        if not path.exists():
+            return inventory
+
+        parser = configparser.ConfigParser()
+        parser.read(path)
+        for section in parser.sections():
+            if not section.startswith("device:"):
+                continue
+            name = section.split(":", 1)[1].strip()
+            device = parser[section]
+            if not device.get("host"):
+                raise ValueError(f"Device '{name}' in {path} has no host")
+            inventory.add(
+                name,
+                device.get("host"),
+                groups=[g.strip() for g in device.get("groups", "").split(",")],
+                tags=_parse_tags(
+                    t for t in device.get("tags", "").split(",") if t.strip()
+                ),
+                username=device.get("username"),
+                uid=device.get("uid"),
+            )
+        return inventory
+
+    def save(self, path=None):
+        """Write the devices back to a trixctl config file
+
+        Existing ``[device:NAME]`` sections are replaced; every other
+        section, and its comments, is kept as is.
+
+        Args:
+            path (str): Config file path (default: ~/.trixctl.conf)
+
+        Returns:
+            str: Path of the written file
+        """
+        import os
+        import re
+        from pathlib import Path
+
+        path = Path(path) if path else Path.home() / ".trixctl.conf"
+        kept = []
+        if path.exists():
+            in_device = False
+            for line in path.read_text().splitlines():
+                section = re.match(r"\s*\[([^\]]+)\]", line)
+                if section:
+                    in_device = section.group(1).startswith("device:")
+                if not in_device:
+                    kept.append(line)
+        while kept and not kept[-1].strip():
+            kept.pop()
+
+        lines = kept + [""] if kept else []
+        for name, device in self.devices.items():
+            lines.append(f"[device:{name}]")
+            lines.append(f"host = {device['host']}")
+            for key in ("uid", "username"):
+                if device.get(key):
+                    lines.append(f"{key} = {device[key]}")
+            if device["groups"]:
+                lines.append(f"groups = {', '.join(device['groups'])}")
+            if device["tags"]:
+                tags = ", ".join(f"{k}={v}" for k, v in device["tags"].items())
+                lines.append(f"tags = {tags}")
+            lines.append("")
+
+        path.write_text("\n".join(lines))
+        os.chmod(path, 0o600)
+        return str(path)
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __contains__(self, name):
+        return name in self.devices
+
+    def __iter__(self):
+        return iter(self.devices)
+
+    def add(self, name, host, groups=(), tags=None, username=None, uid=None):
+        """Add or replace a device
+
+        Args:
+            name (str): Device name
+            host (str): IP address or hostname
+            groups (iterable): Group names
+            tags (dict or iterable): Tags as a dict or ``key=value`` strings
+            username (str): Auth username for this device
+            uid (str): Device uid reported by ``stats()``
+        """
+        if name in self.devices:
+            self.remove(name)
+        device = {
+            "host": host,
+            "groups": sorted({group for group in groups if group}),
+            "tags": _parse_tags(tags),
+        }
+        if username:
+            device["username"] = username
+        if uid:
+            device["uid"] = uid
+        self.devices[name] = device
+        for group in device["groups"]:
+            self._groups[group].add(name)
+        for tag in device["tags"].items():
+            self._tags[tag].add(name)
+
+    def remove(self, name):
+        """Remove a device"""
+        device = self.devices.pop(name)
+        for group in device["groups"]:
+            self._groups[group].discard(name)
+        for tag in device["tags"].items():
+            self._tags[tag].discard(name)
+
+    def merge_discovered(self, found):
+        """Add or refresh devices found by ``discover()``
+
+        Known devices are matched by uid, then by host, and keep their name,
+        groups and tags; only their host and uid are refreshed. New devices
+        are named after their uid.
+
+        Args:
+            found (dict): uid to device info, as returned by ``discover()``
+
+        Returns:
+            dict: ``added``, ``updated`` and ``unchanged`` device names
+        """
+        by_uid = {d.get("uid"): name for name, d in self.devices.items()}
+        by_host = {d["host"]: name for name, d in self.devices.items()}
+        changes = {"added": [], "updated": [], "unchanged": []}
+        for uid, info in found.items():
+            name = by_uid.get(uid) or by_host.get(info["host"])
+            if name is None:
+                name = uid
+                self.add(name, info["host"], uid=uid)
+                changes["added"].append(name)
+                continue
+            device = self.devices[name]
+            if device["host"] == info["host"] and device.get("uid") == uid:
+                changes["unchanged"].append(name)
+                continue
+            device["host"] = info["host"]
+            device["uid"] = uid
+            changes["updated"].append(name)
+        return changes
+
+    @property
+    def groups(self):
+        """Group names mapped to their device names"""
+        return {group: sorted(names) for group, names in self._groups.items() if names}
+
+    def select(self, groups=None, tags=None):
+        """Return the names of matching devices
+
+        Args:
+            groups (str or iterable): Devices in any of these groups
+            tags (dict or iterable): Devices carrying all of these tags
+
+        Returns:
+            list: Matching device names, sorted; every device when no
+            groups or tags are given
+        """
+        if isinstance(groups, str):
+            groups = [groups]
+        candidates = [self._tags.get(tag, set()) for tag in _parse_tags(tags).items()]
+        if groups:
+            candidates.append(set().union(*(self._groups.get(g, ()) for g in groups)))
+        if not candidates:
+            return sorted(self.devices)
+        candidates.sort(key=len)
+        return sorted(candidates[0].intersection(*candidates[1:]))
+
+    def fleet(self, names=None, password=None, username=None, timeout=5.0, **kwargs):
+        """Create a Fleet for the given devices
+
+        Args:
+            names (iterable): Device names (default: all)
+            password (str): Auth password shared by all devices
+            username (str): Auth username for devices without their own
+            timeout (float): Request timeout in seconds
+
+        Returns:
+            Fleet: Clients keyed by device name
+        """
+        clients = {}
+        for name in self.devices if names is None else names:
+            device = self.devices[name]
+            user = device.get("username") or username
+            auth = (user, password) if user and password else None
+            clients[name] = Awtrix3(device["host"], auth=auth, timeout=timeout)
+        return Fleet(clients, **kwargs)
+
+
+MDNS_SERVICE = "_awtrix._tcp.local"
+
+
+def _mdns_name(name):
+    """Encode a dotted name as DNS labels"""
+    return (
+        b"".join(
+            bytes([len(label)]) + label.encode() for label in name.strip(".").split(".")
+        )
+        + b"\x00"
+    )
+
+
+def _mdns_browse(service=MDNS_SERVICE, timeout=2.0):
+    """Ask for a service over mDNS and collect the addresses that answer
+
+    Sends one PTR query with the unicast-response bit set, so responders
+    reply straight to our socket without joining the multicast group.
+
+    Returns:
+        set: IP addresses of responders announcing the service
+    """
+    import socket
+    import struct
+    import time
+
+    name = _mdns_name(service)
+    # Header: id 0, standard query, one question; PTR, IN with unicast bit
+    query = struct.pack("!6H", 0, 0, 1, 0, 0, 0) + name + struct.pack("!2H", 12, 0x8001)
+
+    addresses = set()
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+        try:
+            sock.sendto(query, ("224.0.0.251", 5353))
+        except OSError:
+            return addresses  # No multicast route
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                packet, (address, _) = sock.recvfrom(9000)
+            except (socket.timeout, OSError):
+                break
+            if len(packet) > 12 and packet[2] & 0x80 and name[:-1] in packet:
+                addresses.add(address)
+    return addresses
+
+
+def _local_network():
+    """Guess the /24 network of the default interface"""
+    import socket
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        # Connecting a UDP socket sends nothing but picks the outgoing address
+        sock.connect(("10.255.255.255", 1))
+        address = sock.getsockname()[0]
+    return f"{address.rsplit('.', 1)[0]}.0/24"
+
+
+def _is_awtrix_stats(stats):
+    """Tell whether a stats payload comes from an Awtrix3 device"""
+    return (
+        isinstance(stats, dict)
+        and isinstance(stats.get("uid"), str)
+        and "version" in stats
+    )
+
+
+def discover(
+    network=None,
+    hosts=(),
+    port=80,
+    mdns=True,
+    connect_timeout=0.3,
+    read_timeout=2.0,
+    max_workers=128,
+):
+    """Find Awtrix3 devices on the network
+
+    Every address in ``network`` (plus any ``hosts`` and devices answering
+    mDNS) is probed with ``stats()`` concurrently. Most addresses of a /24
+    don't answer at all, so the short connect timeout bounds the scan to
+    a few seconds. Devices are identified by the uid in their stats, so a
+    device reachable under several addresses is reported once.
+
+    Args:
+        network (str): CIDR range to scan, e.g. "192.168.1.0/24"
+        hosts (iterable): Extra addresses to probe, optionally with ports
+        port (int): HTTP port for addresses from ``network`` and mDNS
+        mdns (bool or float): Also browse mDNS; a number sets how long to
+            listen in seconds (default 2)
+        connect_timeout (float): Seconds to wait for a TCP connection
+        read_timeout (float): Seconds to wait for the stats response
+        max_workers (int): Maximum concurrent probes
+
+    Returns:
+        dict: uid to ``host``, ``version`` and the full ``stats``
+    """
+    import ipaddress
+
+    def with_port(address):
+        return address if port == 80 else f"{address}:{port}"
+
+    targets = dict.fromkeys(hosts)
+    if network:
+        hosts_in_range = ipaddress.ip_network(network, strict=False).hosts()
+        targets.update(dict.fromkeys(with_port(str(a)) for a in hosts_in_range))
+    if mdns:
+        listen = 2.0 if mdns is True else mdns
+        targets.update(
+            dict.fromkeys(with_port(a) for a in _mdns_browse(timeout=listen))
+        )
+
+    found = {}
+    if not targets:
+        return found
+    fleet = Fleet.from_hosts(
+        list(targets),
+        max_workers=min(max_workers, len(targets)),
+        timeout=(connect_timeout, read_timeout),
+    )
+    with fleet:
+        for result in fleet.imap("stats"):
+            if not result.ok or not _is_awtrix_stats(result.value):
+                continue
+            uid = result.value["uid"]
+            found.setdefault(
+                uid,
+                {
+                    "host": result.device,
+                    "version": result.value.get("version"),
+                    "stats": result.value,
+                },
+            )
+    return dict(sorted(found.items()))
+
+
+def _add_target_arguments(parser):
+    """Add the inventory targeting options to a trixctl parser"""
+    parser.add_argument(
+        "--group",
+        action="append",
+        help="Run on every inventory device in this group (repeatable)",
+    )
+    parser.add_argument(
+        "--tag",
+        action="append",
+        metavar="KEY=VALUE",
+        help="Only run on inventory devices with this tag (repeatable)",
+    )
+    parser.add_argument(
+        "--where",
+        metavar="SQL",
+        help="Only run on devices matching this condition in the local index",
+    )
+
+
+def _add_discover_parser(subparsers):
+    """Add the discover command to a trixctl parser"""
+    discover_parser = subparsers.add_parser(
+        "discover", help="Find devices on the network"
+    )
+    discover_parser.add_argument(
+        "network", nargs="?", help="CIDR range to scan (default: local /24)"
+    )
+    discover_parser.add_argument(
+        "--timeout", type=float, default=0.3, help="Connect timeout in seconds"
+    )
+    discover_parser.add_argument(
+        "--no-mdns", action="store_true", help="Don't browse mDNS announcements"
+    )
+    discover_parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Add or refresh found devices in ~/.trixctl.conf",
+    )
+
+
+def _run_discover(args, inventory_path=None):
+    """Run the trixctl discover command
+
+    Returns:
+        int: Exit status, 1 if no device was found
+    """
+    import sys
+
+    network = args.network
+    try:
+        if network is None:
+            network = _local_network()
+        print(f"Scanning {network}...", file=sys.stderr)
+        found = discover(network, mdns=not args.no_mdns, connect_timeout=args.timeout)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if not found:
+        print("No devices found", file=sys.stderr)
+        return 1
+    print(f"{'UID':<20} {'Host':<22} Version")
+    for uid, info in found.items():
+        print(f"{uid:<20} {info['host']:<22} {info['version']}")
+
+    if args.write:
+        inventory = Inventory.from_config(inventory_path)
+        changes = inventory.merge_discovered(found)
+        path = inventory.save(inventory_path)
+        print(
+            f"Inventory {path}: {len(changes['added'])} added, "
+            f"{len(changes['updated'])} updated",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def _add_sync_parser(subparsers):
+    """Add the sync command to a trixctl parser"""
+    sync_parser = subparsers.add_parser(
+        "sync", help="Upload changed files (icons, melodies) to the device"
+    )
+    sync_parser.add_argument("local_dir", help="Local directory to mirror")
+    sync_parser.add_argument(
+        "--remote-dir", default="/", help="Device directory (default: /)"
+    )
+    sync_parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="Delete previously synced device files that are gone locally",
+    )
+    sync_parser.add_argument(
+        "--dry-run", action="store_true", help="Show what would change"
+    )
+
+
+def _add_firmware_parser(subparsers):
+    """Add the firmware command to a trixctl parser"""
+    firmware_parser = subparsers.add_parser(
+        "firmware", help="Roll out a firmware image in waves"
+    )
+    firmware_parser.add_argument("image", help="Firmware image (.bin)")
+    firmware_parser.add_argument(
+        "--waves",
+        default="1,4,16",
+        help="Comma-separated wave sizes; the last repeats (default: 1,4,16)",
+    )
+    firmware_parser.add_argument(
+        "--concurrency", type=int, default=4, help="Simultaneous uploads (default: 4)"
+    )
+    firmware_parser.add_argument(
+        "--max-failure-rate",
+        type=float,
+        default=0.2,
+        help="Halt when this share of devices failed (default: 0.2)",
+    )
+    firmware_parser.add_argument(
+        "--expect-version", help="Version devices must report after updating"
+    )
+    firmware_parser.add_argument(
+        "--health-timeout",
+        type=float,
+        default=120.0,
+        help="Seconds to wait for each device to come back (default: 120)",
+    )
+
+
+def _run_rollout(args, fleet):
+    """Run the trixctl firmware command on a fleet
+
+    Returns:
+        int: Exit status, 1 if any device failed
+    """
+    import sys
+
+    try:
+        rollout = FirmwareRollout(
+            fleet,
+            args.image,
+            waves=[int(size) for size in args.waves.split(",")],
+            concurrency=args.concurrency,
+            max_failure_rate=args.max_failure_rate,
+            expected_version=args.expect_version,
+            health_timeout=args.health_timeout,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    plan = rollout.plan()
+    print(f"Rolling out {args.image} to {len(fleet)} devices in {len(plan)} waves")
+
+    def progress(report):
+        for result in sorted(report, key=lambda result: result.device):
+            host = fleet.clients[result.device].host
+            if result.ok and result.value is None:
+                print(f"== {result.device} ({host}) ==\nAlready up to date")
+            elif result.ok:
+                versions = f"{result.value['from']} -> {result.value['to']}"
+                print(f"== {result.device} ({host}) ==\nUpdated {versions}")
+            else:
+                print(
+                    f"== {result.device} ({host}) ==\nError: {result.error}",
+                    file=sys.stderr,
+                )
+
+    result = rollout.run(progress=progress)
+    if result["halted"]:
+        print(
+            f"Rollout halted after {len(result['failed'])} failures, "
+            f"{len(result['skipped'])} devices not updated",
+            file=sys.stderr,
+        )
+    return 1 if result["failed"] else 0
+
+
+def _add_query_parser(subparsers):
+    """Add the query command to a trixctl parser"""
+    query_parser = subparsers.add_parser(
+        "query", help="Query the local index of device stats and settings"
+    )
+    query_parser.add_argument(
+        "where", nargs="?", help='SQL condition, e.g. "wifi_signal < -75"'
+    )
+    query_parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Refresh the index from the inventory devices first",
+    )
+    query_parser.add_argument(
+        "--max-age",
+        type=float,
+        help="With --refresh, skip devices checked within this many seconds",
+    )
+    query_parser.add_argument(
+        "--columns",
+        default="name,host,version,wifi_signal,brightness",
+        help="Comma-separated columns to show",
+    )
+
+
+def _run_query(args, password=None, username=None):
+    """Run the trixctl query command
+
+    Returns:
+        int: Exit status, 1 on errors
+    """
+    import sys
+
+    columns = [column.strip() for column in args.columns.split(",")]
+    with FleetIndex() as index:
+        if args.refresh:
+            inventory = Inventory.from_config()
+            names = inventory.select(groups=args.group, tags=args.tag)
+            with inventory.fleet(names, password=password, username=username) as fleet:
+                summary = index.refresh(fleet, max_age=args.max_age)
+            print(
+                f"Indexed {len(summary['changed'])} changed, "
+                f"{len(summary['unchanged'])} unchanged, "
+                f"{len(summary['failures'])} failed",
+                file=sys.stderr,
+            )
+        try:
+            devices = index.query(args.where)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    rows = [columns] + [
+        [
+            "" if device.get(column) is None else str(device.get(column))
+            for column in columns
+        ]
+        for device in devices
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+        )
+    return 0
+
+
+def _add_health_parser(subparsers):
+    """Add the health command to a trixctl parser"""
+    health_parser = subparsers.add_parser(
+        "health", help="Probe devices and report latency and health"
+    )
+    health_parser.add_argument(
+        "--rounds", type=int, default=3, help="Number of checks (default: 3)"
+    )
+    health_parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Seconds between checks (default: 5)",
+    )
+    health_parser.add_argument(
+        "--degraded-ms",
+        type=float,
+        default=500.0,
+        help="p95 latency above which a device is degraded (default: 500)",
+    )
+    health_parser.add_argument(
+        "--worst", type=int, default=5, help="Worst devices to list (default: 5)"
+    )
+
+
+def _run_health(args, fleet):
+    """Run the trixctl health command on a fleet
+
+    Returns:
+        int: Exit status, 1 if any device is down
+    """
+    checker = HealthChecker(fleet, degraded_ms=args.degraded_ms)
+    checker.run(rounds=args.rounds, interval=args.interval)
+    report = checker.report(worst=args.worst)
+
+    def ms(value):
+        return "-" if value is None else f"{value:.1f} ms"
+
+    counts = report["counts"]
+    print(
+        f"Devices: {counts.get('healthy', 0)} healthy, "
+        f"{counts.get('degraded', 0)} degraded, {counts.get('down', 0)} down"
+    )
+    latency = report["latency_ms"]
+    print(
+        f"Latency: p50 {ms(latency['p50'])}  p95 {ms(latency['p95'])}  "
+        f"p99 {ms(latency['p99'])}"
+    )
+    print("Worst:")
+    rows = [["device", "host", "status", "p95", "p99", "failures", "error"]]
+    for device in report["worst"]:
+        rows.append(
+            [
+                device["device"],
+                fleet.clients[device["device"]].host,
+                device["status"],
+                ms(device["p95"]),
+                ms(device["p99"]),
+                f"{device['failures']}/{device['checks']}",
+                device["last_error"] or "",
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print(
+            "  "
+            + "  ".join(
+                value.ljust(width) for value, width in zip(row, widths)
+            ).rstrip()
+        )
+    return 1 if counts.get("down") else 0
+
+
+def _add_exporter_parser(subparsers):
+    """Add the exporter command to a trixctl parser"""
+    exporter_parser = subparsers.add_parser(
+        "exporter", help="Poll device stats and serve them to Prometheus"
+    )
+    exporter_parser.add_argument(
+        "--port", type=int, default=9877, help="HTTP port (default: 9877)"
+    )
+    exporter_parser.add_argument(
+        "--interval",
+        type=float,
+        default=15.0,
+        help="Seconds between polls (default: 15)",
+    )
+    exporter_parser.add_argument(
+        "--capacity",
+        type=int,
+        default=720,
+        help="Samples kept per metric and device (default: 720)",
+    )
+    exporter_parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Also store samples in ~/.trixctl-metrics.db for stats --history",
+    )
+
+
+def _run_exporter(args, fleet):
+    """Run the trixctl exporter command on a fleet until interrupted
+
+    Returns:
+        int: Exit status
+    """
+    import sys
+
+    store = MetricStore(raw_interval=args.interval) if args.record else None
+    poller = StatsPoller(fleet, capacity=args.capacity, store=store)
+    server = poller.serve(port=args.port)
+    url = f"http://localhost:{server.server_port}/metrics"
+    print(f"Serving {len(fleet)} devices at {url}", file=sys.stderr)
+    try:
+        poller.run(interval=args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        if store is not None:
+            store.close()
+    return 0
 
-    def custom_app(self, name, text, **kwargs):
-        """Create/update a custom app"""
-        data = {"text": text, **kwargs}
-        response = requests.post(
-            f"{self.base_url}/custom", params={"name": name}, json=data, auth=self.auth
-        )
-        response.raise_for_status()
-        # API returns plain text "OK", not JSON
-        try:
-            return response.json() if response.text.strip() else None
-        except json.JSONDecodeError:
-            return {"status": response.text.strip()} if response.text.strip() else None
 
-    def play_sound(self, sound_name):
-        """Play a sound by name"""
-        data = {"sound": sound_name}
-        response = requests.post(f"{self.base_url}/sound", json=data, auth=self.auth)
-        response.raise_for_status()
-        return response.json() if response.text else None
+def _parse_duration(text):
+    """Parse a duration like "90s", "30m", "12h", "7d" or "2w" into seconds"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    try:
+        if text[-1:] in units:
+            return float(text[:-1]) * units[text[-1]]
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid duration: {text}")
 
-    def delete_app(self, name):
-        """Delete a custom app by name"""
-        if not name or not isinstance(name, str):
-            raise ValueError("App name must be a non-empty string")
-        response = requests.post(
-            f"{self.base_url}/custom", params={"name": name}, auth=self.auth
-        )
-        response.raise_for_status()
-        # API returns plain text "OK", not JSON
-        try:
-            return response.json() if response.text.strip() else None
-        except json.JSONDecodeError:
-            return {"status": response.text.strip()} if response.text.strip() else None
 
-    def list_apps(self):
-        """Get list of apps currently in the loop"""
-        response = requests.get(f"{self.base_url}/loop", auth=self.auth)
-        response.raise_for_status()
-        return response.json()
+def _run_history(args, devices):
+    """Print stored stats history for ``stats --history``
 
-    def get_settings(self):
-        """Get current device settings for backup"""
-        response = requests.get(f"{self.base_url}/settings", auth=self.auth)
-        response.raise_for_status()
-        return response.json()
+    Args:
+        args: Parsed arguments with ``history`` and ``metric``
+        devices (dict): Device name to host
 
-    def backup_settings(self, filepath=None):
-        """Backup device settings to JSON file
+    Returns:
+        int: Exit status, 1 if nothing was stored for any device
+    """
+    import sys
+    import time
 
-        Args:
-            filepath (str): Path to save backup file. If None, returns settings dict.
+    try:
+        span = _parse_duration(args.history)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    blocks = "▁▂▃▄▅▆▇█"
+    end = time.time()
+    found = False
+    with MetricStore() as store:
+        tier = store.tier_for(end - span, end)
+        for name, host in devices.items():
+            metrics = args.metric.split(",") if args.metric else store.metrics(name)
+            lines = []
+            for metric in metrics:
+                points = store.query(name, metric, end - span, end, tier=tier)["points"]
+                if not points:
+                    continue
+                count = sum(point["count"] for point in points)
+                average = sum(point["avg"] * point["count"] for point in points) / count
+                series = downsample_minmax([point["avg"] for point in points], 48)
+                spark = "".join(blocks[h] for h in scale_to_height(series, height=7))
+                lines.append(
+                    [
+                        metric,
+                        f"min {min(point['min'] for point in points):g}",
+                        f"avg {average:.4g}",
+                        f"max {max(point['max'] for point in points):g}",
+                        spark,
+                    ]
+                )
+            print(f"== {name} ({host}) ==")
+            if not lines:
+                print("No history stored")
+                continue
+            found = True
+            widths = [max(len(line[i]) for line in lines) for i in range(4)]
+            for line in lines:
+                print(
+                    "  ".join(value.ljust(width) for value, width in zip(line, widths))
+                    + "  "
+                    + line[4]
+                )
+    if not found:
+        print(
+            "Error: No history stored; record it with trixctl exporter --record",
+            file=sys.stderr,
+        )
+    return 0 if found else 1
 
-        Returns:
-            dict: Settings data if filepath is None
-            str: Filepath where backup was saved if filepath provided
-        """
-        import json
-        from datetime import datetime
 
-        settings = self.get_settings()
+def _add_watch_parser(subparsers):
+    """Add the watch command to a trixctl parser"""
+    watch_parser = subparsers.add_parser(
+        "watch", help="Print stats and app loop changes as they happen"
+    )
+    watch_parser.add_argument(
+        "--endpoint",
+        action="append",
+        choices=sorted(AdaptivePoller.ENDPOINTS),
+        help="Endpoint to watch (repeatable, default: all)",
+    )
+    watch_parser.add_argument(
+        "--min-interval",
+        type=float,
+        help="Seconds between polls right after a change",
+    )
+    watch_parser.add_argument(
+        "--max-interval",
+        type=float,
+        help="Longest seconds between polls while nothing changes",
+    )
 
-        # Add metadata to backup
-        backup_data = {
-            "backup_timestamp": datetime.now().isoformat(),
-            "backup_version": "1.0",
-            "device_stats": self.stats(),
-            "settings": settings,
-        }
 
-        if filepath is None:
-            return backup_data
+def _run_watch(args, fleet):
+    """Run the trixctl watch command on a fleet until interrupted
 
-        with open(filepath, "w") as f:
-            json.dump(backup_data, f, indent=2)
+    Returns:
+        int: Exit status
+    """
+    import time
 
-        return filepath
+    endpoints = {}
+    for endpoint in args.endpoint or AdaptivePoller.ENDPOINTS:
+        low, high = AdaptivePoller.ENDPOINTS[endpoint]
+        endpoints[endpoint] = (args.min_interval or low, args.max_interval or high)
+    poller = AdaptivePoller(fleet, endpoints)
 
-    def restore_settings(self, backup_data):
-        """Restore device settings from backup data
+    def show(event):
+        changed = event.value
+        if isinstance(event.previous, dict) and isinstance(event.value, dict):
+            volatile = AdaptivePoller.VOLATILE.get(event.endpoint, ())
+            changed = {
+                key: value
+                for key, value in event.value.items()
+                if event.previous.get(key) != value and key not in volatile
+            }
+        print(
+            f"{time.strftime('%H:%M:%S')} {event.device} {event.endpoint} "
+            f"{json.dumps(changed)}",
+            flush=True,
+        )
 
-        Args:
-            backup_data (dict or str): Backup data dict or filepath to backup JSON
+    poller.subscribe(show)
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
 
-        Returns:
-            dict: Result of settings update
-        """
-        import json
 
-        if isinstance(backup_data, str):
-            # Load from file
-            with open(backup_data, "r") as f:
-                backup_data = json.load(f)
+def _add_events_parser(subparsers):
+    """Add the events command to a trixctl parser"""
+    events_parser = subparsers.add_parser(
+        "events", help="Print button presses and app changes pushed by devices"
+    )
+    events_parser.add_argument(
+        "--port",
+        type=int,
+        default=8377,
+        help="Port for device HTTP callbacks (default: 8377)",
+    )
+    events_parser.add_argument("--mqtt", metavar="BROKER", help="Also use MQTT")
+    events_parser.add_argument(
+        "--mqtt-port", type=int, default=1883, help="Broker port (default: 1883)"
+    )
+    events_parser.add_argument(
+        "--kind",
+        action="append",
+        choices=["button", "app", "stats"],
+        help="Event kind to print (repeatable, default: all)",
+    )
 
-        if "settings" not in backup_data:
-            raise ValueError("Invalid backup data: missing 'settings' key")
 
-        settings = backup_data["settings"]
+def _run_events(args, fleet):
+    """Run the trixctl events command until interrupted
 
-        # Apply settings using existing configure_settings method if available
-        if hasattr(self, "configure_settings"):
-            return self.configure_settings(settings)
-        else:
-            # Fall back to direct API call
-            response = requests.post(
-                f"{self.base_url}/settings", json=settings, auth=self.auth
-            )
-            response.raise_for_status()
-            return response.json() if response.text else None
+    Returns:
+        int: Exit status, 1 if the receivers can't start
+    """
+    import sys
+    import threading
+    import time
 
-    def configure_settings(self, settings):
-        """Configure device settings with custom JSON payload"""
-        if not isinstance(settings, dict):
-            raise ValueError("Settings must be a dictionary")
-        response = requests.post(
-            f"{self.base_url}/settings", json=settings, auth=self.auth
+    def show(event):
+        value = event.value
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        print(
+            f"{time.strftime('%H:%M:%S')} {event.device} {event.kind} "
+            f"{event.name} {value}",
+            flush=True,
         )
-        response.raise_for_status()
-        return response.json() if response.text else None
 
-    def _build_time_format(self, format_24hr, show_seconds):
-        """Build time format string based on options"""
-        if format_24hr:
-            return "HH:mm:ss" if show_seconds else "HH:mm"
-        else:
-            return "hh:mm:ss A" if show_seconds else "hh:mm A"
+    with EventBus(fleet.clients) as bus:
+        for kind in args.kind or [None]:
+            bus.on(show, kind=kind)
+        receivers = []
+        try:
+            receivers.append(HttpEventReceiver(bus, port=args.port))
+            print(f"Listening for callbacks on port {args.port}", file=sys.stderr)
+            if args.mqtt:
+                receivers.append(MqttEventReceiver(bus, args.mqtt, port=args.mqtt_port))
+                print(f"Subscribed to {args.mqtt}", file=sys.stderr)
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        except (ImportError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            for receiver in receivers:
+                receiver.close()
+    return 0
 
-    def clock_profile(self, format_24hr=True, show_seconds=False, minimal=True):
-        """Configure device as a minimal clock with specified time format
 
-        Args:
-            format_24hr (bool): Use 24-hour format if True, 12-hour if False
-            show_seconds (bool): Include seconds in time display
-            minimal (bool): Strip down to minimal clock settings
+def _target_call(args):
+    """Map a parsed trixctl command to an Awtrix3 method call"""
+    import json
 
-        Returns:
-            dict: Result of settings update
-        """
-        time_format = self._build_time_format(format_24hr, show_seconds)
+    command = args.command
+    if command == "notify":
+        return "notify", (args.text,), {}
+    if command == "stats":
+        return "stats", (), {}
+    if command == "power":
+        return "power", (args.state == "on",), {}
+    if command == "sound":
+        return "play_sound", (args.name,), {}
+    if command == "app":
+        if args.app_command == "create":
+            return "custom_app", (args.name, args.text), {}
+        if args.app_command == "delete":
+            return "delete_app", (args.name,), {}
+        if args.app_command == "list":
+            return "list_apps", (), {}
+        raise ValueError("app command requires a subcommand (create, delete, list)")
+    if command == "clock":
+        return (
+            "clock_profile",
+            (),
+            {
+                "format_24hr": not getattr(args, "12hr", False),
+                "show_seconds": args.seconds,
+                "minimal": not args.full,
+            },
+        )
+    if command == "settings":
+        return "configure_settings", (json.loads(args.payload),), {}
+    if command == "sync":
+        sync = FileSync(args.local_dir, args.remote_dir, delete=args.delete)
+        return sync.sync, (), {"dry_run": args.dry_run}
+    raise ValueError(f"{command} does not support --group/--tag")
 
-        settings = {
-            "timeFormat": time_format,
-            "brightness": DEFAULT_BRIGHTNESS,
-        }
 
-        if minimal:
-            # Minimal clock settings - strip down non-essential features
-            settings.update(
-                {
-                    "showWeekday": False,
-                    "showDate": False,
-                    "showTemp": False,
-                    "showHumidity": False,
-                    "showBattery": False,
-                    "showSeconds": show_seconds,
-                    "autoTransition": True,
-                    "transitionTime": 250,
-                    "matrixLayout": 1,
-                    "colorCorrection": [255, 255, 255],
-                    "gamma": 2.8,
-                    "upperCaseLetters": False,
-                    "scrollSpeed": 100,
-                    "scrollPause": 3000,
-                    "textOffset": 6,
-                    "centerText": True,
-                }
+def _read_archive_backup(path, device=None):
+    """Read one device's backup from a fleet archive for trixctl restore"""
+    backup = FleetBackup(path)
+    if device is None:
+        if len(backup.devices) != 1:
+            raise ValueError(
+                f"{path} holds {len(backup.devices)} devices, choose one with --device"
             )
+        device = backup.devices[0]
+    return backup.read(device)
 
-        return self.configure_settings(settings)
 
+def _run_fleet_backup(args, fleet):
+    """Run trixctl backup/restore for a fleet archive
 
-def format_stats(stats_data):
-    """Format stats data in a minimal aligned table style"""
-    import json
+    Returns:
+        int: Exit status, 1 if any device failed
+    """
+    import sys
 
-    if not stats_data or not isinstance(stats_data, dict):
-        return json.dumps(stats_data, indent=2)
+    if args.command == "backup":
+        print(f"Backing up {len(fleet)} devices...")
+        backup = FleetBackup.create(fleet, args.filename)
+        for name in backup.devices:
+            entry = backup.index["devices"][name]
+            digest = entry["settings"][:12]
+            print(f"== {name} ({entry['host']}) ==\nBacked up (settings {digest})")
+        failures = backup.failures
+        print(f"Backup saved to: {backup.path}")
+    else:
+        try:
+            backup = FleetBackup(args.filename)
+        except (OSError, ValueError) as e:  # Includes zipfile.BadZipFile
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        names = list(fleet.clients)
+        missing = [name for name in names if name not in backup.index["devices"]]
+        print(f"Backup created: {backup.index['backup_timestamp']}")
+        print(f"Devices to restore: {len(names) - len(missing)} of {len(names)}")
+        if args.dry_run:
+            print("\n--- DRY RUN MODE - Nothing will be changed ---")
+            for name in names:
+                if name in missing:
+                    print(f"  - {name}: no backup")
+                else:
+                    settings = backup.read(name)["settings"]
+                    print(f"  - {name}: {len(settings)} settings")
+            return 0
+        if not args.force:
+            confirm = input(f"\nRestore settings to {len(names)} devices? (y/N): ")
+            if confirm.lower() not in ["y", "yes"]:
+                print("Restore cancelled")
+                return 0
+        report = backup.restore(fleet)
+        for name in names:
+            if name not in report.failures:
+                print(f"== {name} ({fleet.clients[name].host}) ==\nRestored")
+        failures = report.failures
 
-    # Collect table rows
-    rows = []
-    known_fields = set()
+    for name, error in failures.items():
+        host = fleet.clients[name].host
+        print(f"== {name} ({host}) ==\nError: {error}", file=sys.stderr)
+    if failures:
+        print(f"{len(failures)} of {len(fleet)} devices failed", file=sys.stderr)
+    return 1 if failures else 0
 
-    # Define field mappings and formatting
-    field_mappings = [
-        ("battery", "Battery", lambda x: f"{x}%"),
-        ("uptime", "Uptime", lambda x: format_uptime(x)),
-        ("ram", "Memory", lambda x: f"{x} KB"),
-        ("temp", "Temperature", lambda x: f"{x}°C"),
-        ("wifi_signal", "WiFi Signal", lambda x: f"{x} dBm"),
-        ("version", "Version", lambda x: str(x)),
-        ("firmware", "Firmware", lambda x: str(x)),
-        ("ip", "IP Address", lambda x: str(x)),
-        ("hostname", "Hostname", lambda x: str(x)),
-        ("ssid", "WiFi SSID", lambda x: str(x)),
-    ]
 
-    # Process known fields
-    for field_key, field_label, formatter in field_mappings:
-        if field_key in stats_data:
-            try:
-                formatted_value = formatter(stats_data[field_key])
-                rows.append((field_label, formatted_value))
-                known_fields.add(field_key)
-            except (TypeError, ValueError):
-                # Fallback to string representation if formatting fails
-                rows.append((field_label, str(stats_data[field_key])))
-                known_fields.add(field_key)
+# Commands that run on a whole Fleet rather than one method per device
+_FLEET_COMMANDS = (
+    "backup",
+    "restore",
+    "firmware",
+    "health",
+    "exporter",
+    "watch",
+    "events",
+)
 
-    if not rows:
-        return json.dumps(stats_data, indent=2)
 
-    # Calculate column widths
-    max_label_width = max(len(row[0]) for row in rows)
+def _run_targeted(args, password=None, username=None, inventory=None):
+    """Run a trixctl command on every inventory device matching --group/--tag
 
-    # Build table
-    output = []
-    output.append(f"{'Metric':<{max_label_width}} Value")
-    output.append("-" * (max_label_width + 20))
+    Devices are called concurrently through a Fleet and each one's output
+    is printed under its name.
 
-    for label, value in rows:
-        output.append(f"{label:<{max_label_width}} {value}")
+    Returns:
+        int: Exit status, 1 if no device matched or any device failed
+    """
+    import json
+    import sys
 
-    # Handle any unknown fields
-    additional_data = {k: v for k, v in stats_data.items() if k not in known_fields}
-    if additional_data:
-        output.append("")
-        output.append("Additional Data:")
-        output.append(json.dumps(additional_data, indent=2))
+    try:
+        if inventory is None:
+            inventory = Inventory.from_config()
+        names = inventory.select(groups=args.group, tags=args.tag)
+        if args.where:
+            with FleetIndex() as index:
+                matched = set(index.select(args.where))
+            names = [name for name in names if name in matched]
+        if args.command not in _FLEET_COMMANDS:
+            method, call_args, call_kwargs = _target_call(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not names:
+        print(
+            "Error: No inventory devices match --group/--tag/--where", file=sys.stderr
+        )
+        return 1
+    if args.command == "stats" and args.history:
+        hosts = {name: inventory.devices[name]["host"] for name in names}
+        return _run_history(args, hosts)
 
-    return "\n".join(output)
+    with inventory.fleet(names, password=password, username=username) as fleet:
+        if args.command in ("backup", "restore"):
+            return _run_fleet_backup(args, fleet)
+        if args.command == "firmware":
+            return _run_rollout(args, fleet)
+        if args.command == "health":
+            return _run_health(args, fleet)
+        if args.command == "exporter":
+            return _run_exporter(args, fleet)
+        if args.command == "watch":
+            return _run_watch(args, fleet)
+        if args.command == "events":
+            return _run_events(args, fleet)
+        report = fleet.run(method, *call_args, **call_kwargs)
 
+    results = {result.device: result for result in report}
+    for name in names:
+        result = results[name]
+        host = inventory.devices[name]["host"]
+        if not result.ok:
+            print(f"== {name} ({host}) ==\nError: {result.error}", file=sys.stderr)
+            continue
+        print(f"== {name} ({host}) ==")
+        if args.command == "stats":
+            print(format_stats(result.value))
+        elif result.value:
+            print(json.dumps(result.value, indent=2))
 
-def format_uptime(uptime_seconds):
-    """Format uptime seconds into human-readable format"""
-    if isinstance(uptime_seconds, (int, float)):
-        hours = int(uptime_seconds // 3600)
-        minutes = int((uptime_seconds % 3600) // 60)
-        if hours > 0:
-            return f"{hours}h {minutes}m"
-        else:
-            return f"{minutes}m"
-    else:
-        return str(uptime_seconds)
+    failed = len(report.failures)
+    if failed:
+        print(f"{failed} of {len(names)} devices failed", file=sys.stderr)
+    return 1 if failed else 0
 
 
 def generate_config():
@@ -315,9 +6518,17 @@ username =
 # Default output format (json is currently the only option)
 output_format = json
 
+# Inventory: one [device:NAME] section per device, targeted with
+# --group and --tag to run a command on many devices at once
+# [device:lobby-left]
+# host = 192.168.1.129
+# groups = lobby
+# tags = floor=3, role=wall
+
 # Example usage:
 # trixctl notify "Let's go Mets!"    # Uses config file host
 # trixctl --host 192.168.1.128 notify "Let's go Mets!"  # Override with CLI arg
+# trixctl --group lobby --tag floor=3 notify "Let's go Mets!"
 """
 
     config_path = Path.home() / ".trixctl.conf"
@@ -371,6 +6582,7 @@ def main():
     import json
     import os
     import sys
+    import zipfile
 
     parser = argparse.ArgumentParser(
         description="Control Awtrix3 device",
@@ -390,6 +6602,7 @@ def main():
         action="store_true",
         help="Generate a config file template at ~/.trixctl.conf",
     )
+    _add_target_arguments(parser)
 
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
@@ -398,7 +6611,15 @@ def main():
     notify_parser.add_argument("text", help="Notification text")
 
     # stats command
-    subparsers.add_parser("stats", help="Get device statistics")
+    stats_parser = subparsers.add_parser("stats", help="Get device statistics")
+    stats_parser.add_argument(
+        "--history",
+        metavar="DURATION",
+        help="Show stored history instead, e.g. 24h or 7d",
+    )
+    stats_parser.add_argument(
+        "--metric", help="Comma-separated metrics for --history (default: all)"
+    )
 
     # power command
     power_parser = subparsers.add_parser("power", help="Power control")
@@ -426,14 +6647,35 @@ def main():
 
     # backup command
     backup_parser = subparsers.add_parser("backup", help="Backup device settings")
-    backup_parser.add_argument("filename", help="Backup filename (JSON)")
+    backup_parser.add_argument(
+        "filename", help="Backup filename (JSON, or a zip archive for --group/--tag)"
+    )
     backup_parser.add_argument(
         "--include-stats", action="store_true", help="Include device stats in backup"
     )
+    backup_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append a diff to an incremental backup chain",
+    )
+    backup_parser.add_argument(
+        "--rebase-every",
+        type=int,
+        default=7,
+        help="Start a new full snapshot every N incremental backups (default: 7)",
+    )
 
     # restore command
     restore_parser = subparsers.add_parser("restore", help="Restore device settings")
-    restore_parser.add_argument("filename", help="Backup filename (JSON)")
+    restore_parser.add_argument(
+        "filename", help="Backup filename (JSON or fleet zip archive)"
+    )
+    restore_parser.add_argument(
+        "--device", help="Device to restore from a fleet archive"
+    )
+    restore_parser.add_argument(
+        "--at", help="Restore an incremental chain as of this ISO date/time"
+    )
     restore_parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -443,6 +6685,30 @@ def main():
         "--force", action="store_true", help="Restore without confirmation"
     )
 
+    # discover command
+    _add_discover_parser(subparsers)
+
+    # sync command
+    _add_sync_parser(subparsers)
+
+    # firmware command
+    _add_firmware_parser(subparsers)
+
+    # query command
+    _add_query_parser(subparsers)
+
+    # health command
+    _add_health_parser(subparsers)
+
+    # exporter command
+    _add_exporter_parser(subparsers)
+
+    # watch command
+    _add_watch_parser(subparsers)
+
+    # events command
+    _add_events_parser(subparsers)
+
     args = parser.parse_args()
 
     # Handle generate-config command
@@ -454,6 +6720,9 @@ def main():
         parser.print_help()
         sys.exit(1)
 
+    if args.command == "discover":
+        sys.exit(_run_discover(args))
+
     # Load config file
     config = load_config()
 
@@ -462,6 +6731,13 @@ def main():
     username = args.username or config.get("username")
     password = args.password or os.environ.get("TRIXCTL_PASSWORD")
 
+    if args.command == "query":
+        sys.exit(_run_query(args, password=password, username=username))
+
+    # Run on inventory devices when targeting a group, tags or an index query
+    if args.group or args.tag or args.where:
+        sys.exit(_run_targeted(args, password=password, username=username))
+
     if not host:
         print(
             "Error: No host specified. Use --host, set it in config file, "
@@ -482,6 +6758,8 @@ def main():
         if args.command == "notify":
             result = client.notify(args.text)
         elif args.command == "stats":
+            if args.history:
+                sys.exit(_run_history(args, {host: host}))
             result = client.stats()
         elif args.command == "power":
             result = client.power(args.state == "on")
@@ -500,11 +6778,35 @@ def main():
                 result = client.list_apps()
         elif args.command == "sound":
             result = client.play_sound(args.name)
+        elif args.command == "firmware":
+            with Fleet.from_hosts([host], auth=auth) as fleet:
+                sys.exit(_run_rollout(args, fleet))
+        elif args.command == "health":
+            with Fleet.from_hosts([host], auth=auth) as fleet:
+                sys.exit(_run_health(args, fleet))
+        elif args.command == "exporter":
+            with Fleet.from_hosts([host], auth=auth) as fleet:
+                sys.exit(_run_exporter(args, fleet))
+        elif args.command == "watch":
+            with Fleet.from_hosts([host], auth=auth) as fleet:
+                sys.exit(_run_watch(args, fleet))
+        elif args.command == "events":
+            with Fleet.from_hosts([host], auth=auth) as fleet:
+                sys.exit(_run_events(args, fleet))
+        elif args.command == "sync":
+            sync = FileSync(args.local_dir, args.remote_dir, delete=args.delete)
+            result = sync.sync(client, dry_run=args.dry_run)
         elif args.command == "backup":
             # Create backup
             print("Creating backup of device settings...")
-            backup_file = client.backup_settings(args.filename)
-            print(f"Backup saved to: {backup_file}")
+            if args.incremental:
+                chain = IncrementalBackup(args.filename, args.rebase_every)
+                kind = chain.append(client.backup_settings())
+                backup_file = args.filename
+                print(f"Backup saved to: {backup_file} ({kind} #{len(chain)})")
+            else:
+                backup_file = client.backup_settings(args.filename)
+                print(f"Backup saved to: {backup_file}")
 
             if args.include_stats:
                 print("Backup includes device statistics")
@@ -514,8 +6816,17 @@ def main():
         elif args.command == "restore":
             # Load and validate backup file
             try:
-                with open(args.filename, "r") as f:
-                    backup_data = json.load(f)
+                if zipfile.is_zipfile(args.filename):
+                    backup_data = _read_archive_backup(args.filename, args.device)
+                elif IncrementalBackup.is_chain(args.filename):
+                    backup_data = IncrementalBackup(args.filename).at(args.at)
+                    if backup_data is None:
+                        raise ValueError(f"No backup at or before {args.at}")
+                else:
+                    with open(args.filename, "r") as f:
+                        backup_data = json.load(f)
+                    if args.at:
+                        raise ValueError("--at needs an incremental backup chain")
             except FileNotFoundError:
                 print(
                     f"Error: Backup file '{args.filename}' not found", file=sys.stderr
@@ -524,6 +6835,9 @@ def main():
             except json.JSONDecodeError as e:
                 print(f"Error: Invalid JSON in backup file - {e}", file=sys.stderr)
                 sys.exit(1)
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
 
             # Show what will be restored
             if "backup_timestamp" in backup_data:
@@ -0,0 +1,134 @@
+"""Shared fixtures: stand-in Awtrix3 devices served on loopback ports."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeDevice:
+    """Minimal HTTP stand-in for an Awtrix3 device.
+
+    Serves ``/api/stats``, ``/api/settings`` and ``/api/loop`` from
+    attributes, keeps an in-memory filesystem behind ``/list`` and ``/edit``,
+    records every request, and accepts other POSTs and DELETEs with an empty
+    body. ``delay`` is server processing time; ``latency`` is a round trip
+    split evenly before and after the request is recorded in ``arrivals``.
+    """
+
+    def __init__(self, stats=None, settings=None, apps=None, delay=0.0, latency=0.0):
+        self.stats = stats if stats is not None else {"version": "0.96", "uid": "x"}
+        self.settings = settings if settings is not None else {"BRI": 80}
+        self.apps = apps if apps is not None else {"Time": 0}
+        self.delay = delay
+        self.latency = latency
+        self.arrivals = []
+        self.files = {}
+        self.requests = []
+        self.handlers = {}
+        device = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, content_type="application/json"):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body)
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self):
+                import time
+
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                # Emulate network latency: half on the way in, half back out
+                time.sleep(device.latency / 2)
+                device.arrivals.append(time.perf_counter())
+                device.requests.append((self.command, self.path, body))
+                if device.delay or device.latency:
+                    time.sleep(device.delay + device.latency / 2)
+                path = self.path.split("?", 1)[0]
+                handler = device.handlers.get((self.command, path))
+                if handler is not None:
+                    return self._reply(*handler(self, body))
+                if self.command == "GET" and path == "/api/stats":
+                    return self._reply(200, device.stats)
+                if self.command == "GET" and path == "/api/settings":
+                    return self._reply(200, device.settings)
+                if self.command == "GET" and path == "/api/loop":
+                    return self._reply(200, device.apps)
+                if path in ("/list", "/edit"):
+                    return self._reply(
+                        *device._filesystem(self.command, self.path, body)
+                    )
+                if self.command in ("POST", "DELETE"):
+                    return self._reply(200, "", "text/plain")
+                return self._reply(404, "Not found", "text/plain")
+
+            do_GET = do_POST = do_DELETE = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.host = f"127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+
+    def _filesystem(self, command, url, body):
+        """Handle the device's file list, upload and delete endpoints"""
+        import re
+        from urllib.parse import parse_qs, urlparse
+
+        if command == "GET":
+            directory = parse_qs(urlparse(url).query).get("dir", ["/"])[0]
+            prefix = directory.rstrip("/") + "/"
+            entries = {}
+            for name, data in self.files.items():
+                if name.startswith(prefix):
+                    child, _, rest = name[len(prefix) :].partition("/")
+                    if rest:
+                        entries[child] = {"type": "dir", "name": child}
+                    else:
+                        entries[child] = {
+                            "type": "file",
+                            "name": child,
+                            "size": len(data),
+                        }
+            return 200, list(entries.values())
+        if command == "POST":
+            match = re.search(rb'filename="([^"]+)"\r\n[^\r]*\r\n\r\n', body)
+            end = body.rindex(b"\r\n--")
+            self.files[match.group(1).decode()] = body[match.end() : end]
+            return 200, "", "text/plain"
+        path = parse_qs(body.decode())["path"][0]
+        if self.files.pop(path, None) is None:
+            return 404, "Not found", "text/plain"
+        return 200, "", "text/plain"
+
+    def close(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_devices():
+    """Create stand-in devices on demand; all are stopped after the test."""
+    devices = []
+
+    def make(count=1, **kwargs):
+        new = [FakeDevice(**kwargs) for _ in range(count)]
+        devices.extend(new)
+        return new
+
+    yield make
+    for device in devices:
+        device.close()
@@ -0,0 +1,179 @@
+"""Tests for change-rate-adaptive polling."""
+
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import AdaptivePoller, Awtrix3, ChangeEvent, Fleet, main
+
+
+@pytest.fixture
+def fleet(fake_devices):
+    """Two stand-in devices with an uptime that changes on every poll."""
+    devices = fake_devices(2)
+    for device in devices:
+        device.stats = {"bat": 90, "app": "Time", "uptime": 100}
+        device.apps = {"Time": 0, "Date": 1}
+    clients = {f"clock{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+    with Fleet(clients) as fleet:
+        fleet.devices = devices
+        yield fleet
+
+
+def tick(device):
+    """Advance a stand-in device's uptime without any real change."""
+    device.stats["uptime"] += 5
+
+
+class TestAdaptivePoller:
+    """Test interval adaptation and change events."""
+
+    def test_interval_backs_off_while_unchanged(self, fleet):
+        """Test that unchanged bodies double the interval up to the maximum."""
+        poller = AdaptivePoller(fleet, {"stats": (5, 30)})
+        intervals = []
+        now = 0.0
+        for _ in range(5):
+            poller.poll(now)
+            intervals.append(poller.intervals()["clock0"]["stats"])
+            now = poller.next_due()
+            for device in fleet.devices:
+                tick(device)
+
+        assert intervals == [5, 10, 20, 30, 30]
+
+    def test_change_resets_interval(self, fleet):
+        """Test that a change drops back to the minimum interval."""
+        poller = AdaptivePoller(fleet, {"stats": (5, 60)})
+        for now in (0, 5, 15):
+            poller.poll(now)
+        assert poller.intervals()["clock0"]["stats"] == 20
+
+        fleet.devices[0].stats["app"] = "Date"
+        events = poller.poll(35)
+
+        assert poller.intervals() == {"clock0": {"stats": 5}, "clock1": {"stats": 40}}
+        assert events == [
+            ChangeEvent(
+                "clock0",
+                "stats",
+                {"bat": 90, "app": "Date", "uptime": 100},
+                {"bat": 90, "app": "Time", "uptime": 100},
+            )
+        ]
+
+    def test_only_due_endpoints_are_requested(self, fleet):
+        """Test that polling before the due time sends nothing."""
+        poller = AdaptivePoller(fleet, {"stats": (5, 60), "loop": (10, 60)})
+        poller.poll(0)
+        poller.poll(6)
+
+        paths = [path for _, path, _ in fleet.devices[0].requests]
+        assert paths == ["/api/stats", "/api/loop", "/api/stats"]
+
+    def test_subscribers_are_filtered(self, fleet):
+        """Test subscribing by endpoint and device, and unsubscribing."""
+        poller = AdaptivePoller(fleet)
+        everything, loop_changes, clock1 = [], [], []
+        poller.subscribe(everything.append)
+        poller.subscribe(loop_changes.append, endpoint="loop")
+        unsubscribe = poller.subscribe(clock1.append, device="clock1")
+
+        poller.poll(0)
+        unsubscribe()
+        fleet.devices[1].apps = {"Time": 0}
+        poller.poll(100)
+
+        assert len(everything) == 5
+        assert sorted(e.device for e in loop_changes) == ["clock0", "clock1", "clock1"]
+        assert {(e.device, e.endpoint) for e in clock1} == {
+            ("clock1", "stats"),
+            ("clock1", "loop"),
+        }
+
+    def test_failing_subscriber_does_not_stop_polling(self, fleet):
+        """Test that a subscriber exception becomes a warning."""
+        poller = AdaptivePoller(fleet, {"stats": (5, 60)})
+        poller.subscribe(lambda event: 1 / 0)
+        received = []
+        poller.subscribe(received.append)
+
+        with pytest.warns(RuntimeWarning):
+            poller.poll(0)
+        assert len(received) == 2
+
+    def test_unreachable_device_backs_off(self, fleet):
+        """Test that failures lengthen the interval without events."""
+        fleet.devices[1].close()
+        poller = AdaptivePoller(fleet, {"stats": (5, 60)})
+
+        events = poller.poll(0)
+
+        assert [event.device for event in events] == ["clock0"]
+        assert poller.intervals()["clock1"]["stats"] == 10
+
+    @pytest.mark.parametrize("typed", [False, True])
+    def test_garbage_body_is_a_failed_poll(self, fleet, typed):
+        """Test that an unparseable body backs off without an event."""
+        device = fleet.devices[0]
+        poller = AdaptivePoller(fleet, {"stats": (5, 60)}, typed=typed)
+        poller.poll(0)
+        device.handlers[("GET", "/api/stats")] = lambda handler, body: (
+            200,
+            "<html>rebooting</html>",
+            "text/html",
+        )
+
+        assert poller.poll(5) == []
+        assert poller.intervals()["clock0"]["stats"] == 10
+
+        del device.handlers[("GET", "/api/stats")]
+        tick(device)
+        assert poller.poll(15) == []  # Same stats as before the garbage
+        assert poller.intervals()["clock0"]["stats"] == 20
+
+    def test_run_until_stopped(self, fleet):
+        """Test the scheduling loop."""
+        poller = AdaptivePoller(fleet, {"stats": (0.01, 0.05)})
+        seen = []
+
+        def stop_after_change(event):
+            seen.append(event)
+            if event.previous is not None:
+                poller.stop()
+
+        poller.subscribe(stop_after_change, device="clock0")
+        fleet.devices[0].handlers[("GET", "/api/stats")] = lambda handler, body: (
+            200,
+            {"polls": len(fleet.devices[0].requests)},
+        )
+        poller.run()
+
+        assert len(seen) == 2
+
+
+class TestWatchCommand:
+    """Test trixctl watch."""
+
+    def test_watch_prints_changes(self, fleet, capsys):
+        """Test printing the changed keys of each event."""
+        device = fleet.devices[0]
+
+        def run(poller):
+            poller.poll(0)
+            device.stats.update(app="Date", uptime=200)
+            poller.poll(10)
+            raise KeyboardInterrupt
+
+        argv = ["trixctl", "--host", device.host, "watch", "--endpoint", "stats"]
+        with patch("sys.argv", argv), patch("awtrix3.load_config", return_value={}):
+            with patch.object(AdaptivePoller, "run", run):
+                with pytest.raises(SystemExit) as exc:
+                    main()
+
+        assert exc.value.code == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].endswith(
+            f'{device.host} stats {{"bat": 90, "app": "Time", "uptime": 100}}'
+        )
+        assert lines[1].endswith(f'{device.host} stats {{"app": "Date"}}')
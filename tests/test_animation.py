@@ -0,0 +1,186 @@
+"""Tests for animated GIF conversion and upload."""
+
+import io
+from unittest.mock import Mock, patch
+
+import pytest
+
+from awtrix3 import (
+    Animation,
+    choose_upload_strategy,
+    convert_gif,
+    upload_animation,
+)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_gif(colors, size=(64, 16), duration=100):
+    """Encode solid-color frames as an animated GIF."""
+    frames = [Image.new("RGB", size, color) for color in colors]
+    output = io.BytesIO()
+    frames[0].save(
+        output,
+        format="GIF",
+        save_all=True,
+        append_images=frames[1:],
+        duration=duration,
+        loop=0,
+    )
+    output.seek(0)
+    return output
+
+
+def solid(color, count=256):
+    """Build a packed RGB frame of one color."""
+    return bytes(color) * count
+
+
+class TestConvertGif:
+    """Test decoding, resizing and deduplicating frames."""
+
+    def test_resizes_frames(self):
+        """Test that frames are scaled to the matrix size."""
+        animation = convert_gif(make_gif([(255, 0, 0), (0, 0, 255)]), workers=0)
+
+        assert (animation.width, animation.height) == (32, 8)
+        assert len(animation) == 2
+        assert animation.pixels(0) == [0xFF0000] * 256
+        assert animation.pixels(1) == [0x0000FF] * 256
+
+    def test_merges_identical_frames(self):
+        """Test that frames identical after resizing become one longer frame."""
+        frames = [Image.new("RGB", (128, 32), (200, 0, 0)) for _ in range(2)]
+        frames[1].putpixel((0, 0), (201, 0, 0))
+        frames.append(Image.new("RGB", (128, 32), (0, 0, 255)))
+        gif = io.BytesIO()
+        frames[0].save(
+            gif, format="GIF", save_all=True, append_images=frames[1:], duration=100
+        )
+        gif.seek(0)
+
+        animation = convert_gif(gif, workers=0)
+
+        assert len(animation) == 2
+        assert animation.source_frames == 3
+        assert animation.durations == [200, 100]
+
+    def test_merges_near_identical_frames(self):
+        """Test the near-duplicate threshold."""
+        gif = make_gif([(200, 0, 0), (204, 0, 0), (0, 0, 255)])
+
+        assert len(convert_gif(gif, workers=0)) == 3
+        gif.seek(0)
+        assert len(convert_gif(gif, threshold=2, workers=0)) == 2
+
+    def test_small_memory_budget_and_progress(self):
+        """Test converting one frame per batch and reporting progress."""
+        progress = Mock()
+        gif = make_gif([(255, 0, 0), (0, 255, 0), (0, 0, 255)])
+
+        animation = convert_gif(gif, workers=0, memory_budget=1, progress=progress)
+
+        assert len(animation) == 3
+        assert [c.args for c in progress.call_args_list] == [(1, 3), (2, 3), (3, 3)]
+
+    def test_process_pool_matches_in_process(self):
+        """Test that pooled conversion produces the same frames."""
+        colors = [(i * 40, 0, 255 - i * 40) for i in range(6)]
+        expected = convert_gif(make_gif(colors), workers=0)
+        pooled = convert_gif(make_gif(colors), workers=2)
+
+        assert pooled.frames == expected.frames
+        assert pooled.durations == expected.durations
+
+    def test_small_gif_skips_the_pool(self):
+        """Test that a short GIF converts without starting processes."""
+        with patch("concurrent.futures.ProcessPoolExecutor") as pool:
+            animation = convert_gif(make_gif([(255, 0, 0), (0, 0, 255)]))
+
+        pool.assert_not_called()
+        assert len(animation) == 2
+
+    def test_shared_executor_is_reused(self):
+        """Test converting in a caller's pool and leaving it running."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        colors = [(i * 40, 0, 255 - i * 40) for i in range(6)]
+        expected = convert_gif(make_gif(colors), workers=0)
+        with ProcessPoolExecutor(2) as executor:
+            first = convert_gif(make_gif(colors), executor=executor)
+            second = convert_gif(make_gif(colors), executor=executor)
+
+        assert first.frames == second.frames == expected.frames
+
+
+class TestAnimation:
+    """Test the Animation container."""
+
+    def test_to_gif_round_trip(self):
+        """Test re-encoding an animation as a GIF."""
+        animation = Animation(
+            32, 8, [solid((255, 0, 0)), solid((0, 0, 255))], [200, 100]
+        )
+        converted = convert_gif(io.BytesIO(animation.to_gif()), workers=0)
+
+        assert converted.frames == animation.frames
+        assert converted.durations == [200, 100]
+
+    def test_empty_animation_has_no_gif(self):
+        """Test that encoding an animation without frames is rejected."""
+        with pytest.raises(ValueError, match="no frames"):
+            Animation(32, 8, [], []).to_gif()
+
+    def test_durations_must_match_frames(self):
+        """Test that frames and durations line up."""
+        with pytest.raises(ValueError, match="Every frame needs a duration"):
+            Animation(32, 8, [solid((0, 0, 0))], [])
+
+
+class TestUploadAnimation:
+    """Test choosing and running an upload strategy."""
+
+    def make_animation(self, count):
+        """Build an animation of distinct frames."""
+        frames = [solid((i, 0, 0)) for i in range(count)]
+        return Animation(32, 8, frames, [10] * count)
+
+    def test_short_animation_uploads_file(self):
+        """Test that a short animation is uploaded so it keeps looping."""
+        assert choose_upload_strategy(self.make_animation(3)) == "file"
+
+    def test_long_animation_uploads_file(self):
+        """Test that long animations are uploaded once."""
+        assert choose_upload_strategy(self.make_animation(20)) == "file"
+
+    def test_oversized_animation_streams(self):
+        """Test that a GIF too large for the device is streamed instead."""
+        animation = self.make_animation(20)
+        assert choose_upload_strategy(animation, max_file_bytes=10) == "stream"
+
+    def test_stream_strategy(self):
+        """Test streaming frames through a custom app."""
+        client = Mock()
+        progress = Mock()
+        with patch("time.sleep"):
+            result = upload_animation(
+                client, self.make_animation(2), "anim", "stream", progress
+            )
+
+        # Streaming plays the frames once and then returns
+        assert result == {"strategy": "stream", "frames": 2}
+        assert client.custom_app.call_count == 2
+        draw = client.custom_app.call_args.kwargs["draw"][0]["db"]
+        assert draw[:4] == [0, 0, 32, 8]
+        progress.assert_called_with(2, 2)
+
+    def test_file_strategy(self):
+        """Test uploading a GIF and pointing a custom app at it."""
+        client = Mock()
+        result = upload_animation(client, self.make_animation(20), "anim", "file")
+
+        assert result == {"strategy": "file", "path": "/ICONS/anim.gif"}
+        data, path = client.upload_file.call_args.args
+        assert data.startswith(b"GIF")
+        assert path == "/ICONS/anim.gif"
+        client.custom_app.assert_called_once_with("anim", "", icon="anim")
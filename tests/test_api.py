@@ -429,3 +429,45 @@ class TestBackupRestoreAPI:
             ValueError, match="Invalid backup data: missing 'settings' key"
         ):
             self.client.restore_settings(invalid_data)
+
+
+class TestUploadFile:
+    """Test streaming file uploads to the device filesystem."""
+
+    def setup_method(self):
+        """Set up test client."""
+        self.client = Awtrix3("192.168.1.128")
+
+    @patch("awtrix3.requests.post")
+    def test_upload_bytes(self, mock_post):
+        """Test that the body is a streamed multipart form with a length."""
+        mock_post.return_value = Mock(text="")
+
+        self.client.upload_file(b"GIF89a", "/ICONS/mets.gif")
+
+        args, kwargs = mock_post.call_args
+        assert args == ("http://192.168.1.128/edit",)
+        body = b"".join(bytes(chunk) for chunk in kwargs["data"])
+        assert len(body) == len(kwargs["data"])
+        assert b'filename="/ICONS/mets.gif"' in body
+        assert b"GIF89a" in body
+        assert kwargs["headers"]["Content-Type"].startswith("multipart/form-data")
+
+    @patch("awtrix3.requests.post")
+    def test_upload_from_disk(self, mock_post, tmp_path):
+        """Test streaming a local file."""
+        mock_post.return_value = Mock(text="")
+        path = tmp_path / "song.txt"
+        path.write_bytes(b"x" * 200000)
+
+        self.client.upload_file(str(path), "/MELODIES/song.txt")
+
+        body = mock_post.call_args.kwargs["data"]
+        chunks = [bytes(chunk) for chunk in body]
+        assert len(chunks) > 3
+        assert sum(map(len, chunks)) == len(body)
+
+    def test_relative_remote_path_raises_error(self):
+        """Test that remote paths must be absolute."""
+        with pytest.raises(ValueError, match="absolute path"):
+            self.client.upload_file(b"", "ICONS/mets.gif")
@@ -79,6 +79,21 @@ class TestAwtrix3Methods:
         )
         assert result == {"status": "ok"}
 
+    @patch("awtrix3.requests.post")
+    def test_notify_with_extra_keys(self, mock_post):
+        """Test notification with extra payload keys."""
+        mock_response = Mock()
+        mock_response.text = ""
+        mock_post.return_value = mock_response
+
+        self.client.notify("Let's go Mets!", duration=8, icon=2099)
+
+        mock_post.assert_called_once_with(
+            "http://192.168.1.128/api/notify",
+            json={"text": "Let's go Mets!", "duration": 8, "icon": 2099},
+            auth=None,
+        )
+
     @patch("awtrix3.requests.get")
     def test_stats_success(self, mock_get):
         """Test successful stats retrieval."""
@@ -0,0 +1,287 @@
+"""Tests for fleet backup archives and incremental backups."""
+
+import json
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import Awtrix3, Fleet, FleetBackup, IncrementalBackup, main
+
+SHARED = {"BRI": 80, "ATIME": 7, "TFORMAT": "%H:%M"}
+
+
+@pytest.fixture
+def fleet(fake_devices):
+    """A fleet of three stand-in devices, two sharing the same settings."""
+    devices = fake_devices(2, settings=dict(SHARED)) + fake_devices(
+        1, settings={"BRI": 20}
+    )
+    for number, device in enumerate(devices):
+        device.stats = {"uid": f"awtrix_{number}", "version": "0.96"}
+    clients = {f"clock{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+    with Fleet(clients) as fleet:
+        fleet.devices = devices
+        yield fleet
+
+
+class TestFleetBackup:
+    """Test creating and reading fleet backup archives."""
+
+    def test_create_stores_identical_settings_once(self, fleet, tmp_path):
+        """Test content-addressed dedup of settings blobs."""
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+
+        entries = backup.index["devices"]
+        assert backup.devices == ["clock0", "clock1", "clock2"]
+        assert entries["clock0"]["settings"] == entries["clock1"]["settings"]
+        assert entries["clock0"]["settings"] != entries["clock2"]["settings"]
+        with zipfile.ZipFile(backup.path) as archive:
+            blobs = [n for n in archive.namelist() if n.startswith("blobs/")]
+        assert len(blobs) == 5  # Two settings blobs and three stats blobs
+
+    def test_read_matches_backup_settings_format(self, fleet, tmp_path):
+        """Test that one device's entry reads back as a normal backup."""
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+
+        data = FleetBackup(backup.path).read("clock2")
+
+        assert data["backup_version"] == "1.0"
+        assert data["settings"] == {"BRI": 20}
+        assert data["device_stats"]["uid"] == "awtrix_2"
+        assert set(data) == set(fleet.clients["clock2"].backup_settings())
+
+    def test_failed_devices_are_left_out(self, fleet, tmp_path):
+        """Test that an unreachable device doesn't abort the backup."""
+        fleet.clients["gone"] = Awtrix3("127.0.0.1:1")
+
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+
+        assert list(backup.failures) == ["gone"]
+        assert "gone" not in backup.devices
+
+    def test_restore_sends_each_device_its_settings(self, fleet, tmp_path):
+        """Test restoring every device from its own entry."""
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+
+        report = backup.restore(fleet)
+
+        assert report.failures == {}
+        for device, settings in zip(fleet.devices, [SHARED, SHARED, {"BRI": 20}]):
+            method, path, body = device.requests[-1]
+            assert (method, path) == ("POST", "/api/settings")
+            assert json.loads(body) == settings
+
+    def test_restore_device_without_backup_fails(self, fleet, tmp_path):
+        """Test that devices missing from the archive are reported."""
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+        fleet.clients["new"] = Awtrix3(fleet.clients["clock0"].host)
+
+        report = backup.restore(fleet, devices=["clock0", "new"])
+
+        assert list(report.values) == ["clock0"]
+        assert "No backup for device 'new'" in str(report.failures["new"])
+
+    def test_restore_device_with_missing_blob_fails(self, fleet, tmp_path):
+        """Test that a broken archive entry is one device's failure."""
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+        backup.index["devices"]["clock2"]["settings"] = "0" * 64
+
+        report = backup.restore(fleet)
+
+        assert sorted(report.values) == ["clock0", "clock1"]
+        assert isinstance(report.failures["clock2"], ValueError)
+        assert "'clock2'" in str(report.failures["clock2"])
+
+    def test_restore_unknown_device_raises_error(self, fleet, tmp_path):
+        """Test that names outside the fleet are rejected up front."""
+        backup = FleetBackup.create(fleet, tmp_path / "fleet.zip")
+
+        with pytest.raises(ValueError, match="Unknown device: ghost"):
+            backup.restore(fleet, devices=["clock0", "ghost"])
+        assert fleet.devices[0].requests[-1][1] != "/api/settings"
+
+    def test_not_an_archive_raises_error(self, tmp_path):
+        """Test opening a zip file without an index."""
+        path = tmp_path / "other.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("readme.txt", "hi")
+
+        with pytest.raises(ValueError, match="not a fleet backup archive"):
+            FleetBackup(path)
+
+
+class TestFleetBackupCommands:
+    """Test trixctl backup and restore with fleet archives."""
+
+    @pytest.fixture
+    def home(self, tmp_path, monkeypatch, fleet):
+        """Write an inventory of the stand-in devices to a temporary home."""
+        sections = [
+            f"[device:{name}]\nhost = {client.host}\ngroups = lobby\n"
+            for name, client in fleet.clients.items()
+        ]
+        (tmp_path / ".trixctl.conf").write_text("\n".join(sections))
+        monkeypatch.setenv("HOME", str(tmp_path))
+        return tmp_path
+
+    def run(self, *argv):
+        """Run trixctl and return its exit status."""
+        with patch("sys.argv", ["trixctl", *argv]), patch("builtins.print"):
+            with pytest.raises(SystemExit) as exc:
+                main()
+        return exc.value.code
+
+    def test_group_backup_and_restore(self, home, fleet):
+        """Test a round trip through a fleet archive."""
+        path = str(home / "fleet.zip")
+
+        assert self.run("--group", "lobby", "backup", path) == 0
+        assert FleetBackup(path).devices == ["clock0", "clock1", "clock2"]
+
+        assert self.run("--group", "lobby", "restore", path, "--force") == 0
+        assert fleet.devices[2].requests[-1][1] == "/api/settings"
+
+    def test_single_device_restore_from_archive(self, home, fleet):
+        """Test restoring one host from its entry in a fleet archive."""
+        path = str(home / "fleet.zip")
+        self.run("--group", "lobby", "backup", path)
+        host = fleet.clients["clock1"].host
+
+        argv = ["trixctl", "--host", host, "restore", path, "--device", "clock2"]
+
+        with patch("sys.argv", argv + ["--force"]), patch("builtins.print"):
+            main()
+
+        assert json.loads(fleet.devices[1].requests[-1][2]) == {"BRI": 20}
+
+    def test_archive_restore_needs_device(self, home, fleet, capsys):
+        """Test that a multi-device archive needs --device."""
+        path = str(home / "fleet.zip")
+        self.run("--group", "lobby", "backup", path)
+        argv = ["trixctl", "--host", fleet.clients["clock0"].host, "restore", path]
+
+        with patch("sys.argv", argv):
+            with pytest.raises(SystemExit):
+                main()
+
+        assert "choose one with --device" in capsys.readouterr().err
+
+
+def snapshot(timestamp, settings, uptime=0):
+    """Build a backup in the backup_settings() format."""
+    return {
+        "backup_timestamp": timestamp,
+        "backup_version": "1.0",
+        "device_stats": {"version": "0.96", "uptime": uptime},
+        "settings": settings,
+    }
+
+
+class TestIncrementalBackup:
+    """Test incremental backup chains."""
+
+    def test_first_backup_is_base_then_diffs(self, tmp_path):
+        """Test that unchanged settings are stored as small diffs."""
+        settings = {f"KEY{n}": n for n in range(50)}
+        chain = IncrementalBackup(tmp_path / "chain.jsonl")
+
+        kinds = [
+            chain.append(snapshot(f"2025-07-1{day}T03:00:00", settings, uptime=day))
+            for day in range(3)
+        ]
+
+        assert kinds == ["base", "diff", "diff"]
+        lines = (tmp_path / "chain.jsonl").read_text().splitlines()
+        assert len(lines[1]) < len(lines[0]) // 5
+        assert "settings" not in json.loads(lines[1])
+
+    def test_rebase_every(self, tmp_path):
+        """Test that a new base starts after rebase_every backups."""
+        chain = IncrementalBackup(tmp_path / "chain.jsonl", rebase_every=2)
+
+        settings = {f"KEY{n}": n for n in range(50)}
+
+        kinds = [
+            chain.append(snapshot(f"2025-07-1{day}", {**settings, "N": day}))
+            for day in range(5)
+        ]
+
+        assert kinds == ["base", "diff", "base", "diff", "base"]
+
+    def test_large_diff_starts_new_base(self, tmp_path):
+        """Test rebasing when most settings changed."""
+        chain = IncrementalBackup(tmp_path / "chain.jsonl")
+        chain.append(snapshot("2025-07-10", {f"K{n}": 0 for n in range(20)}))
+
+        assert chain.append(
+            snapshot("2025-07-11", {f"K{n}": 1 for n in range(20)})
+        ) == ("base")
+
+    def test_point_in_time_reconstruction(self, tmp_path):
+        """Test rebuilding every backup, including removed keys."""
+        history = [
+            snapshot("2025-07-10T03:00:00", {"BRI": 80, "ATIME": 7}, uptime=1),
+            snapshot("2025-07-11T03:00:00", {"BRI": 60, "ATIME": 7}, uptime=2),
+            snapshot("2025-07-12T03:00:00", {"BRI": 60}, uptime=3),
+            snapshot("2025-07-13T03:00:00", {"BRI": 60, "TEFF": 1}, uptime=4),
+        ]
+        path = tmp_path / "chain.jsonl"
+        writer = IncrementalBackup(path, rebase_every=3)
+        for backup in history:
+            writer.append(backup)
+
+        chain = IncrementalBackup(path)
+        assert chain.timestamps == [b["backup_timestamp"] for b in history]
+        for backup in history:
+            assert chain.at(backup["backup_timestamp"]) == backup
+        assert chain.at() == history[-1]
+
+    def test_at_uses_given_precision(self, tmp_path):
+        """Test selecting by date prefix and by earlier times."""
+        chain = IncrementalBackup(tmp_path / "chain.jsonl")
+        chain.append(snapshot("2025-07-10T03:00:00", {"BRI": 80}))
+        chain.append(snapshot("2025-07-11T03:00:00", {"BRI": 60}))
+
+        assert chain.at("2025-07-11")["settings"] == {"BRI": 60}
+        assert chain.at("2025-07-10T23:59")["settings"] == {"BRI": 80}
+        assert chain.at("2025-07-09") is None
+
+    def test_restore_settings_from_chain(self, tmp_path, fake_devices):
+        """Test restore_settings with a chain file and a point in time."""
+        (device,) = fake_devices(1)
+        client = Awtrix3(device.host)
+        path = str(tmp_path / "chain.jsonl")
+        device.settings = {"BRI": 80}
+        client.backup_settings(path, incremental=True)
+        device.settings = {"BRI": 20}
+        client.backup_settings(path, incremental=True)
+        timestamps = IncrementalBackup(path).timestamps
+
+        client.restore_settings(path, at=timestamps[0])
+        assert json.loads(device.requests[-1][2]) == {"BRI": 80}
+
+        client.restore_settings(path)
+        assert json.loads(device.requests[-1][2]) == {"BRI": 20}
+
+    def test_invalid_rebase_every_raises_error(self, tmp_path):
+        """Test that chains need at least one backup per base."""
+        with pytest.raises(ValueError, match="at least 1"):
+            IncrementalBackup(tmp_path / "chain.jsonl", rebase_every=0)
+
+    def test_incremental_cli_round_trip(self, tmp_path, fake_devices):
+        """Test trixctl backup --incremental and restore --at."""
+        (device,) = fake_devices(1)
+        path = str(tmp_path / "nightly.jsonl")
+        backup = ["trixctl", "--host", device.host, "backup", path, "--incremental"]
+        for brightness in (80, 20):
+            device.settings = {"BRI": brightness}
+            with patch("sys.argv", backup), patch("builtins.print"):
+                main()
+        first = IncrementalBackup(path).timestamps[0]
+
+        restore = ["trixctl", "--host", device.host, "restore", path, "--at", first]
+        with patch("sys.argv", restore + ["--force"]), patch("builtins.print"):
+            main()
+
+        assert json.loads(device.requests[-1][2]) == {"BRI": 80}
@@ -0,0 +1,161 @@
+"""Tests for chart downsampling helpers."""
+
+import math
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import RollingChart, downsample_lttb, downsample_minmax, scale_to_height
+
+
+def sine_series(n):
+    """Build a smooth test series with a single spike."""
+    values = [math.sin(i / 50) * 10 for i in range(n)]
+    values[n // 3] = 100.0
+    return values
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request):
+    """Run a test with and without numpy."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+    else:
+        with patch("awtrix3._import_numpy", return_value=None):
+            yield
+
+
+class TestDownsampleLTTB:
+    """Test Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_output_length_and_endpoints(self, backend):
+        """Test that LTTB keeps first and last samples."""
+        values = sine_series(10000)
+        result = downsample_lttb(values, 16)
+
+        assert len(result) == 16
+        assert result[0] == values[0]
+        assert result[-1] == values[-1]
+
+    def test_preserves_spike(self, backend):
+        """Test that a single spike survives downsampling."""
+        assert 100.0 in downsample_lttb(sine_series(10000), 16)
+
+    def test_short_series_returned_unchanged(self, backend):
+        """Test that short series are not resampled."""
+        assert downsample_lttb([1, 2, 3], 16) == [1.0, 2.0, 3.0]
+
+    def test_backends_agree(self):
+        """Test that the numpy and pure Python paths select the same points."""
+        pytest.importorskip("numpy")
+        values = sine_series(5003)
+        with patch("awtrix3._import_numpy", return_value=None):
+            expected = downsample_lttb(values, 32)
+
+        assert downsample_lttb(values, 32) == pytest.approx(expected)
+
+    def test_too_few_points_raises_error(self):
+        """Test that LTTB rejects fewer than 3 output points."""
+        with pytest.raises(ValueError, match="at least 3 points"):
+            downsample_lttb([1, 2, 3, 4], 2)
+
+
+class TestDownsampleMinMax:
+    """Test min/max bucket downsampling."""
+
+    def test_keeps_min_and_max_in_order(self, backend):
+        """Test that each bucket yields its extremes in time order."""
+        values = [5, 9, 1, 5, 3, 0, 7, 5]
+        assert downsample_minmax(values, 4) == [9.0, 1.0, 0.0, 7.0]
+
+    def test_preserves_spike(self, backend):
+        """Test that a single spike survives downsampling."""
+        result = downsample_minmax(sine_series(10001), 16)
+
+        assert len(result) == 16
+        assert max(result) == 100.0
+
+    def test_backends_agree(self):
+        """Test that the numpy and pure Python paths agree."""
+        pytest.importorskip("numpy")
+        values = sine_series(9999)
+        with patch("awtrix3._import_numpy", return_value=None):
+            expected = downsample_minmax(values, 16)
+
+        assert downsample_minmax(values, 16) == pytest.approx(expected)
+
+
+class TestScaleToHeight:
+    """Test scaling values to pixel heights."""
+
+    def test_scales_to_full_height(self, backend):
+        """Test that the range maps to 0..height."""
+        assert scale_to_height([10, 15, 20], height=8) == [0, 4, 8]
+
+    def test_clamps_to_explicit_bounds(self, backend):
+        """Test clamping values outside explicit bounds."""
+        assert scale_to_height([-5, 50, 200], 8, minimum=0, maximum=100) == [0, 4, 8]
+
+    def test_flat_series(self, backend):
+        """Test scaling a series with no range."""
+        assert scale_to_height([3, 3, 3]) == [0, 0, 0]
+
+    def test_empty_series(self, backend):
+        """Test scaling an empty series."""
+        assert scale_to_height([]) == []
+
+
+class TestRollingChart:
+    """Test incremental rolling charts."""
+
+    def test_append_builds_buckets(self, backend):
+        """Test bucketing appended samples."""
+        chart = RollingChart(points=4, bucket_size=2)
+        for value in [1, 3, 5, 7, 9]:
+            chart.append(value)
+
+        assert chart.values() == [2.0, 6.0, 9.0]
+        assert len(chart) == 3
+
+    def test_rolls_oldest_bucket_out(self, backend):
+        """Test that only the newest buckets are kept."""
+        chart = RollingChart(points=3, bucket_size=1, aggregate="last")
+        chart.extend(range(10))
+
+        assert chart.values() == [7.0, 8.0, 9.0]
+
+    def test_extend_matches_append(self, backend):
+        """Test that bulk and single appends produce the same chart."""
+        values = sine_series(1001)
+        bulk = RollingChart(points=16, bucket_size=25, aggregate="max")
+        single = RollingChart(points=16, bucket_size=25, aggregate="max")
+
+        bulk.append(values[0])
+        bulk.extend(values[1:600])
+        bulk.extend(values[600:])
+        for value in values:
+            single.append(value)
+
+        assert bulk.values() == pytest.approx(single.values())
+
+    def test_partial_bucket_replaces_oldest(self, backend):
+        """Test that a partial bucket is shown in place of the oldest one."""
+        chart = RollingChart(points=2, bucket_size=2, aggregate="min")
+        chart.extend([4, 3, 2, 1, 0])
+
+        assert chart.values() == [1.0, 0.0]
+        assert len(chart) == len(chart.values()) == 2
+
+    def test_bar_and_line_payloads(self, backend):
+        """Test building bar and line payload fragments."""
+        chart = RollingChart(points=3)
+        chart.extend([0, 4, 8])
+
+        assert chart.bar() == {"bar": [0, 4, 8]}
+        assert chart.line(autoscale=False) == {"line": [0, 4, 8], "autoscale": False}
+
+    def test_invalid_aggregate_raises_error(self):
+        """Test that unknown aggregates are rejected."""
+        with pytest.raises(ValueError, match="Aggregate must be one of"):
+            RollingChart(aggregate="median")
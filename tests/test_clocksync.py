@@ -0,0 +1,90 @@
+"""Tests for synchronized actions across devices."""
+
+import pytest
+
+from awtrix3 import Awtrix3, ClockSync, Fleet
+
+
+@pytest.fixture
+def arena(fake_devices):
+    """Three stand-in devices with very different network latency."""
+    devices = [fake_devices(1, latency=latency)[0] for latency in (0.0, 0.12, 0.3)]
+    clients = {f"clock{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+    with Fleet(clients) as fleet:
+        yield fleet, devices
+
+
+def spread_ms(devices):
+    """Spread between the last request arrivals of the devices."""
+    arrivals = [device.arrivals[-1] for device in devices]
+    return (max(arrivals) - min(arrivals)) * 1000
+
+
+class TestClockSync:
+    """Test delay estimation and synchronized sends."""
+
+    def test_calibrate_estimates_one_way_delay(self, arena):
+        """Test that delays follow each device's round trip."""
+        fleet, _ = arena
+
+        estimates = ClockSync(fleet, probes=3).calibrate()
+
+        assert estimates["clock0"]["delay_ms"] < 40
+        assert estimates["clock2"]["delay_ms"] == pytest.approx(150, abs=40)
+        assert estimates["clock2"]["rtt_ms"] == pytest.approx(
+            2 * estimates["clock2"]["delay_ms"]
+        )
+
+    def test_fire_lands_together(self, arena):
+        """Test that synced sends arrive much closer than plain fan-out."""
+        fleet, devices = arena
+        fleet.run("notify", "Hi")
+        unsynced = spread_ms(devices)
+
+        sync = ClockSync(fleet, probes=3)
+        result = sync.notify("Hi")
+
+        assert result["failures"] == {}
+        assert unsynced > 100
+        assert spread_ms(devices) < 50
+        assert result["estimated_skew_ms"] < 50
+        assert set(result["landed_ms"]) == {"clock0", "clock1", "clock2"}
+
+    def test_small_fleet_pool_does_not_delay_sends(self, fake_devices):
+        """Test that sends don't wait for the fleet's own worker pool."""
+        devices = [fake_devices(1, latency=latency)[0] for latency in (0.0, 0.3)]
+        clients = {f"clock{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+        with Fleet(clients, max_workers=1) as fleet:
+            sync = ClockSync(fleet, probes=2)
+            sync.calibrate()
+            result = sync.notify("Hi")
+
+        assert result["failures"] == {}
+        assert spread_ms(devices) < 50
+        assert all(0 <= late < 20 for late in result["send_error_ms"].values())
+
+    def test_fire_calibrates_on_first_use(self, arena):
+        """Test that an uncalibrated sync probes before sending."""
+        fleet, devices = arena
+        sync = ClockSync(fleet, probes=2)
+
+        sync.play_sound("goal")
+
+        assert [path for _, path, _ in devices[0].requests] == [
+            "/api/loop",
+            "/api/loop",
+            "/api/sound",
+        ]
+        assert sync.estimates()["clock0"]["rtt_ms"] is not None
+
+    def test_unreachable_device_is_reported(self, arena):
+        """Test that a dead device fails without holding others back."""
+        fleet, _ = arena
+        fleet.clients["gone"] = Awtrix3("127.0.0.1:1")
+        sync = ClockSync(fleet, probes=1)
+
+        result = sync.custom_app("score", "NYM 3")
+
+        assert "gone" in result["failures"]
+        assert sync.estimates()["gone"]["delay_ms"] is None
+        assert len(result["values"]) == 3
@@ -0,0 +1,138 @@
+"""Tests for color conversion and correction."""
+
+import time
+from array import array
+
+import pytest
+
+from awtrix3 import (
+    Bitmap,
+    ColorCorrector,
+    hex_to_rgb,
+    int_to_rgb,
+    rgb565_to_rgb,
+    rgb_to_hex,
+    rgb_to_int,
+    rgb_to_rgb565,
+)
+
+FRAME = [(i * 2654435761) & 0xFFFFFF for i in range(32 * 8)]
+
+
+class TestColorConversions:
+    """Test hex, RGB888 and RGB565 conversions."""
+
+    def test_hex_round_trip(self):
+        """Test converting hex to RGB and back."""
+        assert hex_to_rgb("#FF6600") == (255, 102, 0)
+        assert hex_to_rgb("002D72") == (0, 45, 114)
+        assert rgb_to_hex((255, 102, 0)) == "#FF6600"
+
+    def test_invalid_hex_raises_error(self):
+        """Test that short hex strings are rejected."""
+        with pytest.raises(ValueError, match="Invalid color: '#FFF'"):
+            hex_to_rgb("#FFF")
+
+    def test_int_round_trip(self):
+        """Test converting RGB to RGB888 ints and back."""
+        assert rgb_to_int((255, 102, 0)) == 0xFF6600
+        assert int_to_rgb(0x002D72) == (0, 45, 114)
+
+    def test_rgb565(self):
+        """Test RGB565 packing and expansion."""
+        assert rgb_to_rgb565((255, 255, 255)) == 0xFFFF
+        assert rgb_to_rgb565((255, 0, 0)) == 0xF800
+        assert rgb565_to_rgb(0xFFFF) == (255, 255, 255)
+        assert rgb565_to_rgb(0x07E0) == (0, 255, 0)
+
+
+class TestColorCorrector:
+    """Test lookup-table based color correction."""
+
+    def test_identity_correction(self):
+        """Test that gamma 1 with full correction changes nothing."""
+        corrector = ColorCorrector(gamma=1.0)
+        assert corrector.apply(FRAME) == FRAME
+
+    def test_gamma_darkens_midtones(self):
+        """Test that gamma 2.8 maps mid gray well below half."""
+        corrector = ColorCorrector(gamma=2.8)
+        assert corrector.apply_color("#808080") == rgb_to_int((37, 37, 37))
+        assert corrector.apply_color(0xFFFFFF) == 0xFFFFFF
+        assert corrector.apply_color((0, 0, 0)) == 0
+
+    def test_per_channel_correction_and_brightness(self):
+        """Test channel scaling and brightness folding into the tables."""
+        corrector = ColorCorrector(gamma=1.0, correction=(255, 128, 0), brightness=128)
+        assert int_to_rgb(corrector.apply_color("#FFFFFF")) == (128, 64, 0)
+
+    def test_frame_matches_per_pixel_correction(self):
+        """Test that whole-frame correction matches per-pixel lookups."""
+        corrector = ColorCorrector(gamma=2.2, correction=(255, 200, 150))
+        expected = [corrector.apply_color(pixel) for pixel in FRAME]
+
+        assert corrector.apply(FRAME) == expected
+        assert corrector.apply(array("I", FRAME)).tolist() == expected
+
+    def test_apply_packed_bytes(self):
+        """Test correcting packed RGB bytes."""
+        corrector = ColorCorrector(gamma=1.0, correction=(255, 0, 255))
+        assert corrector.apply(bytes([10, 20, 30, 40, 50, 60])) == bytearray(
+            [10, 0, 30, 40, 0, 60]
+        )
+
+    def test_apply_packed_bytes_wrong_length(self):
+        """Test that partial pixels are rejected."""
+        with pytest.raises(ValueError, match="multiple of 3"):
+            ColorCorrector().apply(b"\x00\x01")
+
+    def test_apply_numpy_frames(self):
+        """Test correcting numpy int and uint8 RGB frames."""
+        np = pytest.importorskip("numpy")
+        corrector = ColorCorrector(gamma=2.2, correction=(255, 200, 150))
+        expected = corrector.apply(FRAME)
+
+        ints = corrector.apply(np.array(FRAME, dtype=np.uint32))
+        rgb = np.array([int_to_rgb(pixel) for pixel in FRAME], dtype=np.uint8)
+        channels = corrector.apply(rgb.reshape(8, 32, 3))
+
+        assert ints.tolist() == expected
+        assert [rgb_to_int(p) for p in channels.reshape(-1, 3).tolist()] == expected
+
+    def test_apply_bitmap(self):
+        """Test correcting a rendered bitmap."""
+        corrector = ColorCorrector(gamma=1.0, correction=(0, 255, 255))
+        bitmap = corrector.apply_bitmap(Bitmap(2, 1, [0xFFFFFF, 0]))
+
+        assert bitmap.pixels == (0x00FFFF, 0)
+
+    def test_from_settings(self):
+        """Test reading gamma and color correction from settings."""
+        corrector = ColorCorrector.from_settings(
+            {"gamma": 2.0, "colorCorrection": [255, 128, 64]}
+        )
+
+        assert corrector.gamma == 2.0
+        assert corrector.correction == (255, 128, 64)
+
+    def test_invalid_gamma_raises_error(self):
+        """Test that non-positive gamma is rejected."""
+        with pytest.raises(ValueError, match="Gamma must be positive"):
+            ColorCorrector(gamma=0)
+
+
+@pytest.mark.slow
+class TestColorCorrectorBenchmark:
+    """Benchmark correcting full 32x8 frames."""
+
+    def test_full_frame_throughput(self):
+        """Test that a full frame corrects in well under a millisecond."""
+        corrector = ColorCorrector()
+        frames = 2000
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            corrector.apply(FRAME)
+        per_frame = (time.perf_counter() - start) / frames
+
+        assert per_frame < 0.001
@@ -0,0 +1,147 @@
+"""Tests for network discovery of devices."""
+
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import Inventory, _is_awtrix_stats, _mdns_name, discover, main
+
+
+class TestDiscover:
+    """Test probing addresses for devices."""
+
+    def test_finds_devices_by_stats_fingerprint(self, fake_devices):
+        """Test that only servers answering with Awtrix stats are reported."""
+        (clock,) = fake_devices(1, stats={"uid": "awtrix_a1b2c3", "version": "0.96"})
+        (other,) = fake_devices(1, stats={"status": "ok"})
+
+        found = discover(hosts=[clock.host, other.host, "127.0.0.1:1"], mdns=False)
+
+        assert list(found) == ["awtrix_a1b2c3"]
+        assert found["awtrix_a1b2c3"]["host"] == clock.host
+        assert found["awtrix_a1b2c3"]["version"] == "0.96"
+
+    def test_scans_network_range(self, fake_devices):
+        """Test scanning a CIDR range on a given port."""
+        (clock,) = fake_devices(1, stats={"uid": "awtrix_a1b2c3", "version": "0.96"})
+        port = int(clock.host.rsplit(":", 1)[1])
+
+        found = discover("127.0.0.0/30", port=port, mdns=False)
+
+        assert found["awtrix_a1b2c3"]["host"] == clock.host
+
+    def test_device_reported_once(self, fake_devices):
+        """Test that a device reachable twice is identified by its uid."""
+        (clock,) = fake_devices(1, stats={"uid": "awtrix_a1b2c3", "version": "0.96"})
+        port = clock.host.rsplit(":", 1)[1]
+
+        found = discover(hosts=[clock.host, f"localhost:{port}"], mdns=False)
+
+        assert len(found) == 1
+
+    def test_nothing_to_scan(self):
+        """Test that no targets finds nothing."""
+        assert discover(mdns=False) == {}
+
+    def test_invalid_network_raises_error(self):
+        """Test that malformed CIDR ranges are rejected."""
+        with pytest.raises(ValueError):
+            discover("192.168.1.0/33", mdns=False)
+
+    def test_stats_fingerprint(self):
+        """Test recognizing Awtrix3 stats payloads."""
+        assert _is_awtrix_stats({"uid": "awtrix_a1b2c3", "version": "0.96"})
+        assert not _is_awtrix_stats({"version": "0.96"})
+        assert not _is_awtrix_stats(["uid"])
+
+    def test_mdns_name_encoding(self):
+        """Test encoding a service name as DNS labels."""
+        assert _mdns_name("_awtrix._tcp.local") == b"\x07_awtrix\x04_tcp\x05local\x00"
+
+
+class TestInventoryRefresh:
+    """Test writing discovered devices to the inventory."""
+
+    FOUND = {
+        "awtrix_a1b2c3": {"host": "192.168.1.130", "version": "0.96"},
+        "awtrix_d4e5f6": {"host": "192.168.1.129", "version": "0.96"},
+    }
+
+    def test_merge_refreshes_known_devices(self):
+        """Test that known devices keep their name, groups and tags."""
+        inventory = Inventory()
+        inventory.add(
+            "lobby",
+            "192.168.1.128",
+            groups=["lobby"],
+            tags={"floor": "3"},
+            uid="awtrix_a1b2c3",
+        )
+
+        changes = inventory.merge_discovered(self.FOUND)
+
+        assert changes == {
+            "added": ["awtrix_d4e5f6"],
+            "updated": ["lobby"],
+            "unchanged": [],
+        }
+        assert inventory.devices["lobby"]["host"] == "192.168.1.130"
+        assert inventory.select(groups="lobby", tags={"floor": "3"}) == ["lobby"]
+
+    def test_merge_matches_by_host(self):
+        """Test adopting a device listed by host without a uid."""
+        inventory = Inventory({"cafe": {"host": "192.168.1.129"}})
+
+        inventory.merge_discovered(self.FOUND)
+
+        assert inventory.devices["cafe"]["uid"] == "awtrix_d4e5f6"
+        assert "awtrix_d4e5f6" not in inventory
+
+    def test_save_round_trip_keeps_other_sections(self, tmp_path):
+        """Test that saving keeps comments and non-device sections."""
+        path = tmp_path / "trixctl.conf"
+        path.write_text(
+            "# my clocks\n[device]\nhost = 192.168.1.128\n\n"
+            "[device:old]\nhost = 192.168.1.130\n"
+        )
+        inventory = Inventory()
+        inventory.add("lobby", "192.168.1.129", groups=["lobby"], tags=["floor=3"])
+
+        inventory.save(path)
+
+        text = path.read_text()
+        assert text.startswith("# my clocks\n[device]\nhost = 192.168.1.128\n")
+        assert "[device:old]" not in text
+        assert Inventory.from_config(path).devices == inventory.devices
+
+
+class TestDiscoverCommand:
+    """Test the trixctl discover command."""
+
+    FOUND = {"awtrix_a1b2c3": {"host": "192.168.1.129", "version": "0.96"}}
+
+    @patch("awtrix3.discover", return_value=FOUND)
+    def test_discover_writes_inventory(self, mock_discover, tmp_path, monkeypatch):
+        """Test that --write adds found devices to the config file."""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        argv = ["trixctl", "discover", "192.168.1.0/24", "--no-mdns", "--write"]
+        with patch("sys.argv", argv), patch("builtins.print"):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        mock_discover.assert_called_once_with(
+            "192.168.1.0/24", mdns=False, connect_timeout=0.3
+        )
+        inventory = Inventory.from_config(tmp_path / ".trixctl.conf")
+        assert inventory.devices["awtrix_a1b2c3"]["host"] == "192.168.1.129"
+
+    @patch("awtrix3.discover", return_value={})
+    def test_discover_nothing_found(self, mock_discover, capsys):
+        """Test the exit status when no device answers."""
+        with patch("sys.argv", ["trixctl", "discover", "192.168.1.0/24"]):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 1
+        assert "No devices found" in capsys.readouterr().err
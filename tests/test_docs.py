@@ -222,6 +222,14 @@ class TestCLIDocumentation:
             "restore",
             "clock",
             "settings",
+            "discover",
+            "sync",
+            "firmware",
+            "query",
+            "health",
+            "exporter",
+            "watch",
+            "events",
         }
 
         # Remove --generate-config as it's an option, not a command
@@ -269,6 +277,14 @@ class TestCLIDocumentation:
                 "restore",
                 "clock",
                 "settings",
+                "discover",
+                "sync",
+                "firmware",
+                "query",
+                "health",
+                "exporter",
+                "watch",
+                "events",
             ]
             for command in expected_commands:
                 assert (
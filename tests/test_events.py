@@ -0,0 +1,262 @@
+"""Tests for device event subscription and dispatch."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from awtrix3 import (
+    Awtrix3,
+    DeviceEvent,
+    EventBus,
+    HttpEventReceiver,
+    MqttEventReceiver,
+    _mqtt_event,
+    main,
+)
+
+
+def event(device="lobby", kind="button", name="left", value=1):
+    """A device event without a client."""
+    return DeviceEvent(device, kind, name, value, None, time.time())
+
+
+class TestEventBus:
+    """Test dispatching events to handlers."""
+
+    def test_handlers_are_filtered(self):
+        """Test handler filters by kind and device, and removal."""
+        everything, buttons, cafe = [], [], []
+        with EventBus() as bus:
+            bus.on(everything.append)
+            bus.on(buttons.append, kind="button")
+            remove = bus.on(cafe.append, device="cafe")
+            bus.publish(event())
+            bus.publish(event("cafe", "app", "currentApp", "Time"))
+            bus.drain(5)
+            remove()
+            bus.publish(event("cafe"))
+            bus.drain(5)
+
+        assert len(everything) == 3
+        assert [e.device for e in buttons] == ["lobby", "cafe"]
+        assert [e.kind for e in cafe] == ["app"]
+        assert bus.counts["received"] == 3
+
+    def test_async_handlers(self):
+        """Test that coroutine handlers run on the bus's event loop."""
+        received = []
+
+        async def handler(event):
+            await asyncio.sleep(0.01)
+            received.append(event.value)
+
+        with EventBus() as bus:
+            bus.on(handler)
+            for value in range(3):
+                bus.publish(event(value=value))
+            assert bus.drain(5)
+
+        assert sorted(received) == [0, 1, 2]
+
+    def test_failing_handler_is_counted(self):
+        """Test that handler errors don't stop dispatching."""
+        with EventBus() as bus:
+            bus.on(lambda event: 1 / 0)
+            bus.publish(event())
+            bus.drain(5)
+
+        assert bus.counts["failed"] == 1
+        assert isinstance(bus.last_error, ZeroDivisionError)
+
+    def test_backpressure_when_handlers_are_slow(self):
+        """Test that a full queue drops events after the timeout."""
+        release = threading.Event()
+        with EventBus(max_pending=2, workers=1) as bus:
+            bus.on(lambda event: release.wait(5))
+            results = [bus.publish(event(value=n), timeout=0.05) for n in range(5)]
+            release.set()
+
+        # One event running, one held by the dispatcher, two queued
+        assert results == [True, True, True, True, False]
+        assert bus.counts["dropped"] == 1
+        assert bus.counts["handled"] == 4
+
+    def test_resolve_by_name_or_address(self):
+        """Test mapping prefixes and sender addresses to devices."""
+        client = Awtrix3("192.168.1.128:8080")
+        bus = EventBus({"lobby": client})
+        try:
+            assert bus.resolve("lobby") == ("lobby", client)
+            assert bus.resolve("192.168.1.128") == ("lobby", client)
+            assert bus.resolve("awtrix_1") == ("awtrix_1", None)
+        finally:
+            bus.close()
+
+    def test_resolve_ipv6_sender(self):
+        """Test matching a sender address to a bracketed IPv6 host."""
+        client = Awtrix3("[fe80::1]:8080")
+        bus = EventBus({"lobby": client})
+        try:
+            assert bus.resolve("fe80::1") == ("lobby", client)
+        finally:
+            bus.close()
+
+
+class TestHttpEventReceiver:
+    """Test receiving events POSTed by devices."""
+
+    def test_button_press_reaches_handler_quickly(self, fake_devices):
+        """Test reacting to a button press with a device call."""
+        (device,) = fake_devices(1)
+        reacted = threading.Event()
+
+        def on_button(event):
+            event.client.notify(f"{event.name} pressed")
+            reacted.set()
+
+        with EventBus({"lobby": Awtrix3(device.host)}) as bus:
+            bus.on(on_button, kind="button")
+            with HttpEventReceiver(bus, port=0, host="127.0.0.1") as receiver:
+                start = time.perf_counter()
+                response = requests.post(
+                    f"http://127.0.0.1:{receiver.port}/button?device=lobby",
+                    data="button=left&state=1",
+                    timeout=5,
+                )
+                assert reacted.wait(5)
+                elapsed = time.perf_counter() - start
+
+        assert response.status_code == 202
+        assert device.requests[-1][1] == "/api/notify"
+        assert b"left pressed" in device.requests[-1][2]
+        assert elapsed < 0.5
+
+    def test_json_bodies_and_sender_address(self):
+        """Test JSON payloads and resolving the sender's address."""
+        received = []
+        with EventBus({"lobby": Awtrix3("127.0.0.1")}) as bus:
+            bus.on(received.append)
+            with HttpEventReceiver(bus, port=0, host="127.0.0.1") as receiver:
+                url = f"http://127.0.0.1:{receiver.port}"
+                requests.post(f"{url}/app", json={"app": "Weather"}, timeout=5)
+                requests.post(f"{url}/stats", json={"bat": 90}, timeout=5)
+                bad = requests.post(f"{url}/buttonLeft", data="x", timeout=5)
+                bus.drain(5)
+
+        assert bad.status_code == 400
+        assert [(e.device, e.kind, e.value) for e in received] == [
+            ("lobby", "app", "Weather"),
+            ("lobby", "stats", {"bat": 90}),
+        ]
+
+    def test_full_bus_answers_503(self):
+        """Test that senders are told to back off when the bus is full."""
+        release = threading.Event()
+        with EventBus(max_pending=1, workers=1) as bus:
+            bus.on(lambda event: release.wait(5))
+            with HttpEventReceiver(bus, port=0, host="127.0.0.1", timeout=0.05) as r:
+                url = f"http://127.0.0.1:{r.port}/button?device=lobby"
+                codes = [
+                    requests.post(url, json={"button": "left"}, timeout=5).status_code
+                    for _ in range(4)
+                ]
+            release.set()
+
+        assert codes == [202, 202, 202, 503]
+
+
+class TestMqttEvents:
+    """Test turning MQTT messages into events."""
+
+    @pytest.fixture
+    def bus(self):
+        """A bus knowing one device by its MQTT prefix."""
+        with EventBus({"awtrix_lobby": Awtrix3("192.168.1.128")}) as bus:
+            yield bus
+
+    def test_device_topics(self, bus):
+        """Test button, current app and stats topics."""
+        button = _mqtt_event(bus, "awtrix_lobby/stats/buttonSelect", b"1")
+        app = _mqtt_event(bus, "awtrix_lobby/stats/currentApp", b"Time")
+        stats = _mqtt_event(bus, "awtrix_lobby/stats", b'{"bat": 90, "app": "Time"}')
+
+        assert button[:4] == ("awtrix_lobby", "button", "select", 1)
+        assert button.client is bus.clients["awtrix_lobby"]
+        assert app[1:4] == ("app", "currentApp", "Time")
+        assert stats[1:4] == ("stats", "stats", {"bat": 90, "app": "Time"})
+
+    def test_other_topics_are_ignored(self, bus):
+        """Test topics that aren't device events."""
+        assert _mqtt_event(bus, "awtrix_lobby/notify", b"{}") is None
+        assert _mqtt_event(bus, "awtrix_lobby/stats/buttonLeft", b"on") is None
+
+    def test_multi_segment_prefix(self, bus):
+        """Test prefixes that contain "/" themselves."""
+        bus.clients["awtrix/lobby"] = bus.clients["awtrix_lobby"]
+        button = _mqtt_event(bus, "awtrix/lobby/stats/buttonLeft", b"1")
+        stats = _mqtt_event(bus, "home/awtrix/lobby/stats", b'{"bat": 90}')
+
+        assert button[:4] == ("awtrix/lobby", "button", "left", 1)
+        assert button.client is bus.clients["awtrix/lobby"]
+        assert stats[:4] == ("home/awtrix/lobby", "stats", "stats", {"bat": 90})
+        assert stats.client is None
+        assert _mqtt_event(bus, "awtrix/lobby/notify", b"{}") is None
+
+    def test_unknown_prefix(self, bus):
+        """Test events from devices the bus doesn't know."""
+        event = _mqtt_event(bus, "awtrix_new/stats/buttonRight", b"0")
+        assert event[:4] == ("awtrix_new", "button", "right", 0)
+        assert event.client is None
+
+    def test_missing_paho_is_reported(self, bus):
+        """Test the install hint when paho-mqtt isn't available."""
+        with patch.dict("sys.modules", {"paho": None, "paho.mqtt": None}):
+            with patch.dict("sys.modules", {"paho.mqtt.client": None}):
+                with pytest.raises(ImportError, match=r"awtrix3\[mqtt\]"):
+                    MqttEventReceiver(bus, "localhost")
+
+
+class TestEventsCommand:
+    """Test trixctl events."""
+
+    def test_events_prints_received_events(self, capsys):
+        """Test printing events until interrupted."""
+        import os
+        import signal
+
+        posted = []
+        port = free_port()
+
+        def press():
+            url = f"http://127.0.0.1:{port}/buttonRight"
+            for _ in range(100):
+                try:
+                    posted.append(requests.post(url, data="1", timeout=5).status_code)
+                    break
+                except requests.ConnectionError:
+                    time.sleep(0.02)
+            time.sleep(0.2)
+            os.kill(os.getpid(), signal.SIGINT)
+
+        argv = ["trixctl", "--host", "127.0.0.1", "events", "--port", str(port)]
+        with patch("sys.argv", argv), patch("awtrix3.load_config", return_value={}):
+            threading.Thread(target=press).start()
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        assert posted == [202]
+        assert capsys.readouterr().out.rstrip().endswith("127.0.0.1 button right 1")
+
+
+def free_port():
+    """Find a free loopback port."""
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
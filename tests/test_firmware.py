@@ -0,0 +1,168 @@
+"""Tests for streamed firmware updates and staged rollouts."""
+
+import pytest
+
+from awtrix3 import Awtrix3, FirmwareRollout, Fleet, _multipart_file_body
+
+IMAGE = bytes(range(256)) * 64
+
+
+def emulate_update(device, new_version="0.97", reboot=True):
+    """Make a stand-in device accept firmware and reboot into a new version."""
+    device.stats = {"uid": "awtrix_1", "version": "0.96", "uptime": 5000}
+    device.images = []
+
+    def update(handler, body):
+        device.images.append(body)
+        if reboot:
+            device.stats = {"uid": "awtrix_1", "version": new_version, "uptime": 0}
+        return 200, "OK", "text/plain"
+
+    device.handlers[("POST", "/update")] = update
+
+
+@pytest.fixture
+def image(tmp_path):
+    """A fake firmware image on disk."""
+    path = tmp_path / "firmware.bin"
+    path.write_bytes(IMAGE)
+    return str(path)
+
+
+def make_fleet(devices):
+    """Name stand-in devices dev0, dev1, ..."""
+    return Fleet({f"dev{n}": Awtrix3(d.host) for n, d in enumerate(devices)})
+
+
+class TestUpdateFirmware:
+    """Test uploading a firmware image."""
+
+    def test_image_is_streamed_as_multipart(self, fake_devices, image):
+        """Test that the whole image reaches the update endpoint."""
+        (device,) = fake_devices(1)
+        emulate_update(device)
+
+        result = Awtrix3(device.host).update_firmware(image)
+
+        assert result == {"status": "OK"}
+        assert b'name="update"; filename="firmware.bin"' in device.images[0]
+        assert IMAGE in device.images[0]
+
+    def test_interrupted_upload_releases_the_image(self):
+        """Test that a body cut short frees its views of the source."""
+        data = bytearray(200000)
+        body, _ = _multipart_file_body("update", "firmware.bin", data, 1024)
+        parts = iter(body)
+        chunks = [next(parts), next(parts), next(parts)]
+
+        body.close()
+
+        data.extend(b"x")  # Raises BufferError while a view is still exported
+        assert len(chunks) == 3
+
+
+class TestFirmwareRollout:
+    """Test wave planning, health checks and halting."""
+
+    def rollout(self, fleet, image, **kwargs):
+        """Create a rollout with fast health checks."""
+        kwargs.setdefault("health_timeout", 2)
+        return FirmwareRollout(fleet, image, poll_interval=0.01, **kwargs)
+
+    def test_plan_repeats_last_wave_size(self, fake_devices, image):
+        """Test splitting devices into waves."""
+        with make_fleet(fake_devices(7)) as fleet:
+            plan = self.rollout(fleet, image, waves=[1, 2]).plan()
+
+        assert [len(wave) for wave in plan] == [1, 2, 2, 2]
+        assert plan[0] == ["dev0"]
+
+    def test_rollout_updates_every_device(self, fake_devices, image):
+        """Test a healthy rollout across several waves."""
+        devices = fake_devices(4)
+        for device in devices:
+            emulate_update(device)
+
+        with make_fleet(devices) as fleet:
+            result = self.rollout(fleet, image, expected_version="0.97").run()
+
+        assert result["failed"] == {}
+        assert result["updated"]["dev3"] == {"from": "0.96", "to": "0.97"}
+        assert [wave["devices"] for wave in result["waves"]] == [1, 3]
+        assert all(IMAGE in device.images[0] for device in devices)
+
+    def test_wrong_version_is_a_failure(self, fake_devices, image):
+        """Test that a device rebooting into the wrong version fails."""
+        (device,) = fake_devices(1)
+        emulate_update(device, new_version="0.96")
+
+        with make_fleet([device]) as fleet:
+            result = self.rollout(
+                fleet, image, expected_version="0.97", health_timeout=0.1
+            ).run()
+
+        assert "version is 0.96" in str(result["failed"]["dev0"])
+
+    def test_device_that_does_not_reboot_fails(self, fake_devices, image):
+        """Test detecting a device that never applied the update."""
+        (device,) = fake_devices(1)
+        emulate_update(device, reboot=False)
+
+        with make_fleet([device]) as fleet:
+            result = self.rollout(fleet, image, health_timeout=0.1).run()
+
+        assert "did not reboot" in str(result["failed"]["dev0"])
+
+    def test_halts_when_failure_rate_exceeded(self, fake_devices, image):
+        """Test that later waves are skipped after a failing canary."""
+        devices = fake_devices(5)
+        emulate_update(devices[0], reboot=False)
+        for device in devices[1:]:
+            emulate_update(device)
+
+        with make_fleet(devices) as fleet:
+            result = self.rollout(fleet, image, health_timeout=0.1).run()
+
+        assert result["halted"] is True
+        assert result["skipped"] == ["dev1", "dev2", "dev3", "dev4"]
+        assert all(device.images == [] for device in devices[1:])
+
+    def test_devices_on_expected_version_are_skipped(self, fake_devices, image):
+        """Test that up-to-date devices don't get the image again."""
+        (device,) = fake_devices(1)
+        emulate_update(device)
+        device.stats["version"] = "0.97"
+
+        with make_fleet([device]) as fleet:
+            result = self.rollout(fleet, image, expected_version="0.97").run()
+
+        assert result["current"] == ["dev0"]
+        assert result["updated"] == {}
+        assert result["halted"] is False
+        assert device.images == []
+
+    def test_current_devices_do_not_dilute_failure_rate(self, fake_devices, image):
+        """Test that only real update attempts count towards halting."""
+        devices = fake_devices(5)
+        for device in devices[:4]:
+            device.stats["version"] = "0.97"
+        devices[4].close()
+
+        with make_fleet(devices) as fleet:
+            result = self.rollout(
+                fleet, image, waves=[5], expected_version="0.97"
+            ).run()
+
+        assert result["current"] == ["dev0", "dev1", "dev2", "dev3"]
+        assert list(result["failed"]) == ["dev4"]
+        assert result["halted"] is True
+
+    def test_invalid_waves_raise_error(self, image):
+        """Test that wave sizes must be positive."""
+        with pytest.raises(ValueError, match="at least 1"):
+            FirmwareRollout(Fleet([]), image, waves=[0])
+
+    def test_missing_image_raises_error(self, tmp_path):
+        """Test that the image must exist."""
+        with pytest.raises(ValueError, match="not found"):
+            FirmwareRollout(Fleet([]), str(tmp_path / "missing.bin"))
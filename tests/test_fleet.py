@@ -0,0 +1,166 @@
+"""Tests for fleet fan-out."""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from awtrix3 import Awtrix3, Fleet, FleetResult
+
+
+def make_client(host, timeout=None):
+    """Create a mock client with a host and timeout."""
+    client = Mock(spec=Awtrix3)
+    client.host = host
+    client.timeout = timeout
+    return client
+
+
+class TestFleet:
+    """Test fanning calls out across devices."""
+
+    def setup_method(self):
+        """Set up a fleet of three mock clients."""
+        self.clients = {name: make_client(name) for name in ["a", "b", "c"]}
+        self.fleet = Fleet(self.clients, max_workers=2)
+
+    def teardown_method(self):
+        """Stop the fleet threads."""
+        self.fleet.close()
+
+    def test_run_calls_every_device(self):
+        """Test that a method runs once per device."""
+        for client in self.clients.values():
+            client.notify.return_value = {"status": "ok"}
+
+        report = self.fleet.run("notify", "Let's go Mets!")
+
+        for client in self.clients.values():
+            client.notify.assert_called_once_with("Let's go Mets!")
+        assert report.values == {name: {"status": "ok"} for name in "abc"}
+        assert report.failures == {}
+
+    def test_failures_are_collected(self):
+        """Test that one failing device doesn't abort the batch."""
+        self.clients["b"].stats.side_effect = ConnectionError("unreachable")
+        self.clients["a"].stats.return_value = {"battery": 85}
+        self.clients["c"].stats.return_value = {"battery": 75}
+
+        report = self.fleet.run("stats")
+
+        assert set(report.values) == {"a", "c"}
+        assert isinstance(report.failures["b"], ConnectionError)
+
+    def test_imap_yields_in_completion_order(self):
+        """Test that fast devices are reported before slow ones."""
+        release = threading.Event()
+        self.clients["a"].stats.side_effect = lambda: release.wait(5)
+        self.clients["b"].stats.return_value = {}
+
+        results = self.fleet.imap("stats", devices=["a", "b"])
+        first = next(results)
+        release.set()
+
+        assert first.device == "b"
+        assert next(results).device == "a"
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than max_workers calls run at once."""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_stats(client):
+            with lock:
+                active.append(client)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(client)
+
+        with Fleet({str(i): make_client(str(i)) for i in range(8)}, 3) as fleet:
+            fleet.run(slow_stats)
+
+        assert max(peak) == 3
+
+    def test_callable_method(self):
+        """Test fanning out an arbitrary callable."""
+        report = self.fleet.run(lambda client, suffix: client.host + suffix, "!")
+        assert report.values == {"a": "a!", "b": "b!", "c": "c!"}
+
+    def test_method_shortcut(self):
+        """Test calling Awtrix3 methods directly on the fleet."""
+        report = self.fleet.power(False)
+
+        assert len(report) == 3
+        self.clients["a"].power.assert_called_once_with(False)
+
+    def test_unknown_attribute_raises_error(self):
+        """Test that only Awtrix3 methods are forwarded."""
+        with pytest.raises(AttributeError):
+            self.fleet.not_a_method
+
+    def test_unknown_device_raises_error(self):
+        """Test that limiting a call to an unknown device is an error."""
+        with pytest.raises(ValueError, match="Unknown device: lobby"):
+            list(self.fleet.imap("stats", devices=["a", "lobby"]))
+        self.clients["a"].stats.assert_not_called()
+
+    def test_progress_callback(self):
+        """Test that progress sees every result."""
+        seen = []
+        self.fleet.run("stats", progress=seen.append)
+
+        assert sorted(result.device for result in seen) == ["a", "b", "c"]
+        assert all(isinstance(result, FleetResult) for result in seen)
+
+
+class TestFleetTimeouts:
+    """Test per-device timeouts."""
+
+    def test_given_clients_keep_their_timeout(self):
+        """Test that the fleet never changes a caller's client."""
+        client = make_client("a")
+        custom = make_client("b", timeout=1)
+        with Fleet([client, custom]):
+            pass
+
+        assert client.timeout is None
+        assert custom.timeout == 1
+
+    def test_per_device_timeouts(self):
+        """Test a dict of per-device timeouts for created clients."""
+        hosts = {"a": "192.168.1.128", "b": "192.168.1.129"}
+        with Fleet.from_hosts(hosts, timeout={"a": 2}) as fleet:
+            assert fleet.clients["a"].timeout == 2
+            assert fleet.clients["b"].timeout is None
+
+    @patch("awtrix3.requests.get")
+    def test_from_hosts_passes_timeout_to_requests(self, mock_get):
+        """Test that real clients send the timeout with each request."""
+        mock_get.return_value = Mock(json=Mock(return_value={}))
+        with Fleet.from_hosts(["192.168.1.128"], timeout=2.5) as fleet:
+            fleet.run("stats")
+
+        mock_get.assert_called_once_with(
+            "http://192.168.1.128/api/stats", auth=None, timeout=2.5
+        )
+
+
+class TestFleetReport:
+    """Test report summaries."""
+
+    def test_summary(self):
+        """Test throughput and latency percentiles."""
+        clients = {str(i): make_client(str(i)) for i in range(10)}
+        clients["0"].stats.side_effect = ConnectionError("down")
+        with Fleet(clients) as fleet:
+            summary = fleet.run("stats").summary()
+
+        assert summary["devices"] == 10
+        assert summary["succeeded"] == 9
+        assert summary["failed"] == 1
+        assert summary["throughput"] > 0
+        latency = summary["latency_ms"]
+        assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
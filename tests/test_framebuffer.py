@@ -0,0 +1,187 @@
+"""Tests for the shared-memory framebuffer."""
+
+import multiprocessing
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from awtrix3 import FramebufferPusher, SharedFramebuffer
+
+REGIONS = {"weather": (0, 0, 16, 8), "score": (16, 0, 16, 8)}
+
+
+def produce(name, region, color):
+    """Fill a region from a separate process."""
+    framebuffer = SharedFramebuffer.attach(name=name)
+    framebuffer.fill(region, [color] * 128)
+    framebuffer.close()
+
+
+class TestSharedFramebuffer:
+    """Test region writes and consistent snapshots."""
+
+    def setup_method(self):
+        """Create a framebuffer with two regions."""
+        self.framebuffer = SharedFramebuffer(REGIONS)
+
+    def teardown_method(self):
+        """Destroy the framebuffer."""
+        self.framebuffer.close()
+        self.framebuffer.unlink()
+
+    def test_regions_start_blank(self):
+        """Test that new regions are black at generation 0."""
+        assert self.framebuffer.snapshot("weather") == (0, [0] * 128)
+
+    def test_write_bumps_generation_by_two(self):
+        """Test the seqlock counter around a write."""
+        with self.framebuffer.write("weather") as pixels:
+            pixels[0] = 0xFF6600
+            assert self.framebuffer.generation("weather") == 1
+
+        generation, pixels = self.framebuffer.snapshot("weather")
+        assert generation == 2
+        assert pixels[0] == 0xFF6600
+        assert self.framebuffer.generation("score") == 0
+
+    def test_attach_reads_layout(self):
+        """Test that another handle sees the same regions and pixels."""
+        self.framebuffer.fill("score", [7] * 128)
+        other = SharedFramebuffer.attach(name=self.framebuffer.name)
+        try:
+            assert other.regions == REGIONS
+            assert other.snapshot("score") == (2, [7] * 128)
+        finally:
+            other.close()
+
+    def test_snapshot_waits_for_writer(self):
+        """Test that a snapshot never returns a half-written region."""
+        ready = threading.Event()
+        release = threading.Event()
+
+        def slow_writer():
+            with self.framebuffer.write("weather") as pixels:
+                pixels[0] = 1
+                ready.set()
+                release.wait()
+                pixels[1] = 1
+
+        thread = threading.Thread(target=slow_writer)
+        thread.start()
+        ready.wait()
+        with pytest.raises(TimeoutError):
+            self.framebuffer.snapshot("weather", retries=10)
+        release.set()
+        thread.join()
+
+        assert self.framebuffer.snapshot("weather")[1][:2] == [1, 1]
+
+    def test_producer_processes(self):
+        """Test producers writing their regions from other processes."""
+        processes = [
+            multiprocessing.Process(
+                target=produce, args=(self.framebuffer.name, region, color)
+            )
+            for region, color in [("weather", 0x0000FF), ("score", 0xFF6600)]
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+
+        assert self.framebuffer.snapshot("weather")[1] == [0x0000FF] * 128
+        assert self.framebuffer.snapshot("score")[1] == [0xFF6600] * 128
+
+    def test_block_outlives_spawned_producer(self):
+        """Test that a producer exiting doesn't destroy the shared block."""
+        script = (
+            "from awtrix3 import SharedFramebuffer\n"
+            f"framebuffer = SharedFramebuffer.attach(name={self.framebuffer.name!r})\n"
+            "framebuffer.fill('score', [0xFF6600] * 128)\n"
+            "framebuffer.close()\n"
+        )
+        subprocess.run(
+            [sys.executable, "-c", script],
+            check=True,
+            capture_output=True,
+            cwd=str(Path(__file__).parent.parent),
+            timeout=30,
+        )
+        time.sleep(0.5)  # A producer's resource tracker cleans up after it exits
+
+        consumer = SharedFramebuffer.attach(name=self.framebuffer.name)
+        try:
+            assert consumer.snapshot("score")[1] == [0xFF6600] * 128
+        finally:
+            consumer.close()
+
+    def test_region_name_too_long_raises_error(self):
+        """Test that region names must fit the header."""
+        with pytest.raises(ValueError, match="Region name too long"):
+            SharedFramebuffer({"x" * 17: (0, 0, 1, 1)})
+
+
+class TestSharedFramebufferFile:
+    """Test the mmap file backend."""
+
+    def test_file_backed_framebuffer(self, tmp_path):
+        """Test writing through one handle and reading through another."""
+        path = str(tmp_path / "frame.buf")
+        with SharedFramebuffer({"all": (0, 0, 2, 1)}, path=path) as framebuffer:
+            framebuffer.fill("all", [1, 2])
+            other = SharedFramebuffer.attach(path=path)
+            assert other.snapshot("all") == (2, [1, 2])
+            other.close()
+
+
+class TestFramebufferPusher:
+    """Test pushing only when regions change."""
+
+    def setup_method(self):
+        """Create a framebuffer and a pusher with a mock client."""
+        self.framebuffer = SharedFramebuffer(REGIONS)
+        self.client = Mock()
+        self.pusher = FramebufferPusher(self.framebuffer, self.client)
+
+    def teardown_method(self):
+        """Destroy the framebuffer."""
+        self.framebuffer.close()
+        self.framebuffer.unlink()
+
+    def test_first_push_sends_all_regions(self):
+        """Test the initial push draws every region."""
+        assert self.pusher.push() == ["weather", "score"]
+
+        draw = self.client.custom_app.call_args.kwargs["draw"]
+        assert [command["db"][:4] for command in draw] == [
+            [0, 0, 16, 8],
+            [16, 0, 16, 8],
+        ]
+
+    def test_unchanged_framebuffer_is_not_pushed(self):
+        """Test that nothing is sent when no generation moved."""
+        self.pusher.push()
+        assert self.pusher.push() == []
+        assert self.client.custom_app.call_count == 1
+
+    def test_only_changed_region_is_reread(self):
+        """Test that a change to one region re-reads only that region."""
+        self.pusher.push()
+        self.framebuffer.fill("score", [5] * 128)
+
+        assert self.pusher.push() == ["score"]
+        draw = self.client.custom_app.call_args.kwargs["draw"]
+        assert draw[1]["db"][4] == [5] * 128
+
+    def test_failed_push_is_retried(self):
+        """Test that regions are resent after a failed push."""
+        self.client.custom_app.side_effect = [ConnectionError("down"), None]
+
+        with pytest.raises(ConnectionError):
+            self.pusher.push()
+        assert self.pusher.push() == ["weather", "score"]
@@ -0,0 +1,174 @@
+"""Tests for fleet health checks and latency histograms."""
+
+import random
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import (
+    Awtrix3,
+    Fleet,
+    HealthChecker,
+    LatencyHistogram,
+    _split_host,
+    main,
+)
+
+
+class TestLatencyHistogram:
+    """Test the fixed-size latency histogram."""
+
+    def test_percentiles_within_bucket_resolution(self):
+        """Test that percentiles are within 10% of the exact values."""
+        rng = random.Random(1)
+        samples = sorted(rng.expovariate(1 / 0.05) for _ in range(10000))
+        histogram = LatencyHistogram()
+        for sample in samples:
+            histogram.record(sample)
+
+        for percent in (50, 95, 99):
+            exact = samples[int(percent / 100 * len(samples)) - 1] * 1000
+            assert exact <= histogram.percentile(percent) <= exact * 1.1
+
+    def test_memory_is_bounded(self):
+        """Test that recording more samples does not grow the histogram."""
+        histogram = LatencyHistogram()
+        size = len(histogram.counts)
+        for n in range(100000):
+            histogram.record(n / 1000)
+
+        assert len(histogram.counts) == size
+        assert histogram.count == 100000
+        assert histogram.percentile(100) == pytest.approx(99999)
+
+    def test_merge_and_empty(self):
+        """Test merging histograms and percentiles without samples."""
+        first, second = LatencyHistogram(), LatencyHistogram()
+        assert first.percentile(50) is None
+        first.record(0.01)
+        second.record(0.2)
+
+        first.merge(second)
+
+        assert first.count == 2
+        assert first.percentile(100) == pytest.approx(200)
+
+
+@pytest.fixture
+def fleet(fake_devices):
+    """A fast, a slow and an unreachable device."""
+    fast, slow, gone = fake_devices(3)
+    slow.delay = 0.15
+    gone.close()
+    clients = {
+        "fast": Awtrix3(fast.host),
+        "slow": Awtrix3(slow.host),
+        "gone": Awtrix3(gone.host, timeout=1),
+    }
+    with Fleet(clients) as fleet:
+        yield fleet
+
+
+class TestHealthChecker:
+    """Test probing and classifying devices."""
+
+    def test_devices_are_classified(self, fleet):
+        """Test healthy, degraded and down classification."""
+        checker = HealthChecker(fleet, degraded_ms=100, connect_timeout=0.5)
+        checker.run(rounds=2, interval=0)
+
+        status = checker.status()
+        assert status["fast"]["status"] == "healthy"
+        assert status["slow"]["status"] == "degraded"
+        assert status["gone"]["status"] == "down"
+        assert status["gone"]["failures"] == 2
+        assert "connect failed" in status["gone"]["last_error"]
+        assert status["slow"]["p50"] >= 150
+        assert status["fast"]["checks"] == 2
+
+    def test_single_failure_is_degraded(self, fleet):
+        """Test that one failed check only degrades a device."""
+        checker = HealthChecker(fleet, connect_timeout=0.5)
+        assert checker.check()["gone"]["status"] == "degraded"
+        assert checker.check()["gone"]["status"] == "down"
+
+    def test_report_ranks_worst_devices(self, fleet):
+        """Test fleet-wide percentiles and the worst offenders."""
+        checker = HealthChecker(fleet, degraded_ms=100, connect_timeout=0.5)
+        checker.run(rounds=2, interval=0)
+
+        report = checker.report(worst=2)
+        assert report["counts"] == {"healthy": 1, "degraded": 1, "down": 1}
+        assert [device["device"] for device in report["worst"]] == ["gone", "slow"]
+        assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+        assert report["latency_ms"]["p99"] >= 150
+
+    def test_devices_are_probed_concurrently(self, fake_devices):
+        """Test that one check takes about as long as the slowest device."""
+        import time
+
+        devices = fake_devices(8, delay=0.1)
+        clients = {f"dev{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+        with Fleet(clients) as fleet:
+            checker = HealthChecker(fleet)
+            start = time.perf_counter()
+            checker.check()
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.5
+        assert all(d.requests[0][1] == "/api/stats" for d in devices)
+
+    def test_probe_connects_to_ipv6_hosts(self):
+        """Test that IPv6 literals are probed at the right address."""
+        client = Awtrix3("[fe80::1]:8080")
+        client.stats = lambda: {}
+        with Fleet({"v6": client}) as fleet:
+            with patch("socket.create_connection") as connect:
+                HealthChecker(fleet)._probe(client)
+
+        assert connect.call_args.args[0] == ("fe80::1", 8080)
+
+    @pytest.mark.parametrize(
+        "host, expected",
+        [
+            ("192.168.1.128", ("192.168.1.128", 80)),
+            ("192.168.1.128:8080", ("192.168.1.128", 8080)),
+            ("[fe80::1]:8080", ("fe80::1", 8080)),
+            ("[::1]", ("::1", 80)),
+            ("fe80::1", ("fe80::1", 80)),
+        ],
+    )
+    def test_split_host(self, host, expected):
+        """Test splitting hosts, including IPv6 literals."""
+        assert _split_host(host) == expected
+
+
+class TestHealthCommand:
+    """Test trixctl health."""
+
+    def test_health_prints_report(self, fake_devices, capsys):
+        """Test the report for a single device."""
+        (device,) = fake_devices(1)
+        argv = ["trixctl", "--host", device.host, "health", "--interval", "0"]
+        with patch("sys.argv", argv), patch("awtrix3.load_config", return_value={}):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        out = capsys.readouterr().out
+        assert "Devices: 1 healthy, 0 degraded, 0 down" in out
+        assert "Latency: p50" in out
+        assert device.host in out
+        assert len(device.requests) == 3
+
+    def test_down_device_exits_with_error(self, fake_devices, capsys):
+        """Test that an unreachable device fails the command."""
+        (device,) = fake_devices(1)
+        device.close()
+        argv = ["trixctl", "--host", device.host, "health", "--interval", "0"]
+        with patch("sys.argv", argv), patch("awtrix3.load_config", return_value={}):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 1
+        assert "0 healthy, 0 degraded, 1 down" in capsys.readouterr().out
@@ -0,0 +1,167 @@
+"""Tests for the local SQLite index of fleet stats and settings."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import Awtrix3, Fleet, FleetIndex, main
+
+
+@pytest.fixture
+def index():
+    """An in-memory index."""
+    with FleetIndex(":memory:") as index:
+        yield index
+
+
+@pytest.fixture
+def fleet(fake_devices):
+    """Three stand-in devices with varied stats and settings."""
+    devices = fake_devices(3)
+    for number, (signal, brightness) in enumerate([(-60, 80), (-80, 80), (-77, 40)]):
+        devices[number].stats = {
+            "version": "0.96",
+            "wifi_signal": signal,
+            "uptime": 100,
+            "lux": number * 50,
+        }
+        devices[number].settings = {"brightness": brightness, "timeFormat": "HH:mm"}
+    clients = {f"clock{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+    with Fleet(clients) as fleet:
+        fleet.devices = devices
+        yield fleet
+
+
+class TestFleetIndex:
+    """Test refreshing and querying the index."""
+
+    def test_refresh_indexes_typed_columns(self, index, fleet):
+        """Test that known fields become typed, queryable columns."""
+        summary = index.refresh(fleet)
+
+        assert sorted(summary["changed"]) == ["clock0", "clock1", "clock2"]
+        assert index.select("wifi_signal < -75") == ["clock1", "clock2"]
+        assert index.select("brightness = 80 AND wifi_signal < ?", (-75,)) == ["clock1"]
+
+    def test_other_fields_via_json(self, index, fleet):
+        """Test querying fields without a typed column."""
+        index.refresh(fleet)
+
+        assert index.select("json_extract(stats, '$.lux') >= 50") == [
+            "clock1",
+            "clock2",
+        ]
+
+    def test_query_returns_decoded_rows(self, index, fleet):
+        """Test that rows carry columns and decoded payloads."""
+        index.refresh(fleet)
+
+        (row,) = index.query("name = 'clock2'")
+
+        assert row["host"] == fleet.clients["clock2"].host
+        assert row["brightness"] == 40
+        assert row["settings"] == {"brightness": 40, "timeFormat": "HH:mm"}
+
+    def test_unchanged_devices_are_not_rewritten(self, index, fleet):
+        """Test incremental refresh."""
+        index.refresh(fleet)
+        fleet.devices[0].stats = {**fleet.devices[0].stats, "wifi_signal": -90}
+
+        summary = index.refresh(fleet)
+
+        assert summary["changed"] == ["clock0"]
+        assert sorted(summary["unchanged"]) == ["clock1", "clock2"]
+        assert index.select("wifi_signal = -90") == ["clock0"]
+
+    def test_max_age_skips_fresh_devices(self, index, fleet):
+        """Test that recently checked devices aren't fetched again."""
+        index.refresh(fleet)
+        requests_before = len(fleet.devices[0].requests)
+
+        summary = index.refresh(fleet, max_age=60)
+
+        assert sorted(summary["skipped"]) == ["clock0", "clock1", "clock2"]
+        assert len(fleet.devices[0].requests) == requests_before
+
+    def test_failures_are_reported(self, index, fleet):
+        """Test that unreachable devices are left out of the index."""
+        fleet.clients["gone"] = Awtrix3("127.0.0.1:1")
+
+        summary = index.refresh(fleet)
+
+        assert list(summary["failures"]) == ["gone"]
+        assert len(index) == 3
+
+    def test_invalid_query_raises_error(self, index):
+        """Test that SQL errors are reported as ValueError."""
+        with pytest.raises(ValueError, match="Invalid query"):
+            index.query("no_such_column = 1")
+
+    def test_query_speed(self, index):
+        """Test that queries over a large fleet answer in milliseconds."""
+        for number in range(2000):
+            index.update(
+                f"clock{number}",
+                f"10.0.{number // 256}.{number % 256}",
+                {"wifi_signal": -50 - number % 40, "version": "0.96"},
+                {"brightness": 80 if number % 3 else 40},
+            )
+
+        start = time.perf_counter()
+        names = index.select("brightness = 80 AND wifi_signal < -75")
+        elapsed = time.perf_counter() - start
+
+        expected = [n for n in range(2000) if n % 3 and -50 - n % 40 < -75]
+        assert len(names) == len(expected)
+        assert elapsed < 0.05
+
+
+class TestQueryCommand:
+    """Test trixctl query and --where targeting."""
+
+    @pytest.fixture
+    def home(self, tmp_path, monkeypatch, fleet):
+        """Write an inventory of the stand-in devices to a temporary home."""
+        sections = [
+            f"[device:{name}]\nhost = {client.host}\n"
+            for name, client in fleet.clients.items()
+        ]
+        (tmp_path / ".trixctl.conf").write_text("\n".join(sections))
+        monkeypatch.setenv("HOME", str(tmp_path))
+        return tmp_path
+
+    def test_query_refresh_prints_table(self, home, capsys):
+        """Test refreshing the index and printing matching devices."""
+        argv = ["trixctl", "query", "wifi_signal < -75", "--refresh"]
+        with patch("sys.argv", argv):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split() == [
+            "name",
+            "host",
+            "version",
+            "wifi_signal",
+            "brightness",
+        ]
+        assert [line.split()[0] for line in lines[1:]] == ["clock1", "clock2"]
+        assert (home / ".trixctl-index.db").exists()
+
+    def test_where_targets_other_commands(self, home, fleet):
+        """Test running a command on devices selected from the index."""
+        with patch("sys.argv", ["trixctl", "query", "--refresh"]):
+            with pytest.raises(SystemExit), patch("builtins.print"):
+                main()
+
+        argv = ["trixctl", "--where", "brightness = 80", "power", "off"]
+        with patch("sys.argv", argv), patch("builtins.print"):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        assert fleet.devices[0].requests[-1][1] == "/api/power"
+        assert fleet.devices[1].requests[-1][1] == "/api/power"
+        assert fleet.devices[2].requests[-1][1] == "/api/settings"
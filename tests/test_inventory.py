@@ -0,0 +1,175 @@
+"""Tests for the device inventory and group/tag targeting."""
+
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import Fleet, Inventory, main
+
+CONFIG = """
+[device]
+host = 192.168.1.128
+
+[device:lobby-left]
+host = 192.168.1.129
+groups = lobby, ground
+tags = floor=3, role=wall
+
+[device:lobby-right]
+host = 192.168.1.130
+groups = lobby
+tags = floor=3
+username = admin
+
+[device:cafe]
+host = 192.168.1.128
+groups = ground
+tags = floor=1
+"""
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    """Load the sample inventory from a config file."""
+    path = tmp_path / "trixctl.conf"
+    path.write_text(CONFIG)
+    return Inventory.from_config(path)
+
+
+class TestInventory:
+    """Test loading and selecting inventory devices."""
+
+    def test_from_config_reads_device_sections(self, inventory):
+        """Test that only [device:NAME] sections become devices."""
+        assert sorted(inventory) == ["cafe", "lobby-left", "lobby-right"]
+        assert inventory.devices["lobby-left"] == {
+            "host": "192.168.1.129",
+            "groups": ["ground", "lobby"],
+            "tags": {"floor": "3", "role": "wall"},
+        }
+        assert inventory.devices["lobby-right"]["username"] == "admin"
+
+    def test_from_config_missing_file(self, tmp_path):
+        """Test that a missing config gives an empty inventory."""
+        assert len(Inventory.from_config(tmp_path / "missing.conf")) == 0
+
+    def test_select_by_group(self, inventory):
+        """Test selecting one group, and the union of several."""
+        assert inventory.select(groups="lobby") == ["lobby-left", "lobby-right"]
+        assert inventory.select(groups=["lobby", "ground"]) == [
+            "cafe",
+            "lobby-left",
+            "lobby-right",
+        ]
+
+    def test_select_by_tags_requires_all(self, inventory):
+        """Test that every tag must match."""
+        assert inventory.select(tags=["floor=3"]) == ["lobby-left", "lobby-right"]
+        assert inventory.select(tags={"floor": 3, "role": "wall"}) == ["lobby-left"]
+
+    def test_select_group_and_tag(self, inventory):
+        """Test combining a group with a tag."""
+        assert inventory.select(groups="ground", tags=["floor=1"]) == ["cafe"]
+        assert inventory.select(groups="lobby", tags=["floor=1"]) == []
+
+    def test_select_everything(self, inventory):
+        """Test that no filter selects every device."""
+        assert inventory.select() == ["cafe", "lobby-left", "lobby-right"]
+
+    def test_replacing_device_updates_index(self, inventory):
+        """Test that re-adding a device drops its old groups and tags."""
+        inventory.add("cafe", "192.168.1.128", groups=["kitchen"])
+
+        assert inventory.select(groups="ground") == ["lobby-left"]
+        assert inventory.select(tags=["floor=1"]) == []
+        assert inventory.groups["kitchen"] == ["cafe"]
+
+    def test_invalid_tag_raises_error(self):
+        """Test that tags must be key=value."""
+        with pytest.raises(ValueError, match="expected key=value"):
+            Inventory().select(tags=["floor"])
+
+    def test_fleet_uses_device_usernames(self, inventory):
+        """Test per-device auth when building a fleet."""
+        with inventory.fleet(["lobby-left", "lobby-right"], password="pw") as fleet:
+            assert isinstance(fleet, Fleet)
+            assert fleet.clients["lobby-left"].auth is None
+            assert fleet.clients["lobby-right"].auth == ("admin", "pw")
+
+
+class TestTargetedCommands:
+    """Test running trixctl commands on inventory groups and tags."""
+
+    @pytest.fixture
+    def home(self, tmp_path, monkeypatch, fake_devices):
+        """Write an inventory of stand-in devices to a temporary home."""
+        first, second = fake_devices(2)
+        (tmp_path / ".trixctl.conf").write_text(
+            f"[device:one]\nhost = {first.host}\ngroups = lobby\ntags = floor=3\n\n"
+            f"[device:two]\nhost = {second.host}\ngroups = lobby\n\n"
+            "[device:gone]\nhost = 127.0.0.1:1\ngroups = attic\n"
+        )
+        monkeypatch.setenv("HOME", str(tmp_path))
+        return first, second
+
+    def test_group_notify_reaches_every_device(self, home, capsys):
+        """Test a notification sent to a whole group."""
+        with patch("sys.argv", ["trixctl", "--group", "lobby", "notify", "Hi"]):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        for device in home:
+            assert device.requests[-1][:2] == ("POST", "/api/notify")
+        out = capsys.readouterr().out
+        assert "== one (" in out and "== two (" in out
+
+    def test_tag_selects_subset(self, home, capsys):
+        """Test that --tag narrows the devices called."""
+        with patch("sys.argv", ["trixctl", "--tag", "floor=3", "stats"]):
+            with pytest.raises(SystemExit):
+                main()
+
+        assert len(home[0].requests) == 1
+        assert home[1].requests == []
+        assert "Version 0.96" in capsys.readouterr().out
+
+    def test_failures_reported_per_device(self, home, capsys):
+        """Test that an unreachable device fails without hiding the rest."""
+        argv = ["trixctl", "--group", "lobby", "--group", "attic", "power", "off"]
+        with patch("sys.argv", argv):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 1
+        captured = capsys.readouterr()
+        assert "== gone (127.0.0.1:1) ==\nError:" in captured.err
+        assert "1 of 3 devices failed" in captured.err
+        assert "== one (" in captured.out
+
+    def test_group_uses_config_username(self, home, tmp_path, monkeypatch):
+        """Test that the global config username authenticates group calls."""
+        config = tmp_path / ".trixctl.conf"
+        config.write_text("[device]\nusername = admin\n\n" + config.read_text())
+        monkeypatch.setenv("TRIXCTL_PASSWORD", "pw")
+        seen = []
+        for device in home:
+            device.handlers[("POST", "/api/notify")] = lambda handler, body: (
+                seen.append(handler.headers.get("Authorization")) or (200, "")
+            )
+
+        with patch("sys.argv", ["trixctl", "--group", "lobby", "notify", "Hi"]):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 0
+        assert seen == ["Basic YWRtaW46cHc="] * 2
+
+    def test_no_matching_devices(self, home, capsys):
+        """Test selecting a group that doesn't exist."""
+        with patch("sys.argv", ["trixctl", "--group", "roof", "stats"]):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 1
+        assert "No inventory devices match" in capsys.readouterr().err
@@ -0,0 +1,177 @@
+"""Tests for the SQLite time-series store and stats --history."""
+
+from unittest.mock import patch
+
+import pytest
+
+from awtrix3 import Awtrix3, Fleet, MetricStore, StatsPoller, main
+
+DAY = 86400
+NOW = 1_760_000_000.0
+
+
+@pytest.fixture
+def store():
+    """An in-memory store."""
+    with MetricStore(":memory:") as store:
+        yield store
+
+
+def count(store, tier):
+    """Number of rows in a tier."""
+    return store._db.execute(f"SELECT COUNT(*) FROM {tier}").fetchone()[0]
+
+
+class TestMetricStore:
+    """Test recording, rolling up and querying samples."""
+
+    def test_samples_roll_up(self, store):
+        """Test that minute and hour rows aggregate raw samples."""
+        start = NOW - NOW % 3600
+        for n in range(8):
+            store.record("lobby", {"bat": 90 - n, "version": "0.96"}, start + n * 15)
+
+        raw = store.query("lobby", "bat", start, start + 3600, tier="raw")
+        minute = store.query("lobby", "bat", start, start + 3600, tier="minute")
+        hour = store.query("lobby", "bat", start, start + 3600, tier="hour")
+
+        assert len(raw["points"]) == 8
+        assert [p["count"] for p in minute["points"]] == [4, 4]
+        assert minute["points"][0] == {
+            "ts": start,
+            "count": 4,
+            "avg": 88.5,
+            "min": 87,
+            "max": 90,
+        }
+        assert hour["points"] == [
+            {"ts": start, "count": 8, "avg": 86.5, "min": 83, "max": 90}
+        ]
+        assert store.metrics("lobby") == ["bat"]
+
+    def test_non_numeric_fields_are_ignored(self, store):
+        """Test that only numeric polled metrics are stored."""
+        store.record("lobby", {"temp": 21.5, "version": "0.96", "bri": True}, NOW)
+        assert store.metrics("lobby") == ["temp"]
+
+    def test_query_reads_coarsest_needed_tier(self, store):
+        """Test tier selection by range length and retention."""
+        assert store.tier_for(NOW - 3600, NOW, now=NOW) == "raw"
+        assert store.tier_for(NOW - DAY, NOW, now=NOW) == "minute"
+        assert store.tier_for(NOW - 7 * DAY, NOW, now=NOW) == "hour"
+        # Raw data for the start of the range is gone after two days
+        assert store.tier_for(NOW - 3 * DAY, NOW - 3 * DAY + 60, now=NOW) == "minute"
+
+    def test_retention_per_tier(self, store):
+        """Test that each tier drops rows older than its retention."""
+        for day in range(40):
+            store.record("lobby", {"bat": day}, NOW - day * DAY)
+        store.prune(now=NOW)
+
+        assert count(store, "raw") == 3
+        assert count(store, "minute") == 30
+        assert count(store, "hour") == 40
+
+    def test_record_prunes_automatically(self):
+        """Test that recording prunes expired rows."""
+        with MetricStore(":memory:", retention={"raw": 60}) as store:
+            store.record("lobby", {"bat": 1}, NOW)
+            store.record("lobby", {"bat": 2}, NOW + 120)
+            assert count(store, "raw") == 1
+
+    def test_reads_during_concurrent_writes(self):
+        """Test querying from one thread while another records."""
+        import threading
+
+        with MetricStore(":memory:") as store:
+            errors = []
+
+            def write():
+                for n in range(2000):
+                    store.record("lobby", {"bat": n % 100, "temp": 20}, NOW + n)
+
+            def read():
+                try:
+                    while writer.is_alive():
+                        store.query("lobby", "bat", NOW, NOW + 2000, tier="raw")
+                        store.metrics("lobby")
+                except Exception as e:
+                    errors.append(e)
+
+            writer = threading.Thread(target=write)
+            reader = threading.Thread(target=read)
+            writer.start()
+            reader.start()
+            writer.join()
+            reader.join()
+
+            assert errors == []
+            points = store.query("lobby", "bat", NOW, NOW + 2000, tier="raw")
+            assert len(points["points"]) == 2000
+
+    def test_unknown_tier(self, store):
+        """Test querying a tier that doesn't exist."""
+        with pytest.raises(ValueError):
+            store.query("lobby", "bat", NOW, tier="day")
+
+    def test_poller_records_into_store(self, fake_devices, store):
+        """Test that StatsPoller writes every sample to its store."""
+        (device,) = fake_devices(1, stats={"bat": 77, "temp": 20})
+        with Fleet({"lobby": Awtrix3(device.host)}) as fleet:
+            StatsPoller(fleet, store=store).run(rounds=2, interval=0)
+
+        assert count(store, "raw") == 4
+        assert store.metrics("lobby") == ["bat", "temp"]
+
+
+class TestHistoryCommand:
+    """Test trixctl stats --history."""
+
+    @pytest.fixture
+    def home(self, tmp_path, monkeypatch):
+        """A temporary home with some stored history for one host."""
+        import time
+
+        monkeypatch.setenv("HOME", str(tmp_path))
+        now = time.time()
+        with MetricStore() as store:
+            for n in range(100):
+                stats = {"bat": 100 - n % 20, "temp": 20 + n % 5}
+                store.record("192.168.1.128", stats, now - n * 3600)
+        return tmp_path
+
+    def run(self, *argv):
+        """Run trixctl and return the exit code."""
+        args = ["trixctl", "--host", "192.168.1.128", "stats", *argv]
+        with patch("sys.argv", args), patch("awtrix3.load_config", return_value={}):
+            with pytest.raises(SystemExit) as exc:
+                main()
+        return exc.value.code
+
+    def test_history_renders_from_store(self, home, capsys):
+        """Test a summary line and sparkline per metric."""
+        with patch("awtrix3.requests.get") as get:
+            assert self.run("--history", "7d") == 0
+        get.assert_not_called()
+
+        out = capsys.readouterr().out.splitlines()
+        assert out[0] == "== 192.168.1.128 (192.168.1.128) =="
+        assert out[1].split()[:7] == ["bat", "min", "81", "avg", "90.5", "max", "100"]
+        assert out[2].startswith("temp")
+
+    def test_history_for_selected_metrics(self, home, capsys):
+        """Test limiting --history to some metrics."""
+        assert self.run("--history", "24h", "--metric", "temp") == 0
+        out = capsys.readouterr().out.splitlines()
+        assert [line.split()[0] for line in out[1:]] == ["temp"]
+
+    def test_no_history(self, tmp_path, monkeypatch, capsys):
+        """Test the error when nothing was recorded."""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        assert self.run("--history", "7d") == 1
+        assert "exporter --record" in capsys.readouterr().err
+
+    def test_invalid_duration(self, home, capsys):
+        """Test an unparseable --history value."""
+        assert self.run("--history", "soon") == 1
+        assert "Invalid duration" in capsys.readouterr().err
@@ -0,0 +1,164 @@
+"""Tests for the compact stats and app loop models."""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+import pytest
+
+from awtrix3 import AdaptivePoller, AppLoop, Awtrix3, DeviceStats, Fleet, format_stats
+
+STATS = {
+    "bat": 85,
+    "bat_raw": 620,
+    "type": 0,
+    "lux": 120.5,
+    "ldr_raw": 300,
+    "ram": 150000,
+    "bri": 80,
+    "temp": 21.3,
+    "hum": 40,
+    "uptime": 12345,
+    "wifi_signal": -60,
+    "messages": 3,
+    "version": "0.96",
+    "indicator1": False,
+    "indicator2": False,
+    "indicator3": False,
+    "app": "Time",
+    "uid": "awtrix_abc123",
+    "matrix": True,
+    "ip": "192.168.1.128",
+}
+LOOP = {"Time": 0, "Date": 1, "Temperature": 2, "Humidity": 3, "Battery": 4}
+
+
+def bytes_per_object(parse, body, count=5000):
+    """Average traced memory of many parsed snapshots."""
+    gc.collect()
+    tracemalloc.start()
+    snapshots = [parse(body) for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(snapshots) == count
+    return size / count
+
+
+class TestDeviceStats:
+    """Test the slotted stats model."""
+
+    def test_round_trip_and_dict_access(self):
+        """Test that the model reads like the plain dict."""
+        stats = DeviceStats.from_json(json.dumps(STATS).encode())
+
+        assert stats.bat == 85 and stats.temp == 21.3
+        assert stats["version"] == "0.96"
+        assert stats.get("battery") is None and "battery" not in stats
+        assert stats.to_dict() == STATS
+        assert stats == STATS
+        with pytest.raises(KeyError):
+            stats["battery"]
+
+    def test_unknown_fields_overflow(self):
+        """Test that unknown keys are kept in extra."""
+        stats = DeviceStats.from_dict({"bat": 50, "co2": 410})
+
+        assert stats.extra == {"co2": 410}
+        assert stats["co2"] == 410
+        assert stats.to_dict() == {"bat": 50, "co2": 410}
+        assert DeviceStats(bat=50).extra is None
+
+    def test_explicit_nulls_round_trip(self):
+        """Test that fields reported as null are kept apart from missing ones."""
+        data = {"bat": 50, "temp": None, "co2": None}
+        stats = DeviceStats.from_json(json.dumps(data))
+
+        assert stats.to_dict() == data
+        assert stats == data
+        assert "temp" in stats and stats["temp"] is None
+        assert "co2" in stats and stats["co2"] is None
+        assert "hum" not in stats
+        with pytest.raises(KeyError):
+            stats["hum"]
+        assert DeviceStats(bat=50).nulls is None
+
+    def test_body_must_be_an_object(self):
+        """Test that non-object bodies are rejected with ValueError."""
+        for body in (b"[1, 2]", b'"Time"', b"<html>"):
+            with pytest.raises(ValueError):
+                DeviceStats.from_json(body)
+            with pytest.raises(ValueError):
+                AppLoop.from_json(body)
+
+    def test_no_instance_dict(self):
+        """Test that instances only have slots."""
+        with pytest.raises(AttributeError):
+            DeviceStats(bat=1).__dict__
+
+    def test_strings_are_interned(self):
+        """Test that snapshots share repeated string values."""
+        first = DeviceStats.from_json(json.dumps(STATS))
+        second = DeviceStats.from_json(json.dumps(STATS))
+        assert first.version is second.version
+
+    def test_format_stats_accepts_model(self):
+        """Test formatting a DeviceStats like its dict."""
+        stats = {"uptime": 3600, "ram": 120, "version": "0.96"}
+        assert format_stats(DeviceStats.from_dict(stats)) == format_stats(stats)
+
+    def test_memory_compared_to_dicts(self):
+        """Test that snapshots take well under half the memory of dicts."""
+        body = json.dumps(STATS).encode()
+        as_dict = bytes_per_object(json.loads, body)
+        as_model = bytes_per_object(DeviceStats.from_json, body)
+
+        assert as_model * 3 < as_dict
+
+
+class TestAppLoop:
+    """Test the compact app loop model."""
+
+    def test_round_trip_and_dict_access(self):
+        """Test lookups, order and conversion back to the dict."""
+        loop = AppLoop.from_json(json.dumps({"Date": 1, "Time": 0}))
+
+        assert list(loop) == ["Time", "Date"]
+        assert loop["Date"] == 1 and loop.get("Weather") is None
+        assert "Time" in loop and len(loop) == 2
+        assert loop == {"Time": 0, "Date": 1}
+        assert loop.to_dict() == {"Time": 0, "Date": 1}
+        with pytest.raises(KeyError):
+            loop["Weather"]
+
+    def test_memory_compared_to_dicts(self):
+        """Test that an app loop takes well under half the memory of a dict."""
+        body = json.dumps(LOOP).encode()
+        as_dict = bytes_per_object(json.loads, body)
+        as_model = bytes_per_object(AppLoop.from_json, body)
+
+        assert as_model * 2 < as_dict
+        assert sys.getsizeof(AppLoop(LOOP)) < sys.getsizeof(LOOP)
+
+
+class TestTypedResults:
+    """Test requesting typed results from the client and poller."""
+
+    def test_client_typed_results(self, fake_devices):
+        """Test stats(typed=True) and list_apps(typed=True)."""
+        (device,) = fake_devices(1, stats=STATS, apps=LOOP)
+        client = Awtrix3(device.host)
+
+        assert isinstance(client.stats(typed=True), DeviceStats)
+        assert client.stats(typed=True) == client.stats()
+        assert client.list_apps(typed=True) == client.list_apps()
+
+    def test_adaptive_poller_typed_values(self, fake_devices):
+        """Test that the adaptive poller can cache compact values."""
+        (device,) = fake_devices(1, stats=STATS, apps=LOOP)
+        with Fleet({"lobby": Awtrix3(device.host)}) as fleet:
+            events = AdaptivePoller(fleet, typed=True).poll(0)
+
+        values = {event.endpoint: event.value for event in events}
+        assert isinstance(values["stats"], DeviceStats)
+        assert isinstance(values["loop"], AppLoop)
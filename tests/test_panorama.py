@@ -0,0 +1,138 @@
+"""Tests for multi-device panorama canvases."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from awtrix3 import Bitmap, Panorama
+
+
+def make_client(host):
+    """Create a mock client with a host name."""
+    client = Mock()
+    client.host = host
+    return client
+
+
+def sent_pixels(client):
+    """Return the pixels from the last draw sent to a mock client."""
+    return client.custom_app.call_args.kwargs["draw"][0]["db"][4]
+
+
+class TestPanorama:
+    """Test slicing and pushing panorama frames."""
+
+    def setup_method(self):
+        """Set up a panorama of two 2x1 tiles."""
+        self.left = make_client("192.168.1.128")
+        self.right = make_client("192.168.1.129")
+        self.panorama = Panorama([self.left, self.right], width=2, height=1)
+
+    def teardown_method(self):
+        """Stop the panorama worker threads."""
+        self.panorama.close()
+
+    def test_canvas_size(self):
+        """Test that the canvas spans all tiles."""
+        assert (self.panorama.width, self.panorama.height) == (4, 1)
+
+    def test_slice_flat_frame(self):
+        """Test slicing a flat frame into tiles."""
+        tiles = self.panorama.slice([1, 2, 3, 4])
+        assert [pixels for _, pixels in tiles] == [[1, 2], [3, 4]]
+
+    def test_push_sends_each_tile(self):
+        """Test that the first push updates every device."""
+        result = self.panorama.push([1, 2, 3, 4])
+
+        assert sent_pixels(self.left) == [1, 2]
+        assert sent_pixels(self.right) == [3, 4]
+        assert result["changed"] == [(0, 0), (1, 0)]
+        assert result["skew_ms"] >= 0
+        assert set(result["latency_ms"]) == {(0, 0), (1, 0)}
+
+    def test_push_skips_unchanged_tiles(self):
+        """Test that only changed tiles are sent again."""
+        self.panorama.push([1, 2, 3, 4])
+        result = self.panorama.push([1, 2, 9, 9])
+
+        assert self.left.custom_app.call_count == 1
+        assert self.right.custom_app.call_count == 2
+        assert result["changed"] == [(1, 0)]
+        assert result["skipped"] == [(0, 0)]
+
+    def test_failed_tile_is_retried(self):
+        """Test that a failed device is sent again on the next push."""
+        self.right.custom_app.side_effect = [ConnectionError("timeout"), None]
+
+        first = self.panorama.push([1, 2, 3, 4])
+        second = self.panorama.push([1, 2, 3, 4])
+
+        assert first["errors"] == {(1, 0): "timeout"}
+        assert second["changed"] == [(1, 0)]
+
+    def test_invalidate_resends_everything(self):
+        """Test forcing a full refresh."""
+        self.panorama.push([1, 2, 3, 4])
+        self.panorama.invalidate()
+        result = self.panorama.push([1, 2, 3, 4])
+
+        assert len(result["changed"]) == 2
+
+    def test_wrong_frame_size_raises_error(self):
+        """Test that frames must cover the whole canvas."""
+        with pytest.raises(ValueError, match="Frame must have 4 pixels"):
+            self.panorama.push([1, 2, 3])
+
+
+class TestPanoramaLayouts:
+    """Test grid layouts and frame formats."""
+
+    def test_grid_layout_with_gap(self):
+        """Test a 2x2 grid with an empty position."""
+        a, b, c = make_client("a"), make_client("b"), make_client("c")
+        with Panorama([[a, b], [c, None]], width=1, height=1) as panorama:
+            tiles = panorama.slice([[1, 2], [3, 4]])
+
+        assert (panorama.width, panorama.height) == (2, 2)
+        assert [(client.host, pixels) for client, pixels in tiles] == [
+            ("a", [1]),
+            ("b", [2]),
+            ("c", [3]),
+        ]
+
+    def test_devices_sharing_a_host(self):
+        """Test that tiles behind one host are tracked separately."""
+        left, right = make_client("proxy"), make_client("proxy")
+        with Panorama([left, right], width=1, height=1) as panorama:
+            panorama.push([1, 2])
+            result = panorama.push([1, 3])
+
+        assert result["changed"] == [(1, 0)]
+        assert result["skipped"] == [(0, 0)]
+        assert sent_pixels(right) == [3]
+
+    def test_layout_of_gaps(self):
+        """Test that a layout without devices still starts and pushes."""
+        with Panorama([[None, None]], width=1, height=1) as panorama:
+            assert panorama.push([1, 2])["changed"] == []
+
+    def test_flat_layout_with_columns(self):
+        """Test wrapping a flat device list into rows."""
+        clients = [make_client(str(i)) for i in range(4)]
+        with Panorama(clients, columns=2, width=1, height=1) as panorama:
+            assert (panorama.columns, panorama.rows) == (2, 2)
+
+    def test_push_bitmap(self):
+        """Test pushing a Bitmap spanning the canvas."""
+        left, right = make_client("left"), make_client("right")
+        with Panorama([left, right], width=1, height=2) as panorama:
+            panorama.push(Bitmap(2, 2, [1, 2, 3, 4]))
+
+        assert sent_pixels(left) == [1, 3]
+        assert sent_pixels(right) == [2, 4]
+
+    def test_empty_layout_raises_error(self):
+        """Test that a panorama needs devices."""
+        with pytest.raises(ValueError, match="at least one device"):
+            Panorama([])
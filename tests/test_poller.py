@@ -0,0 +1,143 @@
+"""Tests for the ring-buffer stats poller and Prometheus exporter."""
+
+import math
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from awtrix3 import Awtrix3, Fleet, RingBuffer, StatsPoller, main
+
+
+class TestRingBuffer:
+    """Test the fixed-capacity array buffer."""
+
+    def test_keeps_newest_samples_in_order(self):
+        """Test that old samples are overwritten once full."""
+        buffer = RingBuffer(3)
+        assert buffer.last is None
+        for value in range(5):
+            buffer.append(value)
+
+        assert buffer.values() == [2, 3, 4]
+        assert buffer.last == 4
+        assert len(buffer) == 3
+
+    def test_partially_filled(self):
+        """Test a buffer that hasn't wrapped yet."""
+        buffer = RingBuffer(4)
+        buffer.append(1.5)
+        assert buffer.values() == [1.5]
+
+    def test_invalid_capacity(self):
+        """Test that a zero capacity is rejected."""
+        with pytest.raises(ValueError):
+            RingBuffer(0)
+
+
+@pytest.fixture
+def fleet(fake_devices):
+    """Two stand-in devices reporting battery, RAM and WiFi signal."""
+    devices = fake_devices(2)
+    for number, device in enumerate(devices):
+        device.stats = {
+            "bat": 90 - number,
+            "ram": 150000,
+            "wifi_signal": -60 - number,
+            "version": "0.96",
+        }
+    clients = {f"clock{n}": Awtrix3(d.host) for n, d in enumerate(devices)}
+    with Fleet(clients) as fleet:
+        fleet.devices = devices
+        yield fleet
+
+
+class TestStatsPoller:
+    """Test polling stats into ring buffers."""
+
+    def test_history_per_device_and_metric(self, fleet):
+        """Test that each poll adds one sample per metric."""
+        poller = StatsPoller(fleet)
+        poller.run(rounds=2, interval=0)
+        fleet.devices[0].stats["bat"] = 80
+        poller.poll()
+
+        history = poller.history("clock0", "bat")
+        assert [value for _, value in history] == [90, 90, 80]
+        assert history[0][0] <= history[-1][0]
+        assert math.isnan(poller.history("clock0", "temp")[0][1])
+
+    def test_memory_stays_flat(self, fleet):
+        """Test that buffers never grow past their capacity."""
+        poller = StatsPoller(fleet, metrics=["bat"], capacity=4)
+        buffer = poller._buffers["clock0"]["bat"]
+        allocated = buffer._data.buffer_info()
+        poller.run(rounds=10, interval=0)
+
+        assert len(poller.history("clock0", "bat")) == 4
+        assert buffer._data.buffer_info() == allocated
+
+    def test_unknown_metric(self, fleet):
+        """Test asking for a metric that isn't polled."""
+        with pytest.raises(ValueError):
+            StatsPoller(fleet, metrics=["bat"]).history("clock0", "ram")
+
+    def test_prometheus_text(self, fleet):
+        """Test gauges for the newest samples and the up metric."""
+        fleet.devices[1].close()
+        poller = StatsPoller(fleet)
+        poller.poll()
+
+        text = poller.prometheus()
+        host = fleet.clients["clock0"].host
+        assert "# TYPE awtrix_bat gauge" in text
+        assert f'awtrix_bat{{device="clock0",host="{host}"}} 90 ' in text
+        assert f'awtrix_wifi_signal{{device="clock0",host="{host}"}} -60 ' in text
+        down = fleet.clients["clock1"].host
+        assert f'awtrix_up{{device="clock0",host="{host}"}} 1\n' in text
+        assert f'awtrix_up{{device="clock1",host="{down}"}} 0\n' in text
+        assert f'awtrix_poll_errors_total{{device="clock1",host="{down}"}} 1\n' in text
+        assert "awtrix_temp" not in text
+
+    def test_label_values_are_escaped(self, fleet):
+        """Test escaping backslashes, quotes and newlines in labels."""
+        fleet.clients['lobby "east"\\\nwall'] = fleet.clients.pop("clock0")
+        poller = StatsPoller(fleet, metrics=["bat"])
+        poller.poll()
+
+        text = poller.prometheus()
+        assert 'device="lobby \\"east\\"\\\\\\nwall"' in text
+        assert all(line.startswith(("#", "awtrix_")) for line in text.splitlines())
+
+    def test_serve_metrics_endpoint(self, fleet):
+        """Test scraping the HTTP endpoint."""
+        poller = StatsPoller(fleet)
+        poller.poll()
+        server = poller.serve(port=0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_port}"
+            response = requests.get(f"{url}/metrics", timeout=5)
+            missing = requests.get(f"{url}/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert response.status_code == 200
+        assert response.text == poller.prometheus()
+        assert missing.status_code == 404
+
+
+class TestExporterCommand:
+    """Test trixctl exporter."""
+
+    def test_exporter_polls_until_interrupted(self, fleet, capsys):
+        """Test that the exporter polls and shuts down on Ctrl-C."""
+        device = fleet.devices[0]
+        argv = ["trixctl", "--host", device.host, "exporter", "--port", "0"]
+        with patch("sys.argv", argv), patch("awtrix3.load_config", return_value={}):
+            with patch.object(StatsPoller, "run", side_effect=KeyboardInterrupt):
+                with pytest.raises(SystemExit) as exc:
+                    main()
+
+        assert exc.value.code == 0
+        assert "/metrics" in capsys.readouterr().err
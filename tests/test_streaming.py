@@ -0,0 +1,130 @@
+"""Tests for streaming JSON payloads."""
+
+import json
+import tracemalloc
+from array import array
+from unittest.mock import Mock, patch
+
+import pytest
+
+from awtrix3 import Awtrix3, RawJSON, _is_pixel_buffer, _json_body, iter_json
+
+
+def encode(obj, chunk_size=16 * 1024):
+    """Join the streamed chunks of a payload."""
+    return b"".join(iter_json(obj, chunk_size))
+
+
+class TestIterJson:
+    """Test chunked JSON encoding."""
+
+    def test_plain_payload_matches_json_dumps(self):
+        """Test that ordinary payloads encode as valid JSON."""
+        payload = {"text": "Let's go Mets!", "color": [255, 102, 0], "x": None}
+        assert json.loads(encode(payload)) == payload
+
+    def test_array_buffer(self):
+        """Test encoding an array.array as a JSON int list."""
+        pixels = array("I", range(300))
+        assert json.loads(encode({"db": [0, 0, 30, 10, pixels]})) == {
+            "db": [0, 0, 30, 10, list(range(300))]
+        }
+
+    def test_memoryview_buffer(self):
+        """Test encoding a memoryview slice of a larger buffer."""
+        frames = array("I", range(1024))
+        view = memoryview(frames)[256:512]
+        assert json.loads(encode(view)) == list(range(256, 512))
+
+    def test_multidimensional_memoryview(self):
+        """Test encoding a 2D memoryview as a flat list."""
+        view = memoryview(array("I", range(6))).cast("B").cast("I", (2, 3))
+        assert json.loads(encode(view)) == [0, 1, 2, 3, 4, 5]
+
+    def test_numpy_buffer(self):
+        """Test encoding a numpy frame."""
+        np = pytest.importorskip("numpy")
+        frame = np.arange(256, dtype=np.uint32).reshape(8, 32)
+        assert json.loads(encode([frame])) == [list(range(256))]
+
+    def test_numpy_scalars_are_not_buffers(self):
+        """Test that numpy scalars aren't treated as pixel buffers."""
+        np = pytest.importorskip("numpy")
+        assert not _is_pixel_buffer(np.uint32(5))
+        assert not _is_pixel_buffer(np.float64(0.5))
+        assert _is_pixel_buffer(np.zeros(4, dtype=np.uint32))
+
+    def test_body_holds_no_encoded_chunks(self):
+        """Test that a body re-encodes lazily instead of keeping its chunks."""
+        payload = {"db": array("I", [0xFFFFFF] * 200000)}
+        size = len(encode(payload))
+
+        tracemalloc.start()
+        body = _json_body(payload, chunk_size=4096)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        assert len(body) == size
+        assert held < size // 20
+        assert b"".join(body) == encode(payload)
+
+    def test_raw_json_is_embedded_verbatim(self):
+        """Test that pre-encoded fragments are copied as-is."""
+        raw = RawJSON(b'[{"t":"Mets","c":"FF6600"}]')
+        assert encode({"text": raw}) == b'{"text":[{"t":"Mets","c":"FF6600"}]}'
+
+    def test_escapes_keys(self):
+        """Test that dict keys are JSON-escaped."""
+        assert json.loads(encode({'a"b': array("I", [1])})) == {'a"b': [1]}
+
+    def test_chunks_are_bounded(self):
+        """Test that no chunk grows with the buffer size."""
+        pixels = array("I", [0xFFFFFF] * 200000)
+        chunks = list(iter_json({"db": pixels}, chunk_size=4096))
+
+        assert len(chunks) > 100
+        assert max(len(chunk) for chunk in chunks) < 2 * 4096
+        assert json.loads(b"".join(chunks)) == {"db": [0xFFFFFF] * 200000}
+
+
+class TestStreamingPayloads:
+    """Test that Awtrix3 streams buffer payloads."""
+
+    def setup_method(self):
+        """Set up test client."""
+        self.client = Awtrix3("192.168.1.128")
+
+    @patch("awtrix3.requests.post")
+    def test_custom_app_streams_buffers(self, mock_post):
+        """Test that a buffer in a draw command switches to a streamed body."""
+        mock_post.return_value = Mock(text="OK")
+        pixels = array("I", [0xFF6600] * 256)
+
+        self.client.custom_app("mets", "", draw=[{"db": [0, 0, 32, 8, pixels]}])
+
+        kwargs = mock_post.call_args.kwargs
+        assert "json" not in kwargs
+        assert kwargs["params"] == {"name": "mets"}
+        assert kwargs["headers"] == {"Content-Type": "application/json"}
+        body = b"".join(kwargs["data"])
+        assert len(body) == len(kwargs["data"])
+        assert json.loads(body)["draw"][0]["db"][4] == [0xFF6600] * 256
+
+    @patch("awtrix3.requests.post")
+    def test_notify_streams_raw_json(self, mock_post):
+        """Test that RawJSON text is sent through the streaming path."""
+        mock_post.return_value = Mock(text="")
+
+        self.client.notify(RawJSON(b'[{"t":"Mets","c":"FF6600"}]'))
+
+        body = b"".join(mock_post.call_args.kwargs["data"])
+        assert json.loads(body) == {"text": [{"t": "Mets", "c": "FF6600"}]}
+
+    @patch("awtrix3.requests.post")
+    def test_plain_payload_uses_json(self, mock_post):
+        """Test that ordinary payloads keep the regular json= path."""
+        mock_post.return_value = Mock(text="OK")
+
+        self.client.custom_app("mets", "", draw=[{"db": [0, 0, 1, 1, [1]]}])
+
+        assert mock_post.call_args.kwargs["json"]["draw"][0]["db"][4] == [1]
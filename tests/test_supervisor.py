@@ -0,0 +1,140 @@
+"""Tests for the multi-process sharded supervisor."""
+
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from awtrix3 import HashRing, ShardedSupervisor
+
+
+def unpicklable(client):
+    """A device call whose result can't be sent back to the supervisor."""
+    return threading.Lock()
+
+
+class TestHashRing:
+    """Test consistent hashing of devices onto workers."""
+
+    def test_assignment_is_stable(self):
+        """Test that the same key always maps to the same node."""
+        ring = HashRing(["w0", "w1", "w2"])
+        assert all(ring.get(f"dev{i}") == ring.get(f"dev{i}") for i in range(50))
+
+    def test_keys_spread_over_nodes(self):
+        """Test that every node gets a share of the keys."""
+        ring = HashRing(["w0", "w1", "w2", "w3"])
+        owners = {ring.get(f"192.168.{i // 256}.{i % 256}") for i in range(1000)}
+        assert owners == {"w0", "w1", "w2", "w3"}
+
+    def test_removing_node_only_moves_its_keys(self):
+        """Test minimal movement when a node leaves."""
+        ring = HashRing(["w0", "w1", "w2"])
+        keys = [f"dev{i}" for i in range(500)]
+        before = {key: ring.get(key) for key in keys}
+
+        ring.remove("w1")
+
+        for key in keys:
+            if before[key] != "w1":
+                assert ring.get(key) == before[key]
+            else:
+                assert ring.get(key) in {"w0", "w2"}
+
+    def test_empty_ring_raises_error(self):
+        """Test looking up a key on an empty ring."""
+        with pytest.raises(LookupError, match="empty"):
+            HashRing().get("dev")
+
+
+class TestShardedSupervisor:
+    """Test fanning calls out through worker processes."""
+
+    def test_run_across_workers(self, fake_devices):
+        """Test that every device answers through its worker."""
+        devices = fake_devices(6)
+        hosts = [device.host for device in devices]
+        with ShardedSupervisor(hosts, workers=3, timeout=5) as supervisor:
+            report = supervisor.run("stats")
+            metrics = supervisor.metrics()
+
+        assert set(report.values) == set(hosts)
+        assert report.failures == {}
+        assert sum(worker["tasks"] for worker in metrics.values()) == 6
+        assert sum(worker["devices"] for worker in metrics.values()) == 6
+
+    def test_failures_reported_as_strings(self, fake_devices):
+        """Test that device errors come back from workers."""
+        (device,) = fake_devices(1)
+        hosts = [device.host, "127.0.0.1:1"]
+        with ShardedSupervisor(hosts, workers=2, timeout=2) as supervisor:
+            report = supervisor.run("stats")
+
+        assert list(report.values) == [device.host]
+        assert "ConnectionError" in report.failures["127.0.0.1:1"]
+
+    def test_dead_worker_is_respawned(self, fake_devices):
+        """Test that a killed worker is restarted and calls still complete."""
+        devices = fake_devices(4)
+        hosts = [device.host for device in devices]
+        with ShardedSupervisor(hosts, workers=2, timeout=5) as supervisor:
+            before = supervisor.assignments()
+            os.kill(supervisor.workers["worker-0"].pid, signal.SIGKILL)
+            time.sleep(0.2)
+
+            report = supervisor.run("stats")
+
+            assert set(report.values) == set(hosts)
+            assert supervisor.assignments() == before
+            assert supervisor.metrics()["worker-0"]["restarts"] == 1
+
+    def test_dead_worker_is_rebalanced(self, fake_devices):
+        """Test moving devices to surviving workers without respawning."""
+        devices = fake_devices(4)
+        hosts = [device.host for device in devices]
+        with ShardedSupervisor(
+            hosts, workers=2, timeout=5, respawn=False
+        ) as supervisor:
+            os.kill(supervisor.workers["worker-0"].pid, signal.SIGKILL)
+            time.sleep(0.2)
+
+            report = supervisor.run("stats")
+
+            assert set(report.values) == set(hosts)
+            assert supervisor.assignments() == {"worker-1": hosts}
+
+    def test_unpicklable_result_is_reported(self, fake_devices):
+        """Test that a result the queue can't carry still comes back as an error."""
+        (device,) = fake_devices(1)
+        with ShardedSupervisor([device.host], workers=1, timeout=5) as supervisor:
+            report = supervisor.run(unpicklable)
+
+        assert "TypeError" in report.failures[device.host]
+
+    def test_deadline_fails_unanswered_calls(self, fake_devices):
+        """Test that a stuck worker can't hold a batch forever."""
+        devices = fake_devices(4)
+        hosts = [device.host for device in devices]
+        with ShardedSupervisor(hosts, workers=2, timeout=5) as supervisor:
+            stuck = supervisor.workers["worker-0"]
+            os.kill(stuck.pid, signal.SIGSTOP)
+            try:
+                start = time.monotonic()
+                results = list(supervisor.imap("stats", deadline=1))
+                elapsed = time.monotonic() - start
+            finally:
+                os.kill(stuck.pid, signal.SIGCONT)
+            owned = supervisor.assignments()["worker-0"]
+
+        assert elapsed < 3
+        assert len(results) == 4
+        failed = {result.device: result.error for result in results if not result.ok}
+        assert set(failed) == set(owned)
+        assert all(error.startswith("TimeoutError") for error in failed.values())
+
+    def test_needs_a_worker(self):
+        """Test that at least one worker is required."""
+        with pytest.raises(ValueError, match="at least one worker"):
+            ShardedSupervisor([], workers=0)
@@ -0,0 +1,207 @@
+"""Tests for device filesystem listing and hash-based sync."""
+
+import json
+
+import pytest
+
+from awtrix3 import Awtrix3, FileSync, Fleet
+
+
+@pytest.fixture
+def assets(tmp_path):
+    """A local asset directory with icons and melodies."""
+    root = tmp_path / "assets"
+    (root / "ICONS").mkdir(parents=True)
+    (root / "MELODIES").mkdir()
+    (root / "ICONS" / "mets.gif").write_bytes(b"GIF89a" + bytes(200))
+    (root / "ICONS" / "sun.gif").write_bytes(b"GIF89a" + bytes(100))
+    (root / "MELODIES" / "goal.txt").write_text("goal:d=4,o=5,b=100:c,e,g")
+    return root
+
+
+@pytest.fixture
+def device(fake_devices):
+    """A stand-in device with an in-memory filesystem."""
+    (device,) = fake_devices(1)
+    return device
+
+
+class TestFilesystemAPI:
+    """Test listing and deleting device files."""
+
+    def test_list_files_returns_absolute_names(self, device):
+        """Test that relative names are joined to the listed directory."""
+        device.files = {"/ICONS/mets.gif": b"abc", "/ICONS/anim/1.gif": b""}
+
+        entries = Awtrix3(device.host).list_files("/ICONS")
+
+        assert entries == [
+            {"type": "file", "name": "/ICONS/mets.gif", "size": 3},
+            {"type": "dir", "name": "/ICONS/anim"},
+        ]
+        assert device.requests[-1][1] == "/list?dir=%2FICONS"
+
+    def test_delete_file(self, device):
+        """Test deleting a file."""
+        device.files = {"/ICONS/mets.gif": b"abc"}
+
+        Awtrix3(device.host).delete_file("/ICONS/mets.gif")
+
+        assert device.files == {}
+        assert device.requests[-1][:2] == ("DELETE", "/edit")
+
+    def test_delete_file_requires_absolute_path(self):
+        """Test that relative paths are rejected."""
+        with pytest.raises(ValueError, match="absolute path"):
+            Awtrix3("192.168.1.128").delete_file("mets.gif")
+
+
+class TestFileSync:
+    """Test syncing a local directory to devices."""
+
+    def test_first_sync_uploads_everything(self, assets, device):
+        """Test that a fresh device gets every file."""
+        result = FileSync(assets).sync(Awtrix3(device.host))
+
+        assert result["upload"] == [
+            "/ICONS/mets.gif",
+            "/ICONS/sun.gif",
+            "/MELODIES/goal.txt",
+        ]
+        assert device.files["/ICONS/mets.gif"] == b"GIF89a" + bytes(200)
+        assert result["bytes"] == 206 + 106 + 24
+        assert FileSync.STATE_FILE not in str(list(device.files))
+
+    def test_second_sync_uploads_only_changes(self, assets, device):
+        """Test that unchanged files are skipped."""
+        client = Awtrix3(device.host)
+        FileSync(assets).sync(client)
+        (assets / "ICONS" / "sun.gif").write_bytes(b"GIF89a" + bytes(99) + b"\x01")
+
+        result = FileSync(assets).sync(client)
+
+        assert result["upload"] == ["/ICONS/sun.gif"]
+        assert result["unchanged"] == 2
+
+    def test_file_changed_on_device_is_reuploaded(self, assets, device):
+        """Test that a size mismatch on the device triggers an upload."""
+        client = Awtrix3(device.host)
+        FileSync(assets).sync(client)
+        device.files["/ICONS/mets.gif"] = b"truncated"
+
+        assert FileSync(assets).plan(client)["upload"] == ["/ICONS/mets.gif"]
+
+    def test_unchanged_files_are_not_rehashed(self, assets, device, monkeypatch):
+        """Test that cached hashes are reused when size and mtime match."""
+        FileSync(assets).sync(Awtrix3(device.host))
+        opened = []
+        real_open = open
+        monkeypatch.setattr(
+            "builtins.open",
+            lambda path, *a, **k: opened.append(str(path)) or real_open(path, *a, **k),
+        )
+
+        FileSync(assets).local_files()
+
+        assert not [path for path in opened if path.endswith(".gif")]
+
+    def test_delete_removes_stale_device_files(self, assets, device):
+        """Test deleting synced files that no longer exist locally."""
+        client = Awtrix3(device.host)
+        FileSync(assets / "ICONS", remote_dir="/ICONS").sync(client)
+        (assets / "ICONS" / "sun.gif").unlink()
+
+        result = FileSync(assets / "ICONS", remote_dir="/ICONS", delete=True).sync(
+            client
+        )
+
+        assert result["delete"] == ["/ICONS/sun.gif"]
+        assert "/ICONS/sun.gif" not in device.files
+        assert "/ICONS/mets.gif" in device.files
+
+    def test_delete_never_removes_files_it_did_not_upload(self, assets, device):
+        """Test that --delete at the root leaves foreign device files alone."""
+        foreign = {
+            "/config": b"",
+            "/DoNotTouch.json": b"{}",
+            "/ICONS/other.gif": b"x",
+        }
+        device.files = dict(foreign)
+
+        result = FileSync(assets, delete=True).sync(Awtrix3(device.host))
+
+        assert result["delete"] == []
+        for path in foreign:
+            assert path in device.files
+
+    def test_interrupted_sync_resumes(self, assets, device):
+        """Test that files uploaded before a failure are not sent again."""
+        client = Awtrix3(device.host)
+        real_upload = client.upload_file
+        calls = []
+
+        def flaky_upload(path, remote_path):
+            calls.append(remote_path)
+            if len(calls) == 2:
+                raise ConnectionError("link lost")
+            return real_upload(path, remote_path)
+
+        client.upload_file = flaky_upload
+        with pytest.raises(ConnectionError):
+            FileSync(assets).sync(client)
+
+        result = FileSync(assets).sync(Awtrix3(device.host))
+
+        assert result["upload"] == ["/ICONS/sun.gif", "/MELODIES/goal.txt"]
+        state = json.loads((assets / FileSync.STATE_FILE).read_text())
+        assert len(state["devices"][device.host]) == 3
+
+    def test_dry_run_changes_nothing(self, assets, device):
+        """Test that a dry run only reports the plan."""
+        result = FileSync(assets).sync(Awtrix3(device.host), dry_run=True)
+
+        assert len(result["upload"]) == 3
+        assert device.files == {}
+
+    def test_sync_fleet(self, assets, fake_devices):
+        """Test syncing several devices in parallel."""
+        devices = fake_devices(3)
+        with Fleet([Awtrix3(d.host) for d in devices], max_workers=2) as fleet:
+            report = FileSync(assets).sync_fleet(fleet)
+
+        assert report.failures == {}
+        assert all(len(d.files) == 3 for d in devices)
+
+    def test_sync_fleet_hashes_once(self, assets, fake_devices, monkeypatch):
+        """Test that every device reuses one local manifest."""
+        devices = fake_devices(3)
+        sync = FileSync(assets)
+        scans = []
+        real_local_files = sync.local_files
+        monkeypatch.setattr(
+            sync, "local_files", lambda: scans.append(1) or real_local_files()
+        )
+        with Fleet([Awtrix3(d.host) for d in devices]) as fleet:
+            report = sync.sync_fleet(fleet)
+
+        assert report.failures == {}
+        assert len(scans) == 1
+
+    def test_state_writes_are_batched(self, assets, device, monkeypatch):
+        """Test that the state file isn't rewritten after every file."""
+        for number in range(10):
+            (assets / "ICONS" / f"{number}.gif").write_bytes(b"GIF89a")
+        sync = FileSync(assets, save_every=4)
+        saves = []
+        real_save = sync._save_state
+        monkeypatch.setattr(sync, "_save_state", lambda: saves.append(1) or real_save())
+
+        result = sync.sync(Awtrix3(device.host))
+
+        assert len(result["upload"]) == 13
+        assert len(saves) == 4  # After 4, 8 and 12 files, then at the end
+
+    def test_missing_local_directory_raises_error(self, tmp_path):
+        """Test that the local directory must exist."""
+        with pytest.raises(ValueError, match="Not a directory"):
+            FileSync(tmp_path / "missing")
@@ -0,0 +1,110 @@
+"""Tests for compiled text-fragment templates."""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from awtrix3 import Awtrix3, RawJSON, TextTemplate
+
+
+class TestTextTemplate:
+    """Test compiling and rendering templates."""
+
+    def test_render_fragments(self):
+        """Test rendering colored spans with fields."""
+        template = TextTemplate("[#FF6600]{team}[/] {score}")
+
+        assert template.render(team="Mets", score=5) == [
+            {"t": "Mets", "c": "FF6600"},
+            {"t": " 5", "c": "FFFFFF"},
+        ]
+
+    def test_default_color(self):
+        """Test the color of text outside spans."""
+        template = TextTemplate("{price}", color="#00FF00")
+        assert template.render(price=1) == [{"t": "1", "c": "00FF00"}]
+
+    def test_nested_spans(self):
+        """Test that spans nest and restore the outer color."""
+        template = TextTemplate("[#FF0000]a[#0000ff]b[/]c[/]")
+
+        assert template.render() == [
+            {"t": "a", "c": "FF0000"},
+            {"t": "b", "c": "0000FF"},
+            {"t": "c", "c": "FF0000"},
+        ]
+
+    def test_adjacent_spans_of_same_color_merge(self):
+        """Test that same-colored neighbours become one fragment."""
+        template = TextTemplate("[#FF6600]Let's [/][#FF6600]go Mets![/]")
+        assert template.render() == [{"t": "Let's go Mets!", "c": "FF6600"}]
+
+    def test_format_specs_and_conversions(self):
+        """Test str.format field syntax."""
+        template = TextTemplate("{price:>7.2f} {name!r}")
+        assert template.render(price=3.14159, name="x")[0]["t"] == "   3.14 'x'"
+
+    def test_escaped_bracket(self):
+        """Test that [[ renders a literal bracket."""
+        assert TextTemplate("[[1]").render()[0]["t"] == "[1]"
+
+    def test_fields_listed_in_order(self):
+        """Test that field names are collected once, in order."""
+        template = TextTemplate("{a} [#FF0000]{b} {a}[/]")
+        assert template.fields == ["a", "b"]
+
+    def test_render_json_matches_render(self):
+        """Test that pre-encoded output equals the fragment list."""
+        template = TextTemplate('[#FF6600]{team}[/] "{score}"')
+        values = {"team": 'Mets "NY"', "score": 5}
+
+        encoded = template.render_json(**values)
+
+        assert isinstance(encoded, RawJSON)
+        assert json.loads(encoded) == template.render(**values)
+
+    def test_changed(self):
+        """Test cheap change detection per key."""
+        template = TextTemplate("{score}")
+
+        assert template.changed("mets", score=1) is True
+        assert template.changed("mets", score=1) is False
+        assert template.changed("yankees", score=1) is True
+        assert template.changed("mets", score=2) is True
+
+    def test_render_changed(self):
+        """Test rendering only when values change."""
+        template = TextTemplate("{score}")
+
+        assert template.render_changed("mets", score=1) is not None
+        assert template.render_changed("mets", score=1) is None
+
+    def test_unbalanced_spans_raise_error(self):
+        """Test that span markup must balance."""
+        with pytest.raises(ValueError, match="Unclosed color span"):
+            TextTemplate("[#FF0000]x")
+        with pytest.raises(ValueError, match="Unbalanced"):
+            TextTemplate("x[/]")
+
+    def test_positional_fields_raise_error(self):
+        """Test that fields must be named."""
+        with pytest.raises(ValueError, match="must be named"):
+            TextTemplate("{}")
+
+
+class TestTemplatesWithClient:
+    """Test sending rendered templates."""
+
+    @patch("awtrix3.requests.post")
+    def test_custom_app_with_rendered_json(self, mock_post):
+        """Test that pre-encoded fragments are sent without re-encoding."""
+        mock_post.return_value = Mock(text="OK")
+        template = TextTemplate("[#FF6600]Mets[/] {score}")
+
+        Awtrix3("192.168.1.128").custom_app("score", template.render_json(score=5))
+
+        body = b"".join(mock_post.call_args.kwargs["data"])
+        assert json.loads(body) == {
+            "text": [{"t": "Mets", "c": "FF6600"}, {"t": " 5", "c": "FFFFFF"}]
+        }
@@ -0,0 +1,231 @@
+"""Tests for host-side text rendering."""
+
+import pytest
+
+from awtrix3 import AWTRIX_FONT, Bitmap, PixelFont, TextMetrics, TextRasterizer
+
+
+class TestPixelFont:
+    """Test the bitmap font definition."""
+
+    def test_awtrix_font_covers_printable_ascii(self):
+        """Test that every printable ASCII character has a glyph."""
+        for code in range(32, 127):
+            assert chr(code) in AWTRIX_FONT.glyphs
+
+    def test_glyph_width(self):
+        """Test glyph widths for narrow, regular and wide characters."""
+        assert AWTRIX_FONT.glyph_width("i") == 1
+        assert AWTRIX_FONT.glyph_width("A") == 3
+        assert AWTRIX_FONT.glyph_width("M") == 5
+
+    def test_missing_character_uses_fallback(self):
+        """Test that unknown characters render as the fallback glyph."""
+        assert AWTRIX_FONT.rows("☃") == AWTRIX_FONT.rows("?")
+
+    def test_invalid_glyph_height_raises_error(self):
+        """Test that glyphs with the wrong row count are rejected."""
+        with pytest.raises(ValueError, match="must have 5 rows"):
+            PixelFont("broken", {"A": "# # #"})
+
+    def test_set_glyph_validates_height(self):
+        """Test that replacement glyphs must match the font height."""
+        font = PixelFont("custom", {"A": "# # # # #"})
+        with pytest.raises(ValueError, match="must have 5 rows"):
+            font.set_glyph("A", "# #")
+        assert font.version == 0
+
+
+class TestTextRasterizer:
+    """Test rendering strings to bitmaps."""
+
+    def setup_method(self):
+        """Set up a rasterizer."""
+        self.rasterizer = TextRasterizer()
+
+    def test_render_single_glyph(self):
+        """Test rendering one character."""
+        bitmap = self.rasterizer.render("1", "#FF0000")
+
+        assert (bitmap.width, bitmap.height) == (3, 5)
+        assert bitmap.to_rows()[0] == [0, 0xFF0000, 0]
+        assert bitmap.to_rows()[4] == [0xFF0000] * 3
+
+    def test_render_adds_spacing_between_glyphs(self):
+        """Test that glyphs are separated by one blank column."""
+        bitmap = self.rasterizer.render("11", 0x00FF00)
+
+        assert bitmap.width == 7
+        assert all(row[3] == 0 for row in bitmap.to_rows())
+
+    def test_render_colored_fragments(self):
+        """Test rendering firmware-style colored fragments."""
+        bitmap = self.rasterizer.render(
+            [{"t": "I", "c": "FF6600"}, {"t": "I", "c": "002D72"}]
+        )
+
+        row = bitmap.to_rows()[0]
+        assert row[:3] == [0xFF6600] * 3
+        assert row[4:] == [0x002D72] * 3
+
+    def test_render_tuple_fragments_match_dict_fragments(self):
+        """Test that tuple and dict fragments produce the same bitmap."""
+        as_dicts = self.rasterizer.render([{"t": "Go", "c": "#FFFFFF"}])
+        as_tuples = self.rasterizer.render([("Go", (255, 255, 255))])
+
+        assert as_dicts == as_tuples
+
+    def test_render_cache_hit(self):
+        """Test that re-rendering the same label is served from cache."""
+        first = self.rasterizer.render("Let's go Mets!", "#FF6600")
+        second = self.rasterizer.render("Let's go Mets!", "#FF6600")
+
+        assert first is second
+        assert self.rasterizer.cache_info()["text"]["hits"] == 1
+
+    def test_render_cache_keyed_by_color(self):
+        """Test that a different color is a separate cache entry."""
+        orange = self.rasterizer.render("Mets", "#FF6600")
+        blue = self.rasterizer.render("Mets", "#002D72")
+
+        assert orange is not blue
+        assert self.rasterizer.cache_info()["text"]["size"] == 2
+
+    def test_render_cache_evicts_least_recently_used(self):
+        """Test LRU eviction of rendered strings."""
+        rasterizer = TextRasterizer(cache_size=2)
+        first = rasterizer.render("A")
+        rasterizer.render("B")
+        rasterizer.render("A")
+        rasterizer.render("C")
+
+        assert rasterizer.render("A") is first
+        assert rasterizer.cache_info()["text"]["size"] == 2
+
+    def test_glyphs_shared_across_strings(self):
+        """Test that glyphs are reused between different strings."""
+        self.rasterizer.render("AB")
+        self.rasterizer.render("BA")
+
+        assert self.rasterizer.cache_info()["glyphs"]["size"] == 2
+
+    def test_fonts_sharing_a_name_are_cached_apart(self):
+        """Test that two fonts with the same name render their own glyphs."""
+        wide = PixelFont("custom", {"A": "## ## ## ## ##"})
+        narrow = PixelFont("custom", {"A": "# # # # #"})
+
+        assert self.rasterizer.render("A", font=wide).width == 2
+        assert self.rasterizer.render("A", font=narrow).width == 1
+
+    def test_edited_glyph_is_redrawn(self):
+        """Test that set_glyph invalidates cached bitmaps for the font."""
+        font = PixelFont("custom", {"A": "# # # # #"})
+        assert self.rasterizer.render("A", font=font).width == 1
+
+        font.set_glyph("A", "### ### ### ### ###")
+
+        assert self.rasterizer.render("A", font=font).width == 3
+
+    def test_draw_command(self):
+        """Test building a db draw command."""
+        command = self.rasterizer.draw("1", "#FFFFFF", x=4)
+
+        x, y, width, height, pixels = command["db"]
+        assert (x, y, width, height) == (4, AWTRIX_FONT.y_offset, 3, 5)
+        assert len(pixels) == 15
+
+    def test_invalid_color_raises_error(self):
+        """Test that malformed colors are rejected."""
+        with pytest.raises(ValueError, match="Invalid color"):
+            self.rasterizer.render("A", "#FFF")
+
+
+class TestBitmap:
+    """Test the Bitmap container."""
+
+    def test_size_mismatch_raises_error(self):
+        """Test that pixel count must match the dimensions."""
+        with pytest.raises(ValueError, match="does not match"):
+            Bitmap(2, 2, [0, 0, 0])
+
+    def test_to_draw(self):
+        """Test converting a bitmap to a draw command."""
+        bitmap = Bitmap(2, 1, [1, 2])
+        assert bitmap.to_draw(3, 4) == {"db": [3, 4, 2, 1, [1, 2]]}
+
+
+class TestTextMetrics:
+    """Test text width and scroll predictions."""
+
+    def setup_method(self):
+        """Set up metrics with the default font."""
+        self.metrics = TextMetrics()
+
+    def test_width_matches_rasterizer(self):
+        """Test that the width table agrees with rendered bitmaps."""
+        rasterizer = TextRasterizer()
+        for text in ["Let's go Mets!", "25°C", "MW iil", "x"]:
+            assert self.metrics.width(text) == rasterizer.render(text).width
+
+    def test_width_of_empty_text(self):
+        """Test that empty text has zero width."""
+        assert self.metrics.width("") == 0
+
+    def test_width_of_non_latin_text_uses_fallback(self):
+        """Test measuring characters outside the width table."""
+        assert self.metrics.width("☃") == AWTRIX_FONT.glyph_width("?")
+
+    def test_width_of_fragments(self):
+        """Test measuring colored fragments."""
+        fragments = [{"t": "Mets ", "c": "FF6600"}, {"t": "5", "c": "FFFFFF"}]
+        assert self.metrics.width(fragments) == self.metrics.width("Mets 5")
+
+    def test_short_text_does_not_scroll(self):
+        """Test that text narrower than the matrix keeps the default duration."""
+        prediction = self.metrics.predict("12:30")
+
+        assert prediction["scrolls"] is False
+        assert prediction["duration"] == 5
+
+    def test_long_text_scrolls(self):
+        """Test scroll time for text wider than the matrix."""
+        metrics = TextMetrics(scroll_pause=0, pixels_per_second=10)
+        text = "Let's go Mets! " * 3
+        width = metrics.width(text)
+
+        prediction = metrics.predict(text)
+
+        assert prediction["scrolls"] is True
+        assert prediction["scroll_time"] == pytest.approx((32 + width) / 10)
+        assert prediction["duration"] >= prediction["scroll_time"]
+
+    def test_icon_reduces_available_width(self):
+        """Test that an icon makes borderline text scroll."""
+        text = "ABCDEFG"  # 27 pixels wide
+        assert not self.metrics.predict({"text": text})["scrolls"]
+        assert self.metrics.predict({"text": text, "icon": 2099})["scrolls"]
+
+    def test_repeat_and_speed_scale_scroll_time(self):
+        """Test that repeat and per-app scroll speed are honored."""
+        text = "Let's go Mets! Let's go Mets!"
+        base = self.metrics.predict({"text": text})["scroll_time"]
+        slower = self.metrics.predict({"text": text, "repeat": 2, "scrollSpeed": 50})[
+            "scroll_time"
+        ]
+
+        assert slower == pytest.approx(base * 4)
+
+    def test_from_settings(self):
+        """Test reading scroll settings from a settings payload."""
+        metrics = TextMetrics.from_settings(
+            {"scrollSpeed": 50, "scrollPause": 1000, "textOffset": 6}
+        )
+
+        assert metrics.scroll_speed == 50
+        assert metrics.scroll_pause == 1000
+        assert metrics.text_offset == 6
+
+    def test_invalid_scroll_speed_raises_error(self):
+        """Test that a non-positive scroll speed is rejected."""
+        with pytest.raises(ValueError, match="Scroll speed must be positive"):
+            TextMetrics(scroll_speed=0)
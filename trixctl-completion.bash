@@ -17,10 +17,10 @@ _trixctl_completion() {
     prev="${COMP_WORDS[COMP_CWORD-1]}"
 
     # Global options
-    opts="--host --username --password --generate-config --help"
+    opts="--host --username --password --group --tag --where --generate-config --help"
     
     # Commands
-    commands="notify stats power app sound backup restore clock settings"
+    commands="notify stats power app sound backup restore clock settings discover sync firmware query health exporter watch events"
     
     # If we're completing the first argument after trixctl
     if [[ ${COMP_CWORD} -eq 1 ]]; then
@@ -43,6 +43,10 @@ _trixctl_completion() {
             # Don't complete passwords
             return 0
             ;;
+        --group|--tag|--where)
+            # Group names and key=value tags come from the inventory
+            return 0
+            ;;
     esac
     
     # Handle subcommands
@@ -56,22 +60,23 @@ _trixctl_completion() {
             # These commands take text arguments - no specific completion
             ;;
         stats)
-            # stats takes no arguments
+            # History options
+            COMPREPLY=( $(compgen -W "--history --metric" -- ${cur}) )
             ;;
         backup)
             # Complete with JSON file extension and options
             if [[ ${cur} == -* ]]; then
-                COMPREPLY=( $(compgen -W "--include-stats" -- ${cur}) )
+                COMPREPLY=( $(compgen -W "--include-stats --incremental --rebase-every" -- ${cur}) )
             else
-                COMPREPLY=( $(compgen -f -X '!*.json' -- ${cur}) )
+                COMPREPLY=( $(compgen -f -X '!*.json' -- ${cur}) $(compgen -f -X '!*.jsonl' -- ${cur}) )
             fi
             ;;
         restore)
             # Complete with JSON files and options
             if [[ ${cur} == -* ]]; then
-                COMPREPLY=( $(compgen -W "--dry-run --force" -- ${cur}) )
+                COMPREPLY=( $(compgen -W "--dry-run --force --device --at" -- ${cur}) )
             else
-                COMPREPLY=( $(compgen -f -X '!*.json' -- ${cur}) )
+                COMPREPLY=( $(compgen -f -X '!*.json' -- ${cur}) $(compgen -f -X '!*.jsonl' -- ${cur}) $(compgen -f -X '!*.zip' -- ${cur}) )
             fi
             ;;
         clock)
@@ -81,6 +86,54 @@ _trixctl_completion() {
         settings)
             # settings takes JSON payload - no specific completion
             ;;
+        sync)
+            # Local directory and options
+            if [[ ${cur} == -* ]]; then
+                COMPREPLY=( $(compgen -W "--remote-dir --delete --dry-run" -- ${cur}) )
+            else
+                COMPREPLY=( $(compgen -d -- ${cur}) )
+            fi
+            ;;
+        firmware)
+            # Firmware image and rollout options
+            if [[ ${cur} == -* ]]; then
+                COMPREPLY=( $(compgen -W "--waves --concurrency --max-failure-rate --expect-version --health-timeout" -- ${cur}) )
+            else
+                COMPREPLY=( $(compgen -f -X '!*.bin' -- ${cur}) )
+            fi
+            ;;
+        query)
+            # SQL condition and options
+            COMPREPLY=( $(compgen -W "--refresh --max-age --columns" -- ${cur}) )
+            ;;
+        health)
+            # Probe schedule and reporting options
+            COMPREPLY=( $(compgen -W "--rounds --interval --degraded-ms --worst" -- ${cur}) )
+            ;;
+        exporter)
+            # Port and polling options
+            COMPREPLY=( $(compgen -W "--port --interval --capacity" -- ${cur}) )
+            ;;
+        watch)
+            # Endpoints and polling bounds
+            if [[ ${prev} == --endpoint ]]; then
+                COMPREPLY=( $(compgen -W "stats loop" -- ${cur}) )
+            else
+                COMPREPLY=( $(compgen -W "--endpoint --min-interval --max-interval" -- ${cur}) )
+            fi
+            ;;
+        events)
+            # Receiver options
+            if [[ ${prev} == --kind ]]; then
+                COMPREPLY=( $(compgen -W "button app stats" -- ${cur}) )
+            else
+                COMPREPLY=( $(compgen -W "--port --mqtt --mqtt-port --kind" -- ${cur}) )
+            fi
+            ;;
+        discover)
+            # Optional CIDR range and options
+            COMPREPLY=( $(compgen -W "--timeout --no-mdns --write" -- ${cur}) )
+            ;;
         *)
             # Default to global options
             COMPREPLY=( $(compgen -W "${opts}" -- ${cur}) )